@@ -1,30 +1,282 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, send_file, jsonify
+from flask import Flask, Request, Response, g, stream_with_context, render_template, request, redirect, url_for, flash, send_file, send_from_directory, jsonify
+import base64
 from werkzeug.utils import secure_filename
+from urllib.parse import quote
 import os
 import sqlite3
-from datetime import datetime
+import hashlib
+from datetime import datetime, timedelta, timezone
 import zipfile
+import tarfile
+import zlib
+import struct
+import itertools
 import io
+import mimetypes
+import json
+import shutil
+import unicodedata
 import qrcode
-from PIL import Image
+import qrcode.image.svg
+import functools
+from PIL import Image, ImageOps
 import uuid
+from collections import deque
 import threading
+import contextlib
 import time
-from collections import defaultdict
+import argparse
+import queue
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+try:
+    import fcntl
+except ImportError:  # Windows: süreçler arası dosya kilidi yok, yalnız süreç içi kilit kullanılır
+    fcntl = None
+
+class UploadRejected(Exception):
+    """Yüklemeyi gövdenin kalanı okunmadan durdurur
+
+    ValueError'dan türetilmez; Werkzeug form ayrıştırırken ValueError'ı yutar
+    ve istek boş formla devam ederdi.
+    """
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+IMAGE_SNIFF_SIZE = 12  # Türü anlamak için gereken ilk bayt sayısı
+HEIF_BRANDS = {b'heic', b'heix', b'hevc', b'hevx', b'heim', b'heis', b'mif1', b'msf1'}
+
+
+def sniff_image_type(header):
+    """Dosyanın ilk baytlarından desteklenen görsel türünü bul; tanınmazsa None"""
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if header[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    if header[4:8] == b'ftyp' and header[8:12] in HEIF_BRANDS:
+        return 'heic'
+    return None
+
+
+class UploadSink:
+    """Multipart dosya parçasını ara belleğe almadan doğrudan hedef dosyaya yazar"""
+
+    def __init__(self, file_path, original_filename=''):
+        self.file_path = file_path
+        self.filename = os.path.basename(file_path)
+        self.original_filename = original_filename
+        self.size = 0
+        self.image_type = None
+        self._header = b''
+        self._hash = hashlib.sha256()
+        self._file = open(file_path, 'wb')
+
+    @property
+    def content_hash(self):
+        return self._hash.hexdigest()
+
+    def write(self, data):
+        # İlk baytlar gelir gelmez türe bak; görsel değilse kalan gövde okunmaz
+        if self.image_type is None and len(self._header) < IMAGE_SNIFF_SIZE:
+            self._header += data[:IMAGE_SNIFF_SIZE]
+            if len(self._header) >= IMAGE_SNIFF_SIZE:
+                self.image_type = sniff_image_type(self._header)
+                if self.image_type is None:
+                    raise UploadRejected(f'{self.original_filename}: Dosya bir fotoğraf değil', 415)
+        self._file.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def seek(self, offset, whence=0):
+        # Werkzeug parça bitince seek(0) çağırır; yazılan veri tekrar okunmaz
+        return self._file.seek(offset, whence) if not self._file.closed else 0
+
+    def tell(self):
+        return self.size
+
+    def read(self, size=-1):
+        return b''
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def discard(self):
+        """Yarım kalan ya da reddedilen dosyayı sil"""
+        self.close()
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+
+
+class StreamingRequest(Request):
+    """/upload isteklerindeki fotoğrafları doğrudan UPLOAD_FOLDER'a akıtan istek sınıfı"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_sinks = []
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint == 'upload_files' and filename and allowed_file(filename):
+            file_extension = filename.rsplit('.', 1)[1].lower()
+            unique_filename = f"{uuid.uuid4()}.{file_extension}"
+            sink = UploadSink(photo_storage_path(unique_filename, create=True), filename)
+            self.upload_sinks.append(sink)
+            return sink
+
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
 
 app = Flask(__name__)
+app.request_class = StreamingRequest
 app.secret_key = 'your-secret-key-here'  # Güvenlik için değiştirin
 
 # Konfigürasyon
+DATABASE = 'wedding_photos.db'
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'heic', 'webp'}
 MAX_CONTENT_LENGTH = 200 * 1024 * 1024  # 200MB max file size
 
+# Parçalı (devam ettirilebilir) yükleme ayarları
+CHUNK_SIZE = 4 * 1024 * 1024  # Her istekte gönderilen parça boyutu (4MB)
+PARTIAL_FOLDER = os.path.join(UPLOAD_FOLDER, '.partial')
+UPLOAD_SESSION_TTL = 24 * 60 * 60  # Tamamlanmayan oturumlar 24 saat sonra silinir
+
+# Parçalar geldikçe güncellenen içerik özetleri: {session_id: (offset, sha256, son kullanım)}
+# Süreç yeniden başlarsa ya da parçalar başka işçiye düşerse özet tamamlama sırasında dosyadan hesaplanır
+upload_session_hashes = {}
+upload_session_hashes_lock = threading.Lock()
+UPLOAD_HASH_IDLE = 10 * 60  # Bu kadar süre parça gelmeyen oturumun özeti bellekten atılır (sn)
+
+# Önizleme (küçük resim) ayarları
+RENDITION_FOLDER = 'renditions'
+RENDITION_SIZES = {'preview': 1600, 'thumbnail': 320}  # En uzun kenar (px), büyükten küçüğe
+RENDITION_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+RENDITION_POOL_RETRIES = 1  # Havuz çökünce (süreç öldü, bellek bitti) görev yeni havuzda kaç kez denenir
+RENDITIONS_ENABLED = True  # Ölçümlerde veritabanını yalnız bırakmak için kapatılabilir
+
+# EXIF (çekim zamanı, yön, kamera, boyut) önizlemelerle aynı işlem havuzunda okunur
+METADATA_ENABLED = True
+METADATA_BATCH_SIZE = 500  # Toplu doldurmada bir işlemde yazılan kayıt
+# Çekim zamanı yoksa yükleme zamanı kullanılır; sorgular indeksle aynı ifadeyi kullanmalı
+CAPTURE_EPOCH = 'COALESCE(taken_epoch, upload_epoch)'
+
+# Yakın kopyalar: 64 bitlik algısal fark özeti (dHash) aynı aşamada hesaplanır
+DHASH_SIZE = 8  # 8x8 karşılaştırma = 64 bit
+DUPLICATE_MAX_DISTANCE = 7  # En fazla bu kadar biti farklı özetler benzer sayılır
+DUPLICATE_GROUP_LIMIT = 100  # /api/duplicates yanıtındaki en fazla grup
+
+# Yüz arama (isteğe bağlı): dlib'in HOG algılayıcısı, 5 noktalı hizalama ve ResNet
+# yüz vektörleri. Gerekenler: pip install numpy dlib-bin==20.0.1.post1 face_recognition_models==0.3.0
+# face_data/face_<kişi>_<n>.jpg kırpıntıları kişilerin referans yüzleridir
+FACES_ENABLED = True
+FACE_DATA_FOLDER = 'face_data'
+# face_recognition_models 0.3.0 içindeki model dosyaları ve SHA-256 özetleri; tutmazsa yüz arama kapanır
+FACE_MODEL_FILES = {
+    'landmarks': ('shape_predictor_5_face_landmarks.dat',
+                  'c4b1e9804792707d3a405c2c16a80a20269e6675021f64a41d30fffafbc41888'),
+    'recognizer': ('dlib_face_recognition_resnet_model_v1.dat',
+                   '55533b28a95800a551ba546ba62fe69625c7e95a7061c338adffead08719da30'),
+}
+FACE_MODEL = 'dlib-resnet-v1'  # photos.face_model değeri; değişirse fotoğraflar yeniden taranır
+FACE_DETECT_SIZE = 1280  # Algılama bu boyuta küçültülmüş görüntüde yapılır (en uzun kenar)
+FACE_DETECT_UPSAMPLE = 1  # HOG ~80 px'den küçük yüzü görmez; görüntü bir kez büyütülüp taranır
+FACE_MATCH_DISTANCE = 0.6  # Aynı kişi sayılan en büyük Öklid uzaklığı (dlib'in önerdiği eşik)
+FACE_BATCH_SIZE = 16  # Toplu taramada bir görevde işlenen fotoğraf
+FACE_SEARCH_CHUNK = 65536  # Aramada tek matris çarpımına giren en fazla yüz
+
+# Fotoğraf gönderimi: None ise Flask gönderir (sunucu destekliyorsa sendfile ile),
+# 'x-sendfile' Apache/lighttpd, 'x-accel' nginx önündeyken dosyayı sunucuya bırakır.
+# nginx için: location /_protected/ { internal; alias /uygulama/klasoru/; }
+PHOTO_SENDFILE_MODE = None
+X_ACCEL_PREFIX = '/_protected/'
+PHOTO_IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Hazır arşiv önbelleği: tüm fotoğraflar ve yükleyen başına ZIP
+ARCHIVE_FOLDER = 'archives'
+ARCHIVE_BUILD_DELAY = 30  # Son yüklemeden sonra bu kadar saniye sessizlik beklenir
+ARCHIVE_BUILD_MAX_WAIT = 10 * 60  # Yüklemeler hiç durmasa da ilk değişiklikten en geç bu kadar sonra güncellenir
+ARCHIVES_ENABLED = True
+
+# Parçalı dışa aktarma: etkinlik belirli boyutta ZIP ciltlerine bölünür
+EXPORT_FOLDER = 'exports'
+EXPORT_DEFAULT_VOLUME_MB = 2048
+EXPORT_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+# Veritabanı bağlantı havuzu: her iş parçacığı tek bağlantıyı yeniden kullanır
+DB_POOL_ENABLED = True
+DB_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',  # Okuyucular yazarı beklemez
+    'PRAGMA synchronous=NORMAL',  # WAL ile güvenli, her commit'te fsync yok
+    'PRAGMA mmap_size=268435456',  # 256MB bellek eşlemeli okuma
+    'PRAGMA cache_size=-16384',  # 16MB sayfa önbelleği
+    'PRAGMA temp_store=MEMORY'
+]
+
+# Yükleme kabul denetimi (işçi süreç başına): sınır aşılınca 503 + Retry-After
+UPLOAD_MAX_CONCURRENT = 16  # Aynı anda işlenen yükleme isteği
+UPLOAD_MAX_INFLIGHT_BYTES = 256 * 1024 * 1024  # İşlenen isteklerin toplam gövde boyutu
+UPLOAD_MAX_WAITING = 64  # Yer açılmasını bekleyebilecek istek sayısı
+UPLOAD_ADMISSION_WAIT = 0.5  # Bekleme sırasındaki istek en fazla bu kadar bekler (sn)
+UPLOAD_RETRY_AFTER = 2  # İstemciye önerilen bekleme (sn)
+
+# Gövde okunmadan yapılan ön denetimler
+UPLOAD_MIN_FREE_BYTES = 1024 * 1024 * 1024  # Yüklemeden sonra diskte kalması gereken boş alan
+UPLOADER_QUOTA_BYTES = 5 * 1024 * 1024 * 1024  # Yükleyen başına toplam boyut (None: sınırsız)
+
+# Fotoğraf kayıtları tek yazıcı iş parçacığında toplu işlemlerle yazılır
+PHOTO_WRITER_BATCH_SIZE = 100  # Bir işlemdeki en fazla kayıt
+PHOTO_WRITER_MAX_DELAY = 0.005  # Bir grubu toplamak için en fazla süre (sn)
+
+# Her işçi ölçümlerini ortak tabloya yazar; /metrics tüm işçilerin toplamını verir
+METRICS_PUBLISH_INTERVAL = 5  # Bir işçinin kendi satırını yenileme aralığı (sn)
+METRICS_STALE_AFTER = 3 * METRICS_PUBLISH_INTERVAL  # Bu kadar yenilenmeyen satır ölü işçinindir
+
+# Varsayılan site ayarları
+DEFAULT_SETTINGS = [
+    ('site_title', 'BYT DIGITAL'),
+    ('site_description', 'Anılarınızı Paylaşın'),
+    ('site_emoji', '💒❤️'),
+    ('background_image', ''),
+    ('background_opacity', '0.1'),
+    ('container_background_image', ''),
+    ('container_background_opacity', '0.2'),
+    ('copyright_text', 'BYT DIGITAL © 2025 - TÜM HAKLARI SAKLIDIR')
+]
+ADMIN_PAGE_SIZE = 50  # Admin klasörlerinde bir seferde yüklenen fotoğraf
+ADMIN_MAX_PAGE_SIZE = 200
+STATS_RECENT_WINDOW = 3600  # "Son yüklemeler" penceresi (sn)
+STATS_RESYNC_INTERVAL = 5.0  # Sayaçların veritabanıyla eşitlenme aralığı (sn)
+STATS_KEEPALIVE_INTERVAL = 15  # Olay yokken SSE bağlantısına yorum gönderme aralığı (sn)
+# Her SSE bağlantısı açık kaldığı sürece bir iş parçacığını tutar. serve altında
+# işçi başına akış sınırı --threads değerinden bu sayı çıkarılarak bulunur; ayrılan
+# iş parçacıkları yüklemelere ve sayfalara kalır. İzleyici sayısı --threads ve
+# --workers ile artırılır: (threads - STATS_RESERVED_THREADS) x workers
+STATS_RESERVED_THREADS = 8
+STATS_STREAM_MAX_AGE = 5 * 60  # Akış bu kadar sonra kapanır, tarayıcı yeniden bağlanır (sn)
+STATS_STREAM_RETRY_AFTER = 15  # Sınır doluyken istemciye önerilen bekleme (sn)
+SETTINGS_CHECK_INTERVAL = 1.0  # Diğer süreçlerin ayar değişikliği en geç bu kadar sürede görülür (sn)
+
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+app.config['USE_X_SENDFILE'] = PHOTO_SENDFILE_MODE == 'x-sendfile'
 
 # Klasörleri oluştur
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+os.makedirs(PARTIAL_FOLDER, exist_ok=True)
+for rendition in RENDITION_SIZES:
+    os.makedirs(os.path.join(RENDITION_FOLDER, rendition), exist_ok=True)
+os.makedirs(ARCHIVE_FOLDER, exist_ok=True)
+os.makedirs(EXPORT_FOLDER, exist_ok=True)
 os.makedirs('static', exist_ok=True)
 os.makedirs('templates', exist_ok=True)
 
@@ -34,7 +286,7 @@ def allowed_file(filename):
 
 
 def init_db():
-    conn = sqlite3.connect('wedding_photos.db')
+    conn = connect_db()
     c = conn.cursor()
 
     # Fotoğraflar tablosu
@@ -49,6 +301,67 @@ def init_db():
         )
     ''')
 
+    # Yükleyen özet tablosu: sayaçlar photos üzerindeki tetikleyicilerle güncellenir
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS uploaders (
+            uploader_name TEXT PRIMARY KEY,
+            photo_count INTEGER NOT NULL DEFAULT 0,
+            total_size INTEGER NOT NULL DEFAULT 0,
+            latest_upload TIMESTAMP
+        )
+    ''')
+
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS photos_uploaders_insert AFTER INSERT ON photos
+        BEGIN
+            INSERT INTO uploaders (uploader_name, photo_count, total_size, latest_upload)
+            VALUES (COALESCE(NULLIF(NEW.uploader_name, ''), 'Anonim'), 1,
+                    COALESCE(NEW.file_size, 0), NEW.upload_time)
+            ON CONFLICT (uploader_name) DO UPDATE SET
+                photo_count = photo_count + 1,
+                total_size = total_size + excluded.total_size,
+                latest_upload = MAX(COALESCE(latest_upload, ''), excluded.latest_upload);
+        END
+    ''')
+
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS photos_uploaders_delete AFTER DELETE ON photos
+        BEGIN
+            UPDATE uploaders SET
+                photo_count = photo_count - 1,
+                total_size = total_size - COALESCE(OLD.file_size, 0),
+                latest_upload = (
+                    SELECT MAX(upload_time) FROM photos
+                    WHERE COALESCE(NULLIF(uploader_name, ''), 'Anonim') = uploaders.uploader_name
+                )
+            WHERE uploader_name = COALESCE(NULLIF(OLD.uploader_name, ''), 'Anonim');
+
+            DELETE FROM uploaders
+            WHERE uploader_name = COALESCE(NULLIF(OLD.uploader_name, ''), 'Anonim') AND photo_count <= 0;
+        END
+    ''')
+
+    # Tablo yeni oluşturulduysa mevcut fotoğraflardan doldur
+    if c.execute('SELECT COUNT(*) FROM uploaders').fetchone()[0] == 0:
+        rebuild_uploader_stats(conn)
+
+    # Parçalı yükleme oturumları tablosu
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS upload_sessions (
+            id TEXT PRIMARY KEY,
+            original_filename TEXT NOT NULL,
+            uploader_name TEXT,
+            file_size INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Şema sürümünü güncelle
+    apply_migrations(conn)
+
+    # Özeti olmayan eski fotoğraflar açılışta değil, arka planda
+    # (schedule_missing_hashes) ya da backfill-hashes komutuyla hesaplanır
+
     # Site ayarları tablosu
     c.execute('''
         CREATE TABLE IF NOT EXISTS site_settings (
@@ -59,19 +372,17 @@ def init_db():
         )
     ''')
 
-    # Varsayılan ayarları ekle
-    default_settings = [
-        ('site_title', 'BYT DIGITAL'),
-        ('site_description', 'Anılarınızı Paylaşın'),
-        ('site_emoji', '💒❤️'),
-        ('background_image', ''),
-        ('background_opacity', '0.1'),
-        ('container_background_image', ''),
-        ('container_background_opacity', '0.2'),
-        ('copyright_text', 'BYT DIGITAL © 2025 - TÜM HAKLARI SAKLIDIR')
-    ]
+    # Ayar sürümü: her ayar değişikliğinde artar, önbellekler bununla yenilenir
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS app_meta (
+            meta_key TEXT PRIMARY KEY,
+            meta_value INTEGER NOT NULL
+        )
+    ''')
+    c.execute("INSERT OR IGNORE INTO app_meta (meta_key, meta_value) VALUES ('settings_version', 1)")
 
-    for key, value in default_settings:
+    # Varsayılan ayarları ekle
+    for key, value in DEFAULT_SETTINGS:
         c.execute('''
             INSERT OR IGNORE INTO site_settings (setting_key, setting_value)
             VALUES (?, ?)
@@ -81,64 +392,1416 @@ def init_db():
     conn.close()
 
 
-def get_db_connection():
-    conn = sqlite3.connect('wedding_photos.db')
+def add_column_if_missing(c, table, column, definition):
+    columns = [row[1] for row in c.execute(f'PRAGMA table_info({table})')]
+    if column not in columns:
+        c.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+def migrate_photo_columns(c):
+    """İçerik özeti ve önizleme sütunları"""
+    add_column_if_missing(c, 'photos', 'content_hash', 'TEXT')
+    add_column_if_missing(c, 'photos', 'thumbnail_path', 'TEXT')
+    add_column_if_missing(c, 'photos', 'preview_path', 'TEXT')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_photos_content_hash ON photos (content_hash)')
+
+
+def migrate_epoch_timestamps(c):
+    """Tam sayı (epoch) yükleme zamanı ve sık sorgular için indeksler"""
+    add_column_if_missing(c, 'photos', 'upload_epoch', 'INTEGER')
+    c.execute('''
+        UPDATE photos SET upload_epoch = CAST(strftime('%s', upload_time) AS INTEGER)
+        WHERE upload_epoch IS NULL
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_photos_upload_epoch ON photos (upload_epoch)')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_photos_uploader_epoch ON photos (uploader_name, upload_epoch)
+    ''')
+
+
+def migrate_anonymous_uploaders(c):
+    """Boş yükleyen adlarını 'Anonim' yap ki yükleyen sorguları tek eşitlikle indeksi kullansın"""
+    c.execute("UPDATE photos SET uploader_name = 'Anonim' WHERE uploader_name IS NULL OR uploader_name = ''")
+
+
+def migrate_photo_metadata(c):
+    """EXIF sütunları ve çekim zamanına göre sıralama indeksleri.
+    width NULL ise EXIF henüz okunmadı, 0 ise dosya okunamadı."""
+    add_column_if_missing(c, 'photos', 'taken_at', 'TEXT')
+    add_column_if_missing(c, 'photos', 'taken_epoch', 'INTEGER')
+    add_column_if_missing(c, 'photos', 'orientation', 'INTEGER')
+    add_column_if_missing(c, 'photos', 'camera_model', 'TEXT')
+    add_column_if_missing(c, 'photos', 'width', 'INTEGER')
+    add_column_if_missing(c, 'photos', 'height', 'INTEGER')
+    c.execute(f'CREATE INDEX IF NOT EXISTS idx_photos_capture_epoch ON photos ({CAPTURE_EPOCH})')
+    c.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_photos_uploader_capture ON photos (uploader_name, {CAPTURE_EPOCH})
+    ''')
+
+
+def migrate_perceptual_hash(c):
+    """İşaretli 64 bit tam sayı olarak algısal özet. Benzerlik aramasını
+    bellekteki indeks yaptığından veritabanı indeksi yok. EXIF'i okunmuş
+    kayıtlar özet için yeniden kuyruğa girsin diye işaretleri sıfırlanır."""
+    add_column_if_missing(c, 'photos', 'dhash', 'INTEGER')
+    c.execute('UPDATE photos SET width = NULL WHERE dhash IS NULL AND width > 0')
+
+
+def migrate_faces(c):
+    """Fotoğraflardaki yüzler. Kutu EXIF yönü uygulanmış orijinal görüntünün
+    piksel koordinatındadır, vektör float32 baytlarıdır. photos.face_model
+    NULL ya da kullanılan modelden farklıysa fotoğraf henüz taranmamıştır."""
+    add_column_if_missing(c, 'photos', 'face_model', 'TEXT')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS faces (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filename TEXT NOT NULL,
+            model TEXT NOT NULL,
+            x INTEGER NOT NULL,
+            y INTEGER NOT NULL,
+            w INTEGER NOT NULL,
+            h INTEGER NOT NULL,
+            embedding BLOB NOT NULL
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_faces_filename ON faces (filename)')
+
+
+def migrate_upload_session_results(c):
+    """Tamamlanan oturum silinmez, sonucu saklanır; yanıtı kaybolan istemci
+    tamamlamayı tekrarlarsa aynı sonuç döner. photo_id NULL: tamamlanmadı."""
+    add_column_if_missing(c, 'upload_sessions', 'photo_id', 'INTEGER')
+    add_column_if_missing(c, 'upload_sessions', 'deduplicated', 'INTEGER NOT NULL DEFAULT 0')
+
+
+def migrate_worker_metrics(c):
+    """İşçi süreç başına son ölçüm özeti (pid, JSON); /metrics bunları toplar"""
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS worker_metrics (
+            pid INTEGER PRIMARY KEY,
+            updated_at REAL NOT NULL,
+            data TEXT NOT NULL
+        )
+    ''')
+
+
+# (sürüm, geçiş) - yeni geçişler sona eklenir, mevcutlar değiştirilmez
+SCHEMA_MIGRATIONS = [
+    (1, migrate_photo_columns),
+    (2, migrate_epoch_timestamps),
+    (3, migrate_anonymous_uploaders),
+    (4, migrate_photo_metadata),
+    (5, migrate_perceptual_hash),
+    (6, migrate_faces),
+    (7, migrate_upload_session_results),
+    (8, migrate_worker_metrics),
+]
+
+
+def apply_migrations(conn):
+    """schema_version'dan sonraki geçişleri sırayla uygula"""
+    conn.execute('CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)')
+    row = conn.execute('SELECT version FROM schema_version').fetchone()
+    if row is None:
+        conn.execute('INSERT INTO schema_version (version) VALUES (0)')
+        current_version = 0
+    else:
+        current_version = row[0]
+
+    for version, migration in SCHEMA_MIGRATIONS:
+        if version > current_version:
+            migration(conn.cursor())
+            conn.execute('UPDATE schema_version SET version = ?', (version,))
+            conn.commit()
+
+
+# Sık çalışan sorgular ve kullanmaları gereken indeksler
+HOT_QUERIES = [
+    ('Son bir saatteki yüklemeler',
+     'SELECT COUNT(*) FROM photos WHERE upload_epoch > ?', (0,),
+     'idx_photos_upload_epoch'),
+    ('Yükleyenin fotoğrafları (ZIP)',
+     f'SELECT * FROM photos WHERE uploader_name = ? ORDER BY {CAPTURE_EPOCH}, id', ('Anonim',),
+     'idx_photos_uploader_capture'),
+    ('Tüm fotoğraflar (ZIP)',
+     f'SELECT * FROM photos ORDER BY {CAPTURE_EPOCH}, id', (),
+     'idx_photos_capture_epoch'),
+    ('Admin listesi, sonraki sayfa',
+     '''SELECT * FROM photos WHERE upload_epoch <= ? AND (upload_epoch, id) < (?, ?)
+        ORDER BY upload_epoch DESC, id DESC LIMIT ?''', (0, 0, 0, 50),
+     'idx_photos_upload_epoch'),
+    ('Admin klasörü, sonraki sayfa',
+     '''SELECT * FROM photos WHERE uploader_name = ? AND upload_epoch <= ? AND (upload_epoch, id) < (?, ?)
+        ORDER BY upload_epoch DESC, id DESC LIMIT ?''', ('Anonim', 0, 0, 0, 50),
+     'idx_photos_uploader_epoch'),
+    ('Admin klasörü, çekim zamanına göre',
+     f'''SELECT * FROM photos WHERE uploader_name = ? AND {CAPTURE_EPOCH} <= ? AND ({CAPTURE_EPOCH}, id) < (?, ?)
+        ORDER BY {CAPTURE_EPOCH} DESC, id DESC LIMIT ?''', ('Anonim', 0, 0, 0, 50),
+     'idx_photos_uploader_capture'),
+    ('İçerik özeti ile tekrar kontrolü',
+     'SELECT filename FROM photos WHERE content_hash = ? LIMIT 1', ('',),
+     'idx_photos_content_hash'),
+]
+
+
+def check_query_plans(conn, verbose=False):
+    """EXPLAIN QUERY PLAN ile sık sorguların beklenen indeksi kullandığını ve
+    ayrıca sıralama yapmadığını doğrula; hatalı planların listesini döndür"""
+    failures = []
+    for label, sql, params, index_name in HOT_QUERIES:
+        plan = ' | '.join(row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params))
+        ok = f'INDEX {index_name}' in plan and 'TEMP B-TREE' not in plan
+        if not ok:
+            failures.append((label, plan))
+        if verbose:
+            print(f"{'✅' if ok else '❌'} {label}: {plan}")
+    return failures
+
+
+def rebuild_uploader_stats(conn, verbose=False):
+    """uploaders tablosunu photos'tan yeniden hesapla; tutarsız satırları döndür"""
+    actual = {row[0]: tuple(row[1:]) for row in conn.execute('''
+        SELECT COALESCE(NULLIF(uploader_name, ''), 'Anonim'),
+               COUNT(*), COALESCE(SUM(file_size), 0), MAX(upload_time)
+        FROM photos
+        GROUP BY COALESCE(NULLIF(uploader_name, ''), 'Anonim')
+    ''')}
+    stored = {row[0]: tuple(row[1:]) for row in conn.execute(
+        'SELECT uploader_name, photo_count, total_size, latest_upload FROM uploaders')}
+
+    mismatches = [(name, stored.get(name), actual.get(name))
+                  for name in sorted(set(actual) | set(stored))
+                  if stored.get(name) != actual.get(name)]
+
+    if verbose:
+        for name, stored_stats, actual_stats in mismatches:
+            print(f"⚠️ {name}: kayıtlı={stored_stats} gerçek={actual_stats}")
+        print(f"📊 {len(actual)} yükleyici kontrol edildi, {len(mismatches)} tutarsızlık düzeltildi.")
+
+    if mismatches:
+        conn.execute('DELETE FROM uploaders')
+        conn.executemany('''
+            INSERT INTO uploaders (uploader_name, photo_count, total_size, latest_upload)
+            VALUES (?, ?, ?, ?)
+        ''', [(name, *stats) for name, stats in actual.items()])
+        conn.commit()
+
+    return mismatches
+
+
+def connect_db():
+    """Yeni bir bağlantı aç ve ayarlarını bir kez yap"""
+    conn = sqlite3.connect(DATABASE, timeout=10)
     conn.row_factory = sqlite3.Row
+    if DB_POOL_ENABLED:
+        for pragma in DB_PRAGMAS:
+            conn.execute(pragma)
     return conn
 
 
-def get_site_settings():
-    """Site ayarlarını veritabanından al"""
+db_local = threading.local()
+
+
+class PooledConnection:
+    """İş parçacığının bağlantısını saran vekil; close() bağlantıyı kapatmaz,
+    sadece en dıştaki kullanıcı bıraktığında yarım kalan işlemi geri alır"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        db_local.depth = max(0, db_local.depth - 1)
+        if db_local.depth == 0 and self._conn.in_transaction:
+            self._conn.rollback()
+
+
+def get_db_connection():
+    if not DB_POOL_ENABLED:
+        conn = sqlite3.connect(DATABASE)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # Fork sonrası üst sürecin bağlantısı kullanılmaz
+    if getattr(db_local, 'pid', None) != os.getpid():
+        db_local.conn = connect_db()
+        db_local.pid = os.getpid()
+        db_local.depth = 0
+
+    db_local.depth += 1
+    return PooledConnection(db_local.conn)
+
+
+@app.teardown_appcontext
+def release_db_connection(exception=None):
+    """Kapatılmadan bırakılan bağlantılardaki açık işlemi istek sonunda geri al"""
+    if getattr(db_local, 'pid', None) == os.getpid():
+        db_local.depth = 0
+        if db_local.conn.in_transaction:
+            db_local.conn.rollback()
+
+
+def benchmark_db(threads=8, requests_per_thread=50):
+    """Bağlantı havuzu olmadan ve havuzla, eşzamanlı yüklemeler altında
+    istek gecikmelerini ölç (geçici veritabanı ve klasör kullanılır)"""
+    global DATABASE, DB_POOL_ENABLED, RENDITIONS_ENABLED, METADATA_ENABLED, FACES_ENABLED, ARCHIVES_ENABLED
+    import statistics
+    import tempfile
+
+    original_database, original_pool = DATABASE, DB_POOL_ENABLED
+    original_upload_folder = app.config['UPLOAD_FOLDER']
+    original_jobs = RENDITIONS_ENABLED, METADATA_ENABLED, FACES_ENABLED, ARCHIVES_ENABLED
+    RENDITIONS_ENABLED = False
+    METADATA_ENABLED = False
+    FACES_ENABLED = False
+    ARCHIVES_ENABLED = False
+
+    print(f"⏱️ {threads} eşzamanlı istemci, istemci başına {requests_per_thread} istek "
+          f"(yükleme ve ana sayfa dönüşümlü)")
+
+    try:
+        for label, pooled in [('Havuzsuz', False), ('Havuzlu + WAL', True)]:
+            workdir = tempfile.mkdtemp(prefix='dugun_bench_')
+            DATABASE = os.path.join(workdir, 'bench.db')
+            DB_POOL_ENABLED = pooled
+            app.config['UPLOAD_FOLDER'] = os.path.join(workdir, 'uploads')
+            os.makedirs(app.config['UPLOAD_FOLDER'])
+            init_db()
+
+            latencies = []
+            failures = []
+
+            def client_loop(client_id):
+                client = app.test_client()
+                for n in range(requests_per_thread):
+                    start = time.perf_counter()
+                    if n % 2 == 0:
+                        response = client.post('/upload', data={
+                            'uploader_name': f'Misafir {client_id}',
+                            'photos': (io.BytesIO(b'\xff\xd8\xff\xe0' + os.urandom(64 * 1024)), f'bench_{n}.jpg')
+                        }, content_type='multipart/form-data')
+                    else:
+                        response = client.get('/')
+                    latencies.append(time.perf_counter() - start)
+                    if response.status_code != 200:
+                        failures.append(response.status_code)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                list(executor.map(client_loop, range(threads)))
+            elapsed = time.perf_counter() - started
+
+            quantiles = statistics.quantiles(latencies, n=100)
+            print(f"  {label:<14} p50={quantiles[49] * 1000:7.2f}ms  p95={quantiles[94] * 1000:7.2f}ms  "
+                  f"p99={quantiles[98] * 1000:7.2f}ms  {len(latencies) / elapsed:7.1f} istek/sn  "
+                  f"hata={len(failures)}")
+
+            shutil.rmtree(workdir, ignore_errors=True)
+    finally:
+        DATABASE, DB_POOL_ENABLED = original_database, original_pool
+        app.config['UPLOAD_FOLDER'] = original_upload_folder
+        RENDITIONS_ENABLED, METADATA_ENABLED, FACES_ENABLED, ARCHIVES_ENABLED = original_jobs
+
+
+def shard_dirs(filename):
+    """Dosya adının özetinden iki seviyeli alt klasör üret (ör. 'ab/cd')"""
+    digest = hashlib.md5(filename.encode('utf-8')).hexdigest()
+    return os.path.join(digest[:2], digest[2:4])
+
+
+def photo_storage_path(filename, create=False):
+    """Fotoğrafın parçalı klasör düzenindeki yolu: uploads/ab/cd/<dosya>"""
+    directory = os.path.join(app.config['UPLOAD_FOLDER'], shard_dirs(filename))
+    if create:
+        os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, filename)
+
+
+def photo_path(filename):
+    """Fotoğrafın diskteki yolunu bul (taşınmamış eski düz düzene de bakar)"""
+    file_path = photo_storage_path(filename)
+    if not os.path.exists(file_path):
+        legacy_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        if os.path.exists(legacy_path):
+            return legacy_path
+    return file_path
+
+
+def migrate_storage(workers=8):
+    """Düz uploads/ klasöründeki fotoğrafları parçalı düzene paralel taşı"""
+    upload_folder = app.config['UPLOAD_FOLDER']
+    flat_files = [entry.name for entry in os.scandir(upload_folder)
+                  if entry.is_file() and not entry.name.startswith('.')]
+
+    def move(filename):
+        os.replace(os.path.join(upload_folder, filename),
+                   photo_storage_path(filename, create=True))
+
+    moved = 0
+    errors = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(move, filename): filename for filename in flat_files}
+        for future, filename in futures.items():
+            try:
+                future.result()
+                moved += 1
+            except Exception as e:
+                errors.append(f"{filename}: {str(e)}")
+
+    print(f"📦 {moved}/{len(flat_files)} dosya yeni klasör düzenine taşındı.")
+    for error in errors:
+        print(f"⚠️ {error}")
+
+
+def file_sha256(file_path):
+    """Dosyanın SHA-256 özetini parça parça okuyarak hesapla"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PhotoWriter:
+    """Fotoğraf kayıtlarını kuyruktan alıp tek iş parçacığında toplu yazar
+
+    Her PHOTO_WRITER_BATCH_SIZE kayıtta ya da PHOTO_WRITER_MAX_DELAY
+    dolduğunda tek bir işlemle executemany yapılır. İstekler kendi
+    kayıtlarının Future'ını bekler; sonuç döndüğünde kayıt diske yazılmıştır.
+    """
+
+    def __init__(self, batch_size=PHOTO_WRITER_BATCH_SIZE, max_delay=PHOTO_WRITER_MAX_DELAY):
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+
+    def submit(self, unique_filename, original_filename, uploader_name, file_size, content_hash=None):
+        """Kaydı kuyruğa ekle; (photo_id, kaydedilen dosya adı, tekrar mı) veren Future döndür"""
+        future = Future()
+        record = (unique_filename, original_filename, uploader_name, file_size, content_hash)
+        self._ensure_started().put((record, future))
+        return future
+
+    def _ensure_started(self):
+        # Fork sonrası iş parçacığı alt süreçte yoktur, yeniden başlat
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, args=(self._queue,),
+                                 name='photo-writer', daemon=True).start()
+            return self._queue
+
+    def qsize(self):
+        """Bu süreçte yazılmayı bekleyen kayıt sayısı"""
+        with self._lock:
+            if self._pid != os.getpid():
+                return 0
+            return self._queue.qsize()
+
+    def _run(self, work_queue):
+        conn = connect_db()
+        conn.isolation_level = None  # İşlemler elle yönetilir
+
+        while True:
+            # Bekleyenleri topla; kuyruk boşaldığında beklemeden yaz. Yazma
+            # sürerken gelenler bir sonraki gruba birikir (group commit)
+            batch = [work_queue.get()]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.batch_size and time.monotonic() < deadline:
+                try:
+                    batch.append(work_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                results = self._write_batch(conn, [record for record, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+
+    def _write_batch(self, conn, records):
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Aynı içerik daha önce (ya da bu grupta) yüklendiyse mevcut dosyayı göster
+            hashes = list({record[4] for record in records if record[4]})
+            known_files = {}
+            if hashes:
+                placeholders = ','.join('?' * len(hashes))
+                for row in conn.execute(f'''
+                    SELECT content_hash, MIN(filename) AS filename FROM photos
+                    WHERE content_hash IN ({placeholders}) GROUP BY content_hash
+                ''', hashes):
+                    if os.path.exists(photo_path(row['filename'])):
+                        known_files[row['content_hash']] = row['filename']
+
+            # upload_time (UTC metin) ve upload_epoch aynı andan üretilir
+            upload_epoch = int(time.time())
+            upload_time = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(upload_epoch))
+
+            rows = []
+            stored = []
+            for unique_filename, original_filename, uploader_name, file_size, content_hash in records:
+                stored_filename = known_files.get(content_hash, unique_filename) if content_hash else unique_filename
+                if content_hash and content_hash not in known_files:
+                    known_files[content_hash] = unique_filename
+                rows.append((stored_filename, original_filename, uploader_name or 'Anonim', file_size,
+                             content_hash, upload_time, upload_epoch))
+                stored.append((stored_filename, stored_filename != unique_filename))
+
+            conn.executemany('''
+                INSERT INTO photos (filename, original_filename, uploader_name, file_size,
+                                    content_hash, upload_time, upload_epoch)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+
+            # Tek yazıcı ve IMMEDIATE kilit altında kimlikler ardışıktır
+            last_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        first_id = last_id - len(records) + 1
+        return [(first_id + i, stored_filename, deduplicated)
+                for i, (stored_filename, deduplicated) in enumerate(stored)]
+
+
+photo_writer = PhotoWriter()
+
+
+def register_photo(unique_filename, original_filename, uploader_name, file_size, content_hash=None):
+    """Diske kaydedilmiş fotoğrafı yazıcı kuyruğuna ekle ve kaydedilmesini bekle
+
+    Aynı içerik daha önce yüklendiyse kayıt mevcut dosyayı gösterir.
+    (photo_id, kaydedilen dosya adı, tekrar mı) döndürür; tekrar ise
+    çağıran taraf yeni yazdığı dosyayı silmelidir.
+    """
+    return photo_writer.submit(unique_filename, original_filename, uploader_name,
+                               file_size, content_hash).result()
+
+
+def benchmark_photo_writer(threads=16, inserts_per_thread=200):
+    """Kayıt başına commit ile toplu yazıcının ekleme hızını karşılaştır"""
+    global DATABASE
+    import tempfile
+
+    original_database = DATABASE
+    print(f"⏱️ {threads} iş parçacığı, her biri {inserts_per_thread} kayıt ekliyor")
+
+    def direct_insert(thread_id):
+        conn = connect_db()
+        for n in range(inserts_per_thread):
+            conn.execute('''
+                INSERT INTO photos (filename, original_filename, uploader_name, file_size)
+                VALUES (?, ?, ?, ?)
+            ''', (f"{uuid.uuid4()}.jpg", f"bench_{n}.jpg", f"Misafir {thread_id}", 1024))
+            conn.commit()
+        conn.close()
+
+    def queued_insert(thread_id):
+        for n in range(inserts_per_thread):
+            register_photo(f"{uuid.uuid4()}.jpg", f"bench_{n}.jpg", f"Misafir {thread_id}", 1024)
+
+    try:
+        for label, insert in [('Kayıt başına commit', direct_insert), ('Toplu yazıcı', queued_insert)]:
+            workdir = tempfile.mkdtemp(prefix='dugun_bench_')
+            DATABASE = os.path.join(workdir, 'bench.db')
+            init_db()
+            photo_writer._pid = None  # Yazıcı yeni veritabanıyla başlasın
+
+            failures = []
+
+            def run(thread_id):
+                try:
+                    insert(thread_id)
+                except sqlite3.OperationalError as e:
+                    failures.append(str(e))
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                list(executor.map(run, range(threads)))
+            elapsed = time.perf_counter() - started
+
+            conn = connect_db()
+            total = conn.execute('SELECT COUNT(*) FROM photos').fetchone()[0]
+            conn.close()
+            print(f"  {label:<20} {total / elapsed:9.0f} kayıt/sn  ({total} kayıt, "
+                  f"{elapsed:.2f}sn, hata={len(failures)})")
+
+            shutil.rmtree(workdir, ignore_errors=True)
+    finally:
+        DATABASE = original_database
+        photo_writer._pid = None
+
+
+def build_renditions(source_path, targets):
+    """Fotoğrafın önizlemelerini üret (işlem havuzunda çalışır)
+
+    targets: [(tür, hedef yol, en uzun kenar)], büyükten küçüğe sıralı.
+    """
+    results = {}
+    with Image.open(source_path) as img:
+        # JPEG'ler tam çözünürlükte açılmaz, hedefe yakın ölçekte çözülür
+        largest = targets[0][2]
+        img.draft('RGB', (largest, largest))
+
+        rendition = ImageOps.exif_transpose(img)
+        if rendition.mode != 'RGB':
+            rendition = rendition.convert('RGB')
+
+        # Her önizleme bir öncekinden küçültülür
+        for kind, target_path, max_size in targets:
+            rendition.thumbnail((max_size, max_size))
+            # Aynı dosya için iki görev aynı anda çalışabilir (ör. henüz önizlemesi
+            # olmayan fotoğrafın tekrar yüklenmesi); geçici adlar çakışmasın
+            temp_path = f"{target_path}.{os.getpid()}.tmp"
+            rendition.save(temp_path, 'JPEG', quality=85, optimize=True)
+            os.replace(temp_path, target_path)
+            results[kind] = target_path
+
+    return results
+
+
+rendition_executor = None
+rendition_executor_lock = threading.Lock()
+
+
+def get_rendition_executor():
+    """Önizleme işlem havuzunu ilk kullanımda başlat"""
+    global rendition_executor
+    with rendition_executor_lock:
+        if rendition_executor is None:
+            # Çok iş parçacıklı sunucudan fork yerine spawn ile süreç aç
+            rendition_executor = ProcessPoolExecutor(
+                max_workers=RENDITION_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'))
+        return rendition_executor
+
+
+def discard_rendition_executor(broken):
+    """Bozulan havuzu bırak; sonraki gönderim yenisini açar. Başka bir
+    iş parçacığı havuzu zaten yenilediyse yenisine dokunulmaz."""
+    global rendition_executor
+    with rendition_executor_lock:
+        if rendition_executor is broken:
+            rendition_executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def submit_background(function, args, callback, retries=RENDITION_POOL_RETRIES):
+    """function(*args)'ı işlem havuzunda çalıştır, bitince callback(future) çağır.
+
+    Bir çocuk süreç öldürülür ya da çökerse havuz kullanılamaz hale gelir
+    (BrokenProcessPool). Bu durumda havuz yenilenir ve görev yeniden
+    gönderilir; deneme hakkı biterse hata callback'e ulaşır.
+    """
+    executor = get_rendition_executor()
+    try:
+        future = executor.submit(function, *args)
+    except BrokenProcessPool:
+        discard_rendition_executor(executor)
+        executor = get_rendition_executor()
+        future = executor.submit(function, *args)
+
+    def on_done(future):
+        if retries > 0 and not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            discard_rendition_executor(executor)
+            try:
+                submit_background(function, args, callback, retries - 1)
+                return
+            except Exception as e:
+                print(f"Arka plan görevi yeniden gönderilemedi: {e}")
+        callback(future)
+
+    future.add_done_callback(on_done)
+
+
+def is_decode_error(error):
+    """Hata dosyanın kendisinden mi (tekrar denense de geçmez) kaynaklanıyor?
+
+    Pillow'un çözme hataları errno taşımaz; disk dolu, dosya yok gibi sistem
+    hataları ve havuz hataları geçicidir, fotoğraf işaretlenmeden bırakılır.
+    """
+    if isinstance(error, OSError):
+        return error.errno is None
+    return isinstance(error, (SyntaxError, ValueError, Image.DecompressionBombError))
+
+
+def rendition_relpath(kind, filename):
+    """Önizlemenin RENDITION_FOLDER içindeki göreli yolu (fotoğrafla aynı alt klasörler)"""
+    return f"{kind}/{shard_dirs(filename)}/{filename.rsplit('.', 1)[0]}.jpg"
+
+
+def save_rendition_paths(filename, paths):
+    """Önizleme yollarını aynı dosyayı gösteren tüm kayıtlara yaz"""
     conn = get_db_connection()
-    settings = conn.execute('SELECT setting_key, setting_value FROM site_settings').fetchall()
+    conn.execute('''
+        UPDATE photos SET thumbnail_path = ?, preview_path = ?
+        WHERE filename = ?
+    ''', (paths.get('thumbnail', ''), paths.get('preview', ''), filename))
+    conn.commit()
     conn.close()
 
-    # Dictionary'ye çevir
-    settings_dict = {}
-    for setting in settings:
-        settings_dict[setting['setting_key']] = setting['setting_value']
-
-    # Varsayılan değerler
-    if 'site_title' not in settings_dict:
-        settings_dict['site_title'] = 'BYT DIGITAL'
-    if 'site_description' not in settings_dict:
-        settings_dict['site_description'] = 'Anılarınızı Paylaşın'
-    if 'site_emoji' not in settings_dict:
-        settings_dict['site_emoji'] = '💒❤️'
-    if 'background_image' not in settings_dict:
-        settings_dict['background_image'] = ''
-    if 'background_opacity' not in settings_dict:
-        settings_dict['background_opacity'] = '0.1'
-    if 'container_background_image' not in settings_dict:
-        settings_dict['container_background_image'] = ''
-    if 'container_background_opacity' not in settings_dict:
-        settings_dict['container_background_opacity'] = '0.2'
-    if 'copyright_text' not in settings_dict:
-        settings_dict['copyright_text'] = 'BYT DIGITAL © 2025 - TÜM HAKLARI SAKLIDIR'
-
-    return settings_dict
+
+def schedule_renditions(filename):
+    """Fotoğrafın önizlemelerini istek iş parçacığını bekletmeden arka planda üret"""
+    if not RENDITIONS_ENABLED:
+        return
+
+    relpaths = {kind: rendition_relpath(kind, filename) for kind in RENDITION_SIZES}
+
+    # Tekrar yüklenen fotoğrafın önizlemeleri zaten hazır olabilir
+    if all(os.path.exists(os.path.join(RENDITION_FOLDER, path)) for path in relpaths.values()):
+        save_rendition_paths(filename, relpaths)
+        return
+
+    source_path = photo_path(filename)
+    targets = [(kind, os.path.join(RENDITION_FOLDER, relpaths[kind]), max_size)
+               for kind, max_size in RENDITION_SIZES.items()]
+    for _, target_path, _ in targets:
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+
+    def on_done(future):
+        try:
+            future.result()
+        except Exception as e:
+            print(f"Önizleme oluşturulamadı ({filename}): {e}")
+            # Açılamayan biçimler (ör. HEIC) tekrar denenmesin diye boş işaretlenir;
+            # geçici hatada yollar boş kalır, sonraki açılışta yeniden denenir
+            if is_decode_error(e):
+                save_rendition_paths(filename, {})
+            return
+        save_rendition_paths(filename, relpaths)
+
+    submit_background(build_renditions, (source_path, targets), on_done)
+
+
+def schedule_missing_renditions():
+    """Önizlemesi olmayan eski fotoğrafları kuyruğa ekle"""
+    conn = get_db_connection()
+    rows = conn.execute('''
+        SELECT DISTINCT filename FROM photos WHERE thumbnail_path IS NULL
+    ''').fetchall()
+    conn.close()
+
+    for row in rows:
+        if os.path.exists(photo_path(row['filename'])):
+            schedule_renditions(row['filename'])
+
+
+def parse_exif_datetime(value, offset=None):
+    """EXIF tarihini ('2025:07:04 18:30:00') (metin, epoch) çiftine çevir.
+
+    Saat dilimi (OffsetTimeOriginal) yoksa sunucunun yerel saati varsayılır.
+    Boş ya da geçersiz tarihte (None, None) döner.
+    """
+    try:
+        taken = datetime.strptime(str(value).strip('\x00 ')[:19], '%Y:%m:%d %H:%M:%S')
+    except ValueError:
+        return None, None
+
+    try:
+        sign = -1 if offset[0] == '-' else 1
+        hours, minutes = offset.strip('\x00 ')[1:].split(':')
+        tzinfo = timezone(sign * timedelta(hours=int(hours), minutes=int(minutes)))
+    except (TypeError, ValueError, IndexError):
+        tzinfo = None
+    return taken.strftime('%Y-%m-%d %H:%M:%S'), int(taken.replace(tzinfo=tzinfo).timestamp())
+
+
+# EXIF yönünü geri alan çevirmeler (ImageOps.exif_transpose ile aynı)
+ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90
+}
+
+
+def difference_hash(img, orientation=None):
+    """64 bitlik fark özeti (dHash); SQLite INTEGER'a sığsın diye işaretli.
+
+    Görüntü önce EXIF yönüne çevrilir ki yönü piksellere işlenmiş
+    (mesajlaşma uygulamasından gelen) kopyalar da aynı özeti versin.
+    """
+    if orientation in ORIENTATION_TRANSPOSE:
+        img = img.transpose(ORIENTATION_TRANSPOSE[orientation])
+    small = img.convert('L').resize((DHASH_SIZE + 1, DHASH_SIZE), Image.Resampling.BILINEAR)
+    pixels = list(small.getdata())
+
+    value = 0
+    for row in range(DHASH_SIZE):
+        offset = row * (DHASH_SIZE + 1)
+        for col in range(DHASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def read_photo_metadata(source_path):
+    """Çekim zamanı, yön, kamera, boyutlar ve algısal özeti oku (işlem havuzunda çalışır).
+
+    EXIF için yalnız dosya başlığı okunur. Özet için JPEG'ler 1/8 ölçeğe
+    kadar küçültülerek çözülür. Boyutlar EXIF yönü uygulanmış (ekranda
+    görünen) haliyledir. Dosya açılamazsa None döner.
+    """
+    try:
+        with Image.open(source_path) as img:
+            width, height = img.size
+            exif = img.getexif()
+            details = exif.get_ifd(0x8769)  # Exif IFD
+
+            # Bozuk piksel verisi EXIF bilgilerini kaybettirmesin
+            try:
+                img.draft('L', (DHASH_SIZE * 8, DHASH_SIZE * 8))
+                dhash = difference_hash(img, exif.get(0x0112))
+            except (OSError, SyntaxError, ValueError):
+                dhash = None
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+    # DateTimeOriginal, DateTimeDigitized, DateTime sırasıyla
+    taken_at, taken_epoch = parse_exif_datetime(
+        details.get(0x9003) or details.get(0x9004) or exif.get(0x0132) or '',
+        details.get(0x9011) or details.get(0x9010))
+
+    orientation = exif.get(0x0112)
+    if orientation in (5, 6, 7, 8):
+        width, height = height, width
+
+    make = str(exif.get(0x010F) or '').strip('\x00 ')
+    model = str(exif.get(0x0110) or '').strip('\x00 ')
+    if make and not model.lower().startswith(make.split()[0].lower()):
+        model = f"{make} {model}".strip()
+
+    return {
+        'taken_at': taken_at,
+        'taken_epoch': taken_epoch,
+        'orientation': orientation if isinstance(orientation, int) else None,
+        'camera_model': model or None,
+        'width': width,
+        'height': height,
+        'dhash': dhash
+    }
+
+
+def save_photo_metadata(conn, results):
+    """[(dosya adı, bilgiler)] listesini aynı dosyayı gösteren tüm kayıtlara yaz"""
+    rows = []
+    for filename, metadata in results:
+        # Okunamayan dosya 0 boyutla işaretlenir ki tekrar denenmesin
+        metadata = metadata or {'width': 0, 'height': 0}
+        rows.append((metadata.get('taken_at'), metadata.get('taken_epoch'), metadata.get('orientation'),
+                     metadata.get('camera_model'), metadata['width'], metadata['height'],
+                     metadata.get('dhash'), filename))
+    conn.executemany('''
+        UPDATE photos SET taken_at = ?, taken_epoch = ?, orientation = ?,
+                          camera_model = ?, width = ?, height = ?, dhash = ?
+        WHERE filename = ?
+    ''', rows)
+    conn.commit()
+
+
+def schedule_metadata(filename):
+    """EXIF bilgilerini istek iş parçacığını bekletmeden arka planda oku"""
+    if not METADATA_ENABLED:
+        return
+
+    def on_done(future):
+        try:
+            metadata = future.result()
+        except Exception as e:
+            print(f"EXIF okunamadı ({filename}): {e}")
+            # Geçici hatada işaretlenmez ki çekim zamanı sonraki açılışta okunsun
+            if not is_decode_error(e):
+                return
+            metadata = None
+        conn = get_db_connection()
+        save_photo_metadata(conn, [(filename, metadata)])
+        conn.close()
+
+    submit_background(read_photo_metadata, (photo_path(filename),), on_done)
+
+
+def pending_metadata_filenames(conn):
+    """EXIF bilgisi henüz okunmamış dosyalar"""
+    return [row['filename'] for row in conn.execute(
+        'SELECT DISTINCT filename FROM photos WHERE width IS NULL')]
+
+
+def schedule_missing_metadata():
+    """EXIF bilgisi okunmamış eski fotoğrafları kuyruğa ekle"""
+    conn = get_db_connection()
+    filenames = pending_metadata_filenames(conn)
+    conn.close()
+
+    for filename in filenames:
+        schedule_metadata(filename)
+
+
+def backfill_metadata(workers=None):
+    """Mevcut kayıtların EXIF bilgilerini işlem havuzunda toplu doldur (backfill-exif).
+
+    Sonuçlar METADATA_BATCH_SIZE'lık işlemlerle yazılır; kesilirse yazılmayanlar
+    bir sonraki çalıştırmada kaldığı yerden işlenir.
+    """
+    init_db()
+    conn = connect_db()
+    filenames = pending_metadata_filenames(conn)
+    total = len(filenames)
+    print(f"🔎 {total} dosyanın EXIF bilgisi okunacak")
+
+    started = time.perf_counter()
+    done = taken = 0
+    results = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            paths = (photo_path(filename) for filename in filenames)
+            for filename, metadata in zip(filenames, executor.map(read_photo_metadata, paths, chunksize=32)):
+                results.append((filename, metadata))
+                if metadata and metadata['taken_at']:
+                    taken += 1
+                if len(results) >= METADATA_BATCH_SIZE:
+                    save_photo_metadata(conn, results)
+                    done += len(results)
+                    results = []
+                    print(f"  {done}/{total} ({done / (time.perf_counter() - started):.0f} dosya/sn)")
+        if results:
+            save_photo_metadata(conn, results)
+            done += len(results)
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ {done} dosya {elapsed:.1f} sn'de işlendi, {taken} tanesinde çekim zamanı var")
+
+
+def hash_photo_file(source_path):
+    """Dosyanın SHA-256 özeti; dosya okunamazsa None (işlem havuzunda çalışır)"""
+    try:
+        return file_sha256(source_path)
+    except OSError:
+        return None
+
+
+def pending_hash_filenames(conn):
+    """İçerik özeti henüz hesaplanmamış dosyalar"""
+    return [row['filename'] for row in conn.execute(
+        'SELECT DISTINCT filename FROM photos WHERE content_hash IS NULL')]
+
+
+def save_content_hashes(conn, results):
+    """[(dosya adı, özet)] listesini özeti olmayan kayıtlara yaz; okunamayanlar boş kalır"""
+    conn.executemany('UPDATE photos SET content_hash = ? WHERE filename = ? AND content_hash IS NULL',
+                     [(content_hash, filename) for filename, content_hash in results if content_hash])
+    conn.commit()
+
+
+def schedule_missing_hashes():
+    """Özeti olmayan eski fotoğrafların özetini arka planda hesapla.
+
+    Özet yazılana kadar bu fotoğraflar sürümsüz URL ile sunulur ve yeni
+    yüklemelerle tekrar olarak eşleştirilmez.
+    """
+    conn = get_db_connection()
+    filenames = pending_hash_filenames(conn)
+    conn.close()
+
+    for filename in filenames:
+        def on_done(future, filename=filename):
+            try:
+                content_hash = future.result()
+            except Exception as e:
+                print(f"Özet hesaplanamadı ({filename}): {e}")
+                return
+            conn = get_db_connection()
+            save_content_hashes(conn, [(filename, content_hash)])
+            conn.close()
+
+        submit_background(hash_photo_file, (photo_path(filename),), on_done)
+
+
+def backfill_content_hashes(workers=None):
+    """Özeti olmayan eski kayıtların SHA-256 özetini işlem havuzunda toplu doldur (backfill-hashes)"""
+    init_db()
+    conn = connect_db()
+    filenames = pending_hash_filenames(conn)
+    total = len(filenames)
+    print(f"🔎 {total} dosyanın özeti hesaplanacak")
+
+    started = time.perf_counter()
+    done = missing = 0
+    results = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            paths = (photo_path(filename) for filename in filenames)
+            for filename, content_hash in zip(filenames, executor.map(hash_photo_file, paths, chunksize=8)):
+                results.append((filename, content_hash))
+                if content_hash is None:
+                    missing += 1
+                if len(results) >= METADATA_BATCH_SIZE:
+                    save_content_hashes(conn, results)
+                    done += len(results)
+                    results = []
+                    print(f"  {done}/{total} ({done / (time.perf_counter() - started):.0f} dosya/sn)")
+        if results:
+            save_content_hashes(conn, results)
+            done += len(results)
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ {done} dosya {elapsed:.1f} sn'de işlendi, {missing} tanesi okunamadı")
+
+
+def partial_upload_path(session_id):
+    """Yarım kalan yüklemenin geçici dosya yolu"""
+    return os.path.join(PARTIAL_FOLDER, f"{session_id}.part")
+
+
+def upload_lock_path(session_id):
+    """Oturumun kilit dosyası; oturumla birlikte silinir"""
+    return os.path.join(PARTIAL_FOLDER, f"{session_id}.lock")
+
+
+file_locks = {}
+file_locks_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Kilit dosyası üzerinde özel kilit. Aynı süreçteki iş parçacıklarını ve
+    (fcntl varsa) diğer gunicorn işçilerini aynı yol için sıraya sokar."""
+    with file_locks_lock:
+        thread_lock = file_locks.setdefault(path, threading.Lock())
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(path, 'a') as lock_file:
+            # Dosya kapanınca kilit de bırakılır
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+
+def upload_session_lock(session_id):
+    """Oturumun parça ekleme ve tamamlama adımlarını sırala; aynı konuma gelen
+    iki parça ya da iki tamamlama isteği birbirinin dosyasını bozmaz"""
+    return file_lock(upload_lock_path(session_id))
+
+
+def upload_session_exists(session_id):
+    """Oturum kaydı var mı (tamamlanmış olsa da)"""
+    conn = get_db_connection()
+    session = conn.execute('SELECT 1 FROM upload_sessions WHERE id = ?', (session_id,)).fetchone()
+    conn.close()
+    return session is not None
+
+
+def remove_upload_session_files(session_id):
+    """Oturumun yarım dosyasını, kilit dosyasını ve bellekteki özetini sil"""
+    for path in (partial_upload_path(session_id), upload_lock_path(session_id)):
+        if os.path.exists(path):
+            os.remove(path)
+        with file_locks_lock:
+            file_locks.pop(path, None)
+    with upload_session_hashes_lock:
+        upload_session_hashes.pop(session_id, None)
+
+
+def prune_upload_hashes():
+    """Uzun süredir parça gelmeyen oturumların özetlerini bırak. Çok işçili
+    sunucuda parçalar farklı işçilere düşebilir; tamamlamayı başka işçi
+    yaptıysa bu işçideki özet başka türlü hiç silinmez."""
+    cutoff = time.monotonic() - UPLOAD_HASH_IDLE
+    with upload_session_hashes_lock:
+        for session_id in [session_id for session_id, (_, _, used_at) in upload_session_hashes.items()
+                           if used_at < cutoff]:
+            del upload_session_hashes[session_id]
+
+
+def cleanup_upload_sessions(conn):
+    """Süresi dolmuş (tamamlanmış ya da yarım) yükleme oturumlarını ve dosyalarını sil"""
+    expired = conn.execute('''
+        SELECT id FROM upload_sessions
+        WHERE created_at < datetime('now', ?)
+    ''', (f'-{UPLOAD_SESSION_TTL} seconds',)).fetchall()
+
+    for session in expired:
+        remove_upload_session_files(session['id'])
+        conn.execute('DELETE FROM upload_sessions WHERE id = ?', (session['id'],))
+
+    conn.commit()
+    prune_upload_hashes()
+
+
+settings_cache = {'version': None, 'settings': None, 'checked_at': 0.0}
+settings_cache_lock = threading.Lock()
+
+
+def load_site_settings():
+    """Ayarları ve sürümlerini süreç içi önbellekten döndür: (sürüm, ayarlar)
+
+    Sürüm satırına en fazla SETTINGS_CHECK_INTERVAL'de bir bakılır; arada
+    gelen istekler hiç SQL çalıştırmaz. Dönen sözlük paylaşılır, değiştirmeyin.
+    """
+    if time.monotonic() - settings_cache['checked_at'] < SETTINGS_CHECK_INTERVAL:
+        return settings_cache['version'], settings_cache['settings']
+
+    with settings_cache_lock:
+        if time.monotonic() - settings_cache['checked_at'] < SETTINGS_CHECK_INTERVAL:
+            return settings_cache['version'], settings_cache['settings']
+
+        conn = get_db_connection()
+        version = conn.execute(
+            "SELECT meta_value FROM app_meta WHERE meta_key = 'settings_version'").fetchone()[0]
+
+        if version != settings_cache['version']:
+            settings = conn.execute('SELECT setting_key, setting_value FROM site_settings').fetchall()
+
+            # Varsayılan değerlerin üzerine kayıtlı değerleri yaz
+            settings_dict = dict(DEFAULT_SETTINGS)
+            for setting in settings:
+                settings_dict[setting['setting_key']] = setting['setting_value']
+
+            settings_cache['settings'] = settings_dict
+            settings_cache['version'] = version
+
+        conn.close()
+        settings_cache['checked_at'] = time.monotonic()
+
+        return settings_cache['version'], settings_cache['settings']
+
+
+def get_site_settings():
+    """Site ayarlarını al"""
+    return load_site_settings()[1]
 
 
 def update_site_setting(key, value):
-    """Site ayarını güncelle"""
+    """Site ayarını güncelle ve ayar sürümünü artır"""
     conn = get_db_connection()
     c = conn.cursor()
     c.execute('''
         INSERT OR REPLACE INTO site_settings (setting_key, setting_value, updated_at)
         VALUES (?, ?, CURRENT_TIMESTAMP)
     ''', (key, value))
+    c.execute("UPDATE app_meta SET meta_value = meta_value + 1 WHERE meta_key = 'settings_version'")
     conn.commit()
     conn.close()
 
+    # Bu süreç değişikliği hemen görsün
+    settings_cache['checked_at'] = 0.0
+
+
+# Girdi hiç yerinde değiştirilmez, tek atamayla yenisiyle değiştirilir; eşzamanlı
+# istekler bir sürümün gövdesini başka bir sürümün ETag'iyle göremez
+upload_page_cache = {'version': None, 'body': None, 'etag': None}
+
 
 @app.route('/')
 def upload_form():
-    settings = get_site_settings()
-    return render_template('upload.html', settings=settings)
+    # Sayfa sadece ayarlar değişince değişir; her ayar sürümü için bir kez
+    # oluşturulup bellekten, ETag ile gönderilir
+    global upload_page_cache
+    version, settings = load_site_settings()
+
+    page = upload_page_cache
+    if page['version'] != version:
+        body = build_upload_html(settings).encode('utf-8')
+        page = {'version': version, 'body': body, 'etag': hashlib.sha256(body).hexdigest()[:32]}
+        upload_page_cache = page
+
+    response = app.response_class(page['body'], mimetype='text/html')
+    response.set_etag(page['etag'])
+    response.headers['Cache-Control'] = 'public, no-cache'
+    return response.make_conditional(request)
+
+
+class UploadAdmission:
+    """Yükleme uçlarının önündeki kabul denetimi
+
+    Eşzamanlı yükleme sayısı ve içerik uzunlukları toplamı sınırlanır.
+    Yer yoksa istek en fazla UPLOAD_ADMISSION_WAIT saniye bekler; bekleme
+    sırası doluysa ya da süre dolarsa gövde okunmadan 503 döner. Sınırlar
+    süreç başınadır (gunicorn'da her işçinin kendi sınırı vardır).
+    """
+
+    def __init__(self, max_concurrent=UPLOAD_MAX_CONCURRENT, max_inflight_bytes=UPLOAD_MAX_INFLIGHT_BYTES,
+                 max_waiting=UPLOAD_MAX_WAITING, max_wait=UPLOAD_ADMISSION_WAIT):
+        self.max_concurrent = max_concurrent
+        self.max_inflight_bytes = max_inflight_bytes
+        self.max_waiting = max_waiting
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self.active = 0
+        self.inflight_bytes = 0
+        self.waiting = 0
+        self.peak_active = 0
+        self.peak_waiting = 0
+        self.admitted_total = 0
+        self.rejected_total = {'queue_full': 0, 'timeout': 0}
+
+    def _fits(self, size):
+        # Tek başına sınırı aşan istek, başka yükleme yokken yine de kabul edilir
+        return (self.active < self.max_concurrent and
+                (self.inflight_bytes + size <= self.max_inflight_bytes or self.active == 0))
+
+    def _admit(self, size):
+        self.active += 1
+        self.inflight_bytes += size
+        self.admitted_total += 1
+        self.peak_active = max(self.peak_active, self.active)
+
+    def acquire(self, size):
+        """Yükleme için yer ayır; ayrılamazsa red nedenini, ayrılırsa None döndür"""
+        with self._lock:
+            if self.waiting == 0 and self._fits(size):
+                self._admit(size)
+                return None
+            if self.waiting >= self.max_waiting:
+                self.rejected_total['queue_full'] += 1
+                return 'queue_full'
+
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+            deadline = time.monotonic() + self.max_wait
+            try:
+                while not self._fits(size):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected_total['timeout'] += 1
+                        return 'timeout'
+                    self._released.wait(remaining)
+                self._admit(size)
+                return None
+            finally:
+                self.waiting -= 1
+
+    def release(self, size):
+        with self._lock:
+            self.active -= 1
+            self.inflight_bytes -= size
+            self._released.notify_all()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'active': self.active,
+                'inflight_bytes': self.inflight_bytes,
+                'waiting': self.waiting,
+                'peak_active': self.peak_active,
+                'peak_waiting': self.peak_waiting,
+                'admitted_total': self.admitted_total,
+                'rejected_total': dict(self.rejected_total),
+                'max_concurrent': self.max_concurrent,
+                'max_inflight_bytes': self.max_inflight_bytes
+            }
+
+
+upload_admission = UploadAdmission()
+
+
+def worker_metrics():
+    """Bu işçi sürecinin ölçümleri"""
+    return {'uploads': upload_admission.metrics(), 'photo_writer_queue': photo_writer.qsize()}
+
+
+def publish_worker_metrics(conn):
+    """Bu işçinin ölçümlerini ortak tabloya yaz, ölü işçilerin satırlarını sil"""
+    now = time.time()
+    conn.execute('INSERT OR REPLACE INTO worker_metrics (pid, updated_at, data) VALUES (?, ?, ?)',
+                 (os.getpid(), now, json.dumps(worker_metrics())))
+    conn.execute('DELETE FROM worker_metrics WHERE updated_at < ?', (now - METRICS_STALE_AFTER,))
+    conn.commit()
+
+
+class MetricsPublisher:
+    """İşçinin ölçümlerini METRICS_PUBLISH_INTERVAL aralıkla yayınlayan iş parçacığı"""
+
+    def __init__(self, interval=METRICS_PUBLISH_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def start(self):
+        # Fork sonrası iş parçacığı alt süreçte yoktur, yeniden başlat
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='metrics-publisher', daemon=True).start()
+
+    def _run(self):
+        conn = connect_db()
+        while True:
+            try:
+                publish_worker_metrics(conn)
+            except sqlite3.Error as e:
+                print(f"Ölçümler yayınlanamadı: {e}")
+            time.sleep(self.interval)
+
+
+metrics_publisher = MetricsPublisher()
+
+
+def collect_metrics(conn):
+    """Canlı işçilerin ölçümlerini topla: anlık değerler ve sayaçlar toplanır,
+    tepe değerler işçilerin en büyüğüdür"""
+    publish_worker_metrics(conn)
+    rows = conn.execute('SELECT data FROM worker_metrics WHERE updated_at >= ?',
+                        (time.time() - METRICS_STALE_AFTER,)).fetchall()
+
+    uploads = {'active': 0, 'inflight_bytes': 0, 'waiting': 0, 'peak_active': 0, 'peak_waiting': 0,
+               'admitted_total': 0, 'rejected_total': {}, 'max_concurrent': 0, 'max_inflight_bytes': 0}
+    writer_queue = 0
+    for row in rows:
+        data = json.loads(row['data'])
+        for key, value in data['uploads'].items():
+            if key == 'rejected_total':
+                for reason, count in value.items():
+                    uploads[key][reason] = uploads[key].get(reason, 0) + count
+            elif key.startswith('peak_'):
+                uploads[key] = max(uploads[key], value)
+            else:
+                uploads[key] += value
+        writer_queue += data['photo_writer_queue']
+    return {'workers': len(rows), 'uploads': uploads, 'photo_writer_queue': writer_queue}
+
+
+def disk_space_error(size):
+    """Yükleme sonrası diskte UPLOAD_MIN_FREE_BYTES kalmayacaksa hata mesajı döndür"""
+    free = shutil.disk_usage(app.config['UPLOAD_FOLDER']).free
+    if free - size < UPLOAD_MIN_FREE_BYTES:
+        return 'Sunucuda yeterli boş alan kalmadı. Lütfen yöneticiye haber verin.'
+    return None
+
+
+def uploader_quota_error(uploader_name, size):
+    """Yükleyenin kotası bu boyutla aşılıyorsa hata mesajı döndür
+
+    'Anonim' tüm isimsiz misafirlerin ortak satırı olduğundan sayılmaz.
+    """
+    if not UPLOADER_QUOTA_BYTES or not uploader_name or uploader_name == 'Anonim':
+        return None
+
+    conn = get_db_connection()
+    row = conn.execute('SELECT total_size FROM uploaders WHERE uploader_name = ?',
+                       (uploader_name,)).fetchone()
+    conn.close()
+
+    used = row['total_size'] if row else 0
+    if used + size > UPLOADER_QUOTA_BYTES:
+        return (f'{uploader_name} için yükleme kotası doldu '
+                f'({used // (1024 * 1024)} / {UPLOADER_QUOTA_BYTES // (1024 * 1024)} MB).')
+    return None
+
+
+def upload_rejection(message, status_code, **fields):
+    """Gövde okunmadan verilen ret yanıtı
+
+    Bağlantı kapatılır; yoksa sunucu sonraki istek için kalan gövdeyi okuyup atar.
+    """
+    response = jsonify({'error': message, **fields})
+    response.status_code = status_code
+    response.headers['Connection'] = 'close'
+    return response
+
+
+@app.before_request
+def preflight_upload():
+    """Boyut, boş alan ve kotayı gövde okunmadan başlıklardan denetle.
+
+    /upload için kota burada yalnız isim adres satırında verildiyse
+    (?uploader_name=...) denetlenebilir. İsim yalnız form alanındaysa kota
+    gövde okunduktan sonra upload_files içinde denetlenir; dosyalar diske
+    yazılmış olur ama kaydedilmeden silinir.
+    """
+    if request.endpoint not in ('upload_files', 'upload_chunk'):
+        return None
+
+    size = request.content_length
+    if size is None:
+        return upload_rejection('İstek boyutu (Content-Length) belirtilmeli.', 411)
+
+    max_size = CHUNK_SIZE if request.endpoint == 'upload_chunk' else MAX_CONTENT_LENGTH
+    if size > max_size:
+        return upload_rejection(f'İstek çok büyük (en fazla {max_size // (1024 * 1024)} MB).', 413)
+
+    error = disk_space_error(size)
+    if error:
+        return upload_rejection(error, 507)
+
+    # Parçalı yüklemede kota oturum açılırken denetlenir; form alanları ise
+    # henüz okunmadığından isim burada yalnızca adres satırından alınabilir
+    if request.endpoint == 'upload_files':
+        error = uploader_quota_error(request.args.get('uploader_name'), size)
+        if error:
+            return upload_rejection(error, 413)
+    return None
+
+
+@app.before_request
+def admit_upload():
+    """Yükleme isteklerini gövde okunmadan önce kabul denetiminden geçir"""
+    if request.endpoint not in ('upload_files', 'upload_chunk'):
+        return None
+
+    size = request.content_length or 0
+    reason = upload_admission.acquire(size)
+    if reason is not None:
+        response = upload_rejection('Sunucu şu anda çok yoğun, yükleme birazdan tekrar denenecek.',
+                                    503, reason=reason)
+        response.headers['Retry-After'] = str(UPLOAD_RETRY_AFTER)
+        return response
+    g.upload_admission_size = size
+    return None
+
+
+@app.teardown_request
+def release_upload(exception=None):
+    size = g.pop('upload_admission_size', None)
+    if size is not None:
+        upload_admission.release(size)
+
+
+def schedule_photo_jobs(filename):
+    """Kaydı yazılan fotoğrafın önizleme, EXIF ve yüz görevlerini kuyruğa al.
+
+    Kayıt zaten kalıcı olduğundan kuyruğa alma hatası yüklemeyi başarısız
+    saymaz; eksik kalan iş sonraki açılışta yeniden kuyruğa girer.
+    """
+    for schedule in (schedule_renditions, schedule_metadata, schedule_faces):
+        try:
+            schedule(filename)
+        except Exception as e:
+            print(f"Arka plan görevi kuyruğa alınamadı ({schedule.__name__}, {filename}): {e}")
 
 
 @app.route('/upload', methods=['POST'])
 def upload_files():
+    # Dosyalar form ayrıştırılırken StreamingRequest tarafından
+    # doğrudan UPLOAD_FOLDER'a yazılır; burada sadece kayıt açılır
+    # Yazıcıya verilen dosyalar artık kayda aittir; hata olsa da burada silinmez
+    submitted_sinks = set()
+
     try:
         if 'photos' not in request.files:
             return jsonify({'error': 'Fotoğraf seçilmedi'}), 400
@@ -149,45 +1812,63 @@ def upload_files():
         if not files or files[0].filename == '':
             return jsonify({'error': 'Fotoğraf seçilmedi'}), 400
 
+        # İsim adres satırında gelmediyse kota ancak form okunduktan sonra denetlenebilir
+        quota_error = uploader_quota_error(uploader_name, sum(sink.size for sink in request.upload_sinks))
+        if quota_error:
+            return jsonify({'error': quota_error}), 413
+
         uploaded_count = 0
+        deduplicated_count = 0
+        pending = []
         errors = []
 
-        conn = get_db_connection()
-
+        # Boyut ve özet akış sırasında hesaplandı; tüm kayıtlar kuyruğa
+        # birlikte verilir ki aynı toplu işleme girsinler
         for file in files:
-            if file and allowed_file(file.filename):
-                try:
-                    # Güvenli dosya adı oluştur
-                    original_filename = file.filename
-                    file_extension = original_filename.rsplit('.', 1)[1].lower()
-                    unique_filename = f"{uuid.uuid4()}.{file_extension}"
-
-                    # Dosyayı kaydet
-                    file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-                    file.save(file_path)
-
-                    # Dosya boyutunu al
-                    file_size = os.path.getsize(file_path)
-
-                    # Veritabanına kaydet
-                    c = conn.cursor()
-                    c.execute('''
-                        INSERT INTO photos (filename, original_filename, uploader_name, file_size)
-                        VALUES (?, ?, ?, ?)
-                    ''', (unique_filename, original_filename, uploader_name, file_size))
-
-                    uploaded_count += 1
-
-                except Exception as e:
-                    errors.append(f"{original_filename}: {str(e)}")
+            sink = file.stream
+            if isinstance(sink, UploadSink) and sink.image_type is None:
+                # İmzaya bakacak kadar bayt gelmeden biten dosya
+                errors.append(f"{file.filename}: Dosya bir fotoğraf değil")
+            elif isinstance(sink, UploadSink):
+                sink.close()
+                submitted_sinks.add(sink)
+                pending.append((file.filename, sink, photo_writer.submit(
+                    sink.filename, file.filename, uploader_name, sink.size, sink.content_hash)))
             else:
                 errors.append(f"{file.filename}: Geçersiz dosya formatı")
 
-        conn.commit()
-        conn.close()
+        stored_filenames = []
+        photo_ids = []
+        for original_filename, sink, future in pending:
+            try:
+                photo_id, stored_filename, deduplicated = future.result()
+            except Exception as e:
+                # Kaydı yazılamayan dosya tutulmaz
+                sink.discard()
+                errors.append(f"{original_filename}: {str(e)}")
+                continue
+
+            uploaded_count += 1
+            stored_filenames.append(stored_filename)
+            photo_ids.append(photo_id)
+            # Aynı fotoğraf zaten varsa yeni kopyaya gerek yok
+            if deduplicated:
+                sink.discard()
+                deduplicated_count += 1
+
+        # Önizlemeler kayıt tamamlandıktan sonra arka planda üretilir. Yeni
+        # kayıt, tekrar yüklemede de, önizleme yollarını ve EXIF bilgilerini
+        # gösterdiği dosyadan alır (önizlemeler hazırsa yalnız yollar yazılır)
+        for stored_filename in stored_filenames:
+            schedule_photo_jobs(stored_filename)
+
+        if uploaded_count:
+            stats_hub.record_upload(uploader_name or 'Anonim', photo_ids)
+            archive_builder.mark_changed(uploader_name or 'Anonim')
 
         response_data = {
             'uploaded_count': uploaded_count,
+            'deduplicated_count': deduplicated_count,
             'total_files': len(files)
         }
 
@@ -196,47 +1877,1220 @@ def upload_files():
 
         return jsonify(response_data)
 
+    except UploadRejected as e:
+        return upload_rejection(e.message, e.status_code)
+
     except Exception as e:
         return jsonify({'error': f'Yükleme hatası: {str(e)}'}), 500
 
+    finally:
+        # Yazıcıya hiç verilmeyen (yarım kalan, başka alandan gelen, reddedilen) dosyaları temizle
+        for sink in request.upload_sinks:
+            if sink not in submitted_sinks:
+                sink.discard()
+
+
+@app.route('/upload/sessions', methods=['POST'])
+def create_upload_session():
+    """Parçalı yükleme oturumu aç"""
+    data = request.get_json(silent=True) or {}
+    original_filename = data.get('filename', '')
+    uploader_name = data.get('uploader_name') or 'Anonim'
+
+    try:
+        file_size = int(data.get('size', -1))
+    except (TypeError, ValueError):
+        file_size = -1
+
+    if not original_filename or not allowed_file(original_filename):
+        return jsonify({'error': f'{original_filename}: Geçersiz dosya formatı'}), 400
+
+    if file_size <= 0:
+        return jsonify({'error': f'{original_filename}: Geçersiz dosya boyutu'}), 400
+
+    if file_size > MAX_CONTENT_LENGTH:
+        return jsonify({'error': f'{original_filename}: Dosya çok büyük '
+                                 f'(en fazla {MAX_CONTENT_LENGTH // (1024 * 1024)} MB)'}), 413
+
+    # Bildirilen boyutla denetlenir; böylece tek bayt gönderilmeden reddedilir
+    error = disk_space_error(file_size)
+    if error:
+        return jsonify({'error': error}), 507
+
+    error = uploader_quota_error(uploader_name, file_size)
+    if error:
+        return jsonify({'error': error}), 413
+
+    session_id = uuid.uuid4().hex
 
-@app.route('/admin')
-def admin_panel():
     conn = get_db_connection()
-    photos = conn.execute('''
-        SELECT * FROM photos ORDER BY upload_time DESC
-    ''').fetchall()
+    cleanup_upload_sessions(conn)
+    conn.execute('''
+        INSERT INTO upload_sessions (id, original_filename, uploader_name, file_size)
+        VALUES (?, ?, ?, ?)
+    ''', (session_id, original_filename, uploader_name, file_size))
+    conn.commit()
+    conn.close()
+
+    # Boş geçici dosyayı oluştur
+    open(partial_upload_path(session_id), 'wb').close()
+
+    return jsonify({
+        'session_id': session_id,
+        'chunk_size': CHUNK_SIZE,
+        'offset': 0,
+        'size': file_size
+    }), 201
+
+
+@app.route('/upload/sessions/<session_id>', methods=['GET'])
+def get_upload_session(session_id):
+    """Sunucuya ulaşan bayt sayısını döndür (devam etmek için)"""
+    conn = get_db_connection()
+    session = conn.execute('SELECT * FROM upload_sessions WHERE id = ?', (session_id,)).fetchone()
+    conn.close()
+
+    # Tamamlanmış oturum: istemci yalnız tamamlamayı tekrarlayıp sonucu alır
+    if session and session['photo_id'] is not None:
+        return jsonify({
+            'session_id': session_id,
+            'chunk_size': CHUNK_SIZE,
+            'offset': session['file_size'],
+            'size': session['file_size'],
+            'completed': True
+        })
+
+    part_path = partial_upload_path(session_id)
+    if not session or not os.path.exists(part_path):
+        return jsonify({'error': 'Yükleme oturumu bulunamadı'}), 404
+
+    return jsonify({
+        'session_id': session_id,
+        'chunk_size': CHUNK_SIZE,
+        'offset': os.path.getsize(part_path),
+        'size': session['file_size']
+    })
+
+
+@app.route('/upload/sessions/<session_id>', methods=['PUT'])
+def upload_chunk(session_id):
+    """Bir parçayı verilen konumdan itibaren geçici dosyaya ekle"""
+    try:
+        offset = int(request.args.get('offset', ''))
+    except ValueError:
+        return jsonify({'error': 'Geçersiz parça konumu'}), 400
+
+    # Boyut preflight_upload'da denetlendi
+    chunk_length = request.content_length
+    rejected = False
+    prune_upload_hashes()
+
+    # Olmayan oturum için kilit dosyası açılmasın
+    if not upload_session_exists(session_id):
+        return jsonify({'error': 'Yükleme oturumu bulunamadı'}), 404
+
+    # Konum denetimi, ekleme ve özet güncellemesi oturum kilidi altında yapılır;
+    # aynı konuma gelen ikinci parça ilki bitince 409 ile doğru konumu öğrenir
+    with upload_session_lock(session_id):
+        conn = get_db_connection()
+        session = conn.execute('SELECT * FROM upload_sessions WHERE id = ?', (session_id,)).fetchone()
+        conn.close()
+
+        part_path = partial_upload_path(session_id)
+        if not session or session['photo_id'] is not None or not os.path.exists(part_path):
+            return jsonify({'error': 'Yükleme oturumu bulunamadı'}), 404
+
+        with open(part_path, 'ab') as part_file:
+            current_offset = part_file.tell()
+
+            # İstemci eksik ya da fazla gönderdiyse doğru konumu bildir
+            if offset != current_offset:
+                return jsonify({'error': 'Parça konumu uyuşmuyor', 'offset': current_offset}), 409
+
+            if current_offset + chunk_length > session['file_size']:
+                return jsonify({'error': 'Parça dosya boyutunu aşıyor', 'offset': current_offset}), 400
+
+            # Özeti kaldığı yerden sürdür; konum tutmuyorsa tamamlamada hesaplanır
+            with upload_session_hashes_lock:
+                hash_offset, digest, _ = upload_session_hashes.pop(session_id, (0, hashlib.sha256(), 0))
+            if hash_offset != current_offset:
+                digest = None
+
+            # İlk parçanın başında türe bakılır; görsel değilse gerisi okunmaz
+            header = b'' if current_offset == 0 else None
+
+            # Parçayı bellekte biriktirmeden diske akıt; bağlantı koparsa
+            # gelen kısım yazılmış olur ve istemci kaldığı yerden devam eder
+            try:
+                while True:
+                    block = request.stream.read(64 * 1024)
+                    if header is not None:
+                        header += block[:IMAGE_SNIFF_SIZE]
+                        if len(header) >= IMAGE_SNIFF_SIZE or not block:
+                            if sniff_image_type(header) is None:
+                                rejected = True
+                                break
+                            header = None
+                    if not block:
+                        break
+                    part_file.write(block)
+                    if digest is not None:
+                        digest.update(block)
+            finally:
+                current_offset = part_file.tell()
+                if digest is not None and not rejected:
+                    with upload_session_hashes_lock:
+                        upload_session_hashes[session_id] = (current_offset, digest, time.monotonic())
+
+        if rejected:
+            # Oturum silinir; istemci aynı dosyayla tekrar denerse yeni oturum açılır
+            conn = get_db_connection()
+            conn.execute('DELETE FROM upload_sessions WHERE id = ?', (session_id,))
+            conn.commit()
+            conn.close()
+            remove_upload_session_files(session_id)
+
+    if rejected:
+        return upload_rejection(f"{session['original_filename']}: Dosya bir fotoğraf değil", 415)
+
+    return jsonify({'offset': current_offset, 'size': session['file_size']})
+
+
+@app.route('/upload/sessions/<session_id>/complete', methods=['POST'])
+def complete_upload_session(session_id):
+    """Tamamlanan yüklemeyi fotoğraflar tablosuna taşı.
+
+    Tekrarlanabilir: yanıtı kaybolan istemci aynı oturumu yeniden tamamlarsa
+    ilk tamamlamanın sonucu döner, fotoğraf ikinci kez eklenmez.
+    """
+    if not upload_session_exists(session_id):
+        return jsonify({'error': 'Yükleme oturumu bulunamadı'}), 404
+
+    with upload_session_lock(session_id):
+        conn = get_db_connection()
+        try:
+            session = conn.execute('SELECT * FROM upload_sessions WHERE id = ?', (session_id,)).fetchone()
+            if session and session['photo_id'] is not None:
+                return jsonify({
+                    'uploaded_count': 1,
+                    'deduplicated_count': session['deduplicated'],
+                    'photo_id': session['photo_id']
+                })
+
+            part_path = partial_upload_path(session_id)
+            if not session or not os.path.exists(part_path):
+                return jsonify({'error': 'Yükleme oturumu bulunamadı'}), 404
+
+            file_size = os.path.getsize(part_path)
+            if file_size != session['file_size']:
+                return jsonify({'error': 'Dosya eksik yüklendi', 'offset': file_size}), 409
+
+            original_filename = session['original_filename']
+            file_extension = original_filename.rsplit('.', 1)[1].lower()
+            unique_filename = f"{uuid.uuid4()}.{file_extension}"
+
+            with upload_session_hashes_lock:
+                hash_offset, digest, _ = upload_session_hashes.pop(session_id, (-1, None, 0))
+            content_hash = digest.hexdigest() if hash_offset == file_size else file_sha256(part_path)
+
+            # Geçici dosyayı kalıcı konumuna taşı
+            file_path = photo_storage_path(unique_filename, create=True)
+            os.replace(part_path, file_path)
+
+            try:
+                photo_id, stored_filename, deduplicated = register_photo(unique_filename, original_filename,
+                                                                         session['uploader_name'], file_size,
+                                                                         content_hash)
+            except Exception:
+                # Kayıt yazılmadı: dosya oturuma geri döner ki istemci tamamlamayı yeniden deneyebilsin
+                os.replace(file_path, part_path)
+                raise
+            # Oturum sonucuyla birlikte saklanır, süresi dolunca temizlenir
+            conn.execute('''
+                UPDATE upload_sessions SET photo_id = ?, deduplicated = ? WHERE id = ?
+            ''', (photo_id, 1 if deduplicated else 0, session_id))
+            conn.commit()
+
+            # Aynı fotoğraf zaten varsa yeni kopyayı tutma
+            if deduplicated:
+                os.remove(file_path)
+            schedule_photo_jobs(stored_filename)
+            stats_hub.record_upload(session['uploader_name'] or 'Anonim', [photo_id])
+            archive_builder.mark_changed(session['uploader_name'] or 'Anonim')
+
+        except Exception as e:
+            return jsonify({'error': f'Yükleme hatası: {str(e)}'}), 500
+
+        finally:
+            conn.close()
+
+    return jsonify({
+        'uploaded_count': 1,
+        'deduplicated_count': 1 if deduplicated else 0,
+        'photo_id': photo_id
+    })
+
+
+def photo_version(photo, rendition):
+    """İçerik adresli URL sürümü: dosya içeriği (ve önizleme boyutu) değişmedikçe aynı kalır"""
+    if not photo['content_hash']:
+        return None
+    key = f"{photo['content_hash']}:{rendition}:{RENDITION_SIZES.get(rendition, '')}"
+    return hashlib.sha256(key.encode('ascii')).hexdigest()[:20]
+
+
+def photo_url(photo, rendition):
+    version = photo_version(photo, rendition)
+    url = f"/photos/{photo['id']}/{rendition}"
+    return f"{url}?v={version}" if version else url
+
+
+@app.route('/photos/<int:photo_id>/<rendition>')
+def serve_photo(photo_id, rendition):
+    """Özgün fotoğrafı ya da önizlemesini gönder.
+
+    ?v= güncel içerik sürümüyle eşleşiyorsa yanıt bir yıl değişmez olarak
+    önbelleğe alınır; sürüm ETag olarak da kullanılır. Range, If-Range,
+    If-None-Match ve If-Modified-Since desteklenir.
+    """
+    if rendition != 'original' and rendition not in RENDITION_SIZES:
+        return jsonify({'error': 'Önizleme bulunamadı'}), 404
+
+    conn = get_db_connection()
+    photo = conn.execute('''
+        SELECT id, filename, content_hash, thumbnail_path, preview_path
+        FROM photos WHERE id = ?
+    ''', (photo_id,)).fetchone()
+    conn.close()
+
+    if photo is None:
+        return jsonify({'error': 'Fotoğraf bulunamadı'}), 404
+
+    if rendition == 'original':
+        file_path = photo_path(photo['filename'])
+    elif photo[f'{rendition}_path']:
+        file_path = os.path.join(RENDITION_FOLDER, photo[f'{rendition}_path'])
+    else:
+        return jsonify({'error': 'Önizleme henüz hazır değil'}), 404
+
+    if not os.path.exists(file_path):
+        return jsonify({'error': 'Fotoğraf bulunamadı'}), 404
+
+    version = photo_version(photo, rendition)
+
+    if PHOTO_SENDFILE_MODE == 'x-accel':
+        # Gövdeyi ve Range isteklerini nginx gönderir; koşullu istekler burada yanıtlanır
+        mimetype = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+        response = app.response_class(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = X_ACCEL_PREFIX + file_path.replace(os.sep, '/')
+        if version:
+            response.set_etag(version)
+        response.last_modified = os.path.getmtime(file_path)
+    else:
+        response = send_file(file_path, etag=version or True, conditional=True)
+
+    if version and request.args.get('v') == version:
+        response.headers['Cache-Control'] = f'public, max-age={PHOTO_IMMUTABLE_MAX_AGE}, immutable'
+    else:
+        response.headers['Cache-Control'] = 'public, no-cache'
+
+    if PHOTO_SENDFILE_MODE == 'x-accel':
+        return response.make_conditional(request)
+    return response
+
+
+# Listeleme sıraları: yükleme zamanı ya da (varsa) çekim zamanı
+PHOTO_SORT_KEYS = {'upload': 'upload_epoch', 'taken': CAPTURE_EPOCH}
+
+
+def encode_cursor(sort_epoch, photo_id):
+    """Sayfalama konumunu URL'de taşınabilir metne çevir"""
+    return base64.urlsafe_b64encode(f"{sort_epoch}|{photo_id}".encode('ascii')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    sort_epoch, photo_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('ascii').split('|')
+    return int(sort_epoch), int(photo_id)
+
+
+def photo_to_dict(photo):
+    """Fotoğraf kaydını API yanıtına çevir"""
+    return {
+        'id': photo['id'],
+        'original_filename': photo['original_filename'],
+        'uploader_name': photo['uploader_name'] or 'Anonim',
+        'upload_time': photo['upload_time'],
+        'taken_at': photo['taken_at'],
+        'camera_model': photo['camera_model'],
+        'width': photo['width'] or None,
+        'height': photo['height'] or None,
+        'orientation': photo['orientation'],
+        'file_size': photo['file_size'],
+        'original_url': photo_url(photo, 'original'),
+        'thumbnail_url': photo_url(photo, 'thumbnail') if photo['thumbnail_path'] else None,
+        'preview_url': photo_url(photo, 'preview') if photo['preview_path'] else None
+    }
+
+
+@app.route('/api/photos')
+def list_photos():
+    """Fotoğrafları yeniden eskiye, (sıralama zamanı, id) üzerinden sayfalayarak listele.
+    ?sort=taken çekim zamanına göre sıralar; EXIF'i olmayanlar yükleme zamanıyla girer."""
+    try:
+        limit = min(max(int(request.args.get('limit', ADMIN_PAGE_SIZE)), 1), ADMIN_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'Geçersiz sayfa boyutu'}), 400
+
+    sort_key = PHOTO_SORT_KEYS.get(request.args.get('sort', 'upload'))
+    if sort_key is None:
+        return jsonify({'error': 'Geçersiz sıralama'}), 400
+
+    conditions = []
+    params = []
+
+    uploader_name = request.args.get('uploader')
+    if uploader_name:
+        conditions.append('uploader_name = ?')
+        params.append(uploader_name)
+
+    # Keyset sayfalama: OFFSET yerine son görülen kaydın ardından devam et
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            sort_epoch, photo_id = decode_cursor(cursor)
+            # Ayrı üst sınır, ifade indeksinde de aralık aramasını sağlar
+            conditions.append(f'{sort_key} <= ? AND ({sort_key}, id) < (?, ?)')
+            params.extend((sort_epoch, sort_epoch, photo_id))
+        except (ValueError, UnicodeDecodeError):
+            return jsonify({'error': 'Geçersiz sayfa konumu'}), 400
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+    conn = get_db_connection()
+    photos = conn.execute(f'''
+        SELECT id, original_filename, uploader_name, upload_time, file_size, content_hash,
+               thumbnail_path, preview_path, taken_at, camera_model, width, height, orientation,
+               {sort_key} AS sort_epoch
+        FROM photos {where}
+        ORDER BY {sort_key} DESC, id DESC
+        LIMIT ?
+    ''', (*params, limit + 1)).fetchall()
+    conn.close()
+
+    # Bir fazla kayıt istenir; varsa sonraki sayfa vardır
+    next_cursor = None
+    if len(photos) > limit:
+        photos = photos[:limit]
+        next_cursor = encode_cursor(photos[-1]['sort_epoch'], photos[-1]['id'])
+
+    return jsonify({
+        'photos': [photo_to_dict(photo) for photo in photos],
+        'next_cursor': next_cursor
+    })
+
+
+def hamming_masks(bits, max_distance):
+    """bits genişliğinde, en fazla max_distance biti açık tüm maskeler"""
+    masks = [0]
+    for distance in range(1, max_distance + 1):
+        for positions in itertools.combinations(range(bits), distance):
+            masks.append(sum(1 << position for position in positions))
+    return masks
+
+
+class HammingIndex:
+    """64 bitlik özetler için çoklu indeksli karma tablosu (multi-index hashing).
+
+    Özet 16 bitlik dört parçaya bölünür. Uzaklığı r'yi geçmeyen iki özetin
+    en az bir parçası en fazla r // 4 bit farklıdır (güvercin yuvası), bu
+    yüzden adaylar yalnız o parçaya yakın kovalardan toplanır. Rastgele
+    dağılan 64 bitlik özetlerde BK ağacı r=4'te bile ağacın çoğunu dolaşır.
+    """
+
+    PARTS = 4
+    PART_BITS = 16
+
+    def __init__(self, max_distance=DUPLICATE_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.values = []
+        self._masks = hamming_masks(self.PART_BITS, max_distance // self.PARTS)
+        self._tables = [{} for _ in range(self.PARTS)]
+
+    def _parts(self, value):
+        part_mask = (1 << self.PART_BITS) - 1
+        return [(value >> (self.PART_BITS * i)) & part_mask for i in range(self.PARTS)]
+
+    def search(self, value):
+        """Uzaklığı max_distance'ı geçmeyen kayıtlar: [(sıra, uzaklık)]"""
+        value &= (1 << 64) - 1  # Veritabanındaki işaretli değer
+        candidates = set()
+        for table, part in zip(self._tables, self._parts(value)):
+            for mask in self._masks:
+                bucket = table.get(part ^ mask)
+                if bucket:
+                    candidates.update(bucket)
+
+        matches = []
+        for position in candidates:
+            distance = (self.values[position] ^ value).bit_count()
+            if distance <= self.max_distance:
+                matches.append((position, distance))
+        return matches
+
+    def add(self, value):
+        """Özeti ekle, sırasını döndür"""
+        value &= (1 << 64) - 1
+        position = len(self.values)
+        self.values.append(value)
+        for table, part in zip(self._tables, self._parts(value)):
+            table.setdefault(part, []).append(position)
+        return position
+
+    def remove(self, position):
+        """Kaydı kovalardan çıkar; aramalarda bir daha dönmez"""
+        for table, part in zip(self._tables, self._parts(self.values[position])):
+            table[part].remove(position)
+
+
+class DuplicateFinder:
+    """Yakın kopya gruplarını süreç içinde tutar.
+
+    Özetler dosya başına bir kez indekse eklenir; her yeni özet önce
+    benzerleriyle aranır, bulunanlarla birleşim-bul (union-find) ile aynı
+    gruba alınır. Benzerlik geçişlidir: A~B ve B~C ise üçü bir gruptur.
+    Yeni kayıtlar ve özeti sonradan çıkan eski kayıtlar aynı yolla eklenir;
+    silinen dosyanın yalnız kendi grubu yeniden kümelenir. Hiçbir durumda
+    istek sırasında baştan kümeleme yapılmaz.
+    """
+
+    def __init__(self, max_distance=DUPLICATE_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._index = HammingIndex(self.max_distance)
+        self._filenames = []  # Sıra -> dosya adı (çıkarılmışsa None)
+        self._positions = {}  # Dosya adı -> sıra
+        self._parent = []
+        self._rows = {}  # Fotoğraf kimliği -> dosya adı
+        self._row_counts = {}  # Dosya adı -> onu gösteren kayıt sayısı
+        self._version = (0, 0, 0)
+
+    def _find(self, position):
+        while self._parent[position] != position:
+            self._parent[position] = self._parent[self._parent[position]]
+            position = self._parent[position]
+        return position
+
+    def _union(self, position, other):
+        root, other_root = self._find(position), self._find(other)
+        if root != other_root:
+            self._parent[root] = other_root
+
+    def add(self, filename, value):
+        if filename in self._positions:
+            return
+
+        matches = self._index.search(value)
+        position = self._index.add(value)
+        self._positions[filename] = position
+        self._filenames.append(filename)
+        self._parent.append(position)
+        for other, _ in matches:
+            self._union(position, other)
+
+    def remove(self, filename):
+        """Dosyayı çıkar; grubunun kalan üyeleri kendi aralarında yeniden birleştirilir"""
+        position = self._positions.pop(filename, None)
+        if position is None:
+            return
+
+        root = self._find(position)
+        members = [member for member, name in enumerate(self._filenames)
+                   if name is not None and member != position and self._find(member) == root]
+        self._index.remove(position)
+        self._filenames[position] = None
+        self._parent[position] = position
+        for member in members:
+            self._parent[member] = member
+        # Bir üyenin benzerleri yalnız aynı gruptadır; diğer gruplar değişmez
+        for member in members:
+            for other, _ in self._index.search(self._index.values[member]):
+                self._union(member, other)
+
+    def _add_row(self, row):
+        self._rows[row['id']] = row['filename']
+        self._row_counts[row['filename']] = self._row_counts.get(row['filename'], 0) + 1
+        self.add(row['filename'], row['dhash'])
+
+    def _remove_row(self, photo_id):
+        # Aynı dosyayı gösteren başka kayıt (tekrar yükleme) kaldıysa grup değişmez
+        filename = self._rows.pop(photo_id)
+        self._row_counts[filename] -= 1
+        if not self._row_counts[filename]:
+            del self._row_counts[filename]
+            self.remove(filename)
+
+    def similar(self, value):
+        """Özete benzeyen dosyalar: [(dosya adı, uzaklık)]"""
+        return [(self._filenames[position], distance) for position, distance in self._index.search(value)]
+
+    def groups(self):
+        """İki ya da daha fazla dosyalı gruplar, kalabalıktan başlayarak"""
+        clusters = {}
+        for position, filename in enumerate(self._filenames):
+            if filename is None:
+                continue
+            clusters.setdefault(self._find(position), []).append(filename)
+        return sorted((group for group in clusters.values() if len(group) > 1), key=len, reverse=True)
+
+    def refresh(self, conn):
+        """Veritabanındaki özetlerle eşitle ve grupları döndür"""
+        with self._lock:
+            row = conn.execute('''
+                SELECT COUNT(*), MAX(id), TOTAL(id) FROM photos WHERE dhash IS NOT NULL
+            ''').fetchone()
+            version = (row[0], row[1] or 0, int(row[2]))
+            if version != self._version:
+                new_rows = conn.execute('''
+                    SELECT id, filename, dhash FROM photos
+                    WHERE dhash IS NOT NULL AND id > ? ORDER BY id
+                ''', (self._version[1],)).fetchall()
+                only_added = (self._version[0] + len(new_rows) == version[0] and
+                              self._version[2] + sum(row['id'] for row in new_rows) == version[2])
+                if not only_added:
+                    # Silinen ya da özeti sonradan çıkan kayıtlar: yalnız farklar işlenir
+                    ids = {row[0] for row in conn.execute('SELECT id FROM photos WHERE dhash IS NOT NULL')}
+                    for photo_id in self._rows.keys() - ids:
+                        self._remove_row(photo_id)
+                    late_ids = sorted(ids - self._rows.keys())
+                    new_rows = []
+                    for start in range(0, len(late_ids), 500):
+                        chunk = late_ids[start:start + 500]
+                        new_rows.extend(conn.execute(f'''
+                            SELECT id, filename, dhash FROM photos
+                            WHERE id IN ({','.join('?' * len(chunk))}) ORDER BY id
+                        ''', chunk))
+                for row in new_rows:
+                    self._add_row(row)
+                self._version = version
+            return self.groups()
+
+
+duplicate_finder = DuplicateFinder()
+
+
+@app.route('/api/duplicates')
+def list_duplicates():
+    """Algısal özete göre yakın kopya grupları, en kalabalıktan başlayarak"""
+    conn = get_db_connection()
+    started = time.perf_counter()
+    groups = duplicate_finder.refresh(conn)
+    elapsed = time.perf_counter() - started
+
+    # Her dosya için ilk yüklenen kayıt gösterilir
+    shown = groups[:DUPLICATE_GROUP_LIMIT]
+    filenames = [filename for group in shown for filename in group]
+    photos = {}
+    if filenames:
+        placeholders = ','.join('?' * len(filenames))
+        for photo in conn.execute(f'''
+            SELECT * FROM photos WHERE filename IN ({placeholders}) ORDER BY id
+        ''', filenames):
+            photos.setdefault(photo['filename'], photo)
+    conn.close()
+
+    return jsonify({
+        'groups': [[photo_to_dict(photos[filename]) for filename in group if filename in photos]
+                   for group in shown],
+        'group_count': len(groups),
+        'photo_count': sum(len(group) for group in groups),
+        'max_distance': duplicate_finder.max_distance,
+        'elapsed_ms': round(elapsed * 1000, 1)
+    })
+
+
+def benchmark_duplicates(photos=50000, max_distance=DUPLICATE_MAX_DISTANCE):
+    """Sentetik özetlerle tam kümeleme süresini ve tek arama gecikmesini ölç"""
+    import random
+
+    rng = random.Random(2025)
+    hashes = []
+    # Fotoğrafların bir kısmı seri çekim / yeniden sıkıştırılmış kopya
+    while len(hashes) < photos:
+        base = rng.getrandbits(64)
+        hashes.append(base)
+        for _ in range(rng.choice((0, 0, 0, 1, 2, 4))):
+            value = base
+            for bit in rng.sample(range(64), rng.randint(0, max_distance)):
+                value ^= 1 << bit
+            hashes.append(value)
+    hashes = [value - (1 << 64) if value >= 1 << 63 else value for value in hashes[:photos]]
+    print(f"⏱️ {photos} özet, en fazla {max_distance} bit fark")
+
+    finder = DuplicateFinder(max_distance)
+    started = time.perf_counter()
+    for n, value in enumerate(hashes):
+        finder.add(f"photo_{n}.jpg", value)
+    groups = finder.groups()
+    elapsed = time.perf_counter() - started
+    print(f"  Tam kümeleme: {elapsed:.2f} sn, {len(groups)} grup, "
+          f"{sum(len(group) for group in groups)} fotoğraf")
+
+    samples = [hashes[rng.randrange(photos)] for _ in range(1000)]
+    started = time.perf_counter()
+    for value in samples:
+        finder.similar(value)
+    print(f"  Tek arama: {(time.perf_counter() - started) * 1000 / len(samples):.3f} ms")
+
+
+@functools.lru_cache(maxsize=1)
+def face_library_error():
+    """numpy, dlib ya da model paketi eksikse nedeni, yoksa None"""
+    try:
+        import numpy
+        import dlib
+        import face_recognition_models
+    except ImportError as e:
+        return (f'Yüz arama için numpy, dlib-bin ve face_recognition_models kurulmalı '
+                f'({e.name} bulunamadı).')
+    return None
+
+
+def face_model_path(kind):
+    import face_recognition_models
+
+    return os.path.join(os.path.dirname(face_recognition_models.__file__), 'models', FACE_MODEL_FILES[kind][0])
+
+
+@functools.lru_cache(maxsize=8)
+def face_model_checksum(path, size, mtime_ns):
+    # Dosya değişmedikçe (boyut, değişme zamanı) özet yeniden hesaplanmaz
+    return file_sha256(path)
+
+
+def face_support_error():
+    """Yüz arama kullanılamıyorsa nedeni, yoksa None.
+
+    Model dosyalarının özetleri FACE_MODEL_FILES'takilerle karşılaştırılır;
+    farklı bir model sessizce yüklenip eski vektörlerle karıştırılmasın.
+    """
+    error = face_library_error()
+    if error:
+        return error
+    for kind, (name, checksum) in FACE_MODEL_FILES.items():
+        path = face_model_path(kind)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return f'Yüz modeli bulunamadı: {path}'
+        if face_model_checksum(path, stat.st_size, stat.st_mtime_ns) != checksum:
+            return f'Yüz modelinin özeti beklenenden farklı ({name}); face_recognition_models==0.3.0 yeniden kurulmalı.'
+    return None
+
+
+def reference_face_files():
+    """face_data'daki referans kırpıntıları: {kişi: [yollar]}"""
+    people = {}
+    if os.path.isdir(FACE_DATA_FOLDER):
+        for name in sorted(os.listdir(FACE_DATA_FOLDER)):
+            parts = name.rsplit('.', 1)[0].split('_')
+            if len(parts) >= 3 and parts[0] == 'face' and allowed_file(name):
+                people.setdefault('_'.join(parts[1:-1]), []).append(os.path.join(FACE_DATA_FOLDER, name))
+    return people
+
+
+face_models = None
+
+
+def load_face_models():
+    """Algılayıcı, nokta bulucu ve tanıyıcıyı süreç başına bir kez yükle"""
+    global face_models
+    import dlib
+
+    if face_models is None:
+        face_models = (dlib.get_frontal_face_detector(),
+                       dlib.shape_predictor(face_model_path('landmarks')),
+                       dlib.face_recognition_model_v1(face_model_path('recognizer')))
+    return face_models
+
+
+def load_face_image(source_path):
+    """Algılama için EXIF yönü uygulanmış, küçültülmüş RGB görüntü ve ölçeği.
+
+    JPEG'ler hedefe yakın ölçekte çözülür. Ölçek, küçük görüntüdeki
+    koordinatları orijinal piksellere çevirmek içindir.
+    """
+    import numpy as np
+
+    with Image.open(source_path) as img:
+        orientation = img.getexif().get(0x0112)
+        width = img.size[1] if orientation in (5, 6, 7, 8) else img.size[0]
+        img.draft('RGB', (FACE_DETECT_SIZE, FACE_DETECT_SIZE))
+        rgb = img.convert('RGB')
+    if orientation in ORIENTATION_TRANSPOSE:
+        rgb = rgb.transpose(ORIENTATION_TRANSPOSE[orientation])
+    rgb.thumbnail((FACE_DETECT_SIZE, FACE_DETECT_SIZE))
+    return np.asarray(rgb), rgb.size[0] / width
+
+
+def find_faces(image):
+    """RGB görüntüdeki yüz kutuları ve algılama skorları: ([dlib.rectangle], [skor])"""
+    detector, _, _ = load_face_models()
+    rects, scores, _ = detector.run(image, FACE_DETECT_UPSAMPLE, 0.0)
+    return list(rects), list(scores)
+
+
+def face_embeddings(image, rects):
+    """Yüzleri beş noktalarına göre hizalayıp 128 boyutlu vektörlerini çıkar: (N, 128) float32"""
+    import numpy as np
+    import dlib
+
+    _, predictor, recognizer = load_face_models()
+    shapes = dlib.full_object_detections([predictor(image, rect) for rect in rects])
+    return np.array(recognizer.compute_face_descriptor(image, shapes), dtype=np.float32).reshape(len(rects), -1)
+
+
+def reference_embedding(path):
+    """Referans kırpıntısındaki en belirgin yüzün vektörü; yüz bulunamazsa None.
+
+    Kırpıntılar yüze sıkı oturduğundan algılayıcının tüm yüzü görebilmesi
+    için kenarları uzatılır.
+    """
+    import numpy as np
+
+    with Image.open(path) as img:
+        image = np.asarray(ImageOps.exif_transpose(img).convert('RGB'))
+    pad = max(image.shape[:2]) // 2
+    image = np.pad(image, ((pad, pad), (pad, pad), (0, 0)), mode='edge')
+    rects, scores = find_faces(image)
+    if not rects:
+        return None
+    best = max(range(len(rects)), key=scores.__getitem__)
+    return face_embeddings(image, [rects[best]])[0]
+
+
+def detect_faces(source_paths):
+    """Bir grup fotoğraftaki yüzleri bul ve vektörlerini hesapla (işlem havuzunda çalışır).
+
+    Her fotoğraf için [(x, y, w, h, vektör baytları)] döner, açılamayan
+    fotoğraf için None. Modeller işlem başına bir kez yüklenir.
+    """
+    load_face_models()
+    results = []
+    for source_path in source_paths:
+        try:
+            image, scale = load_face_image(source_path)
+        except (OSError, SyntaxError, ValueError):
+            results.append(None)
+            continue
+        rects, _ = find_faces(image)
+        if not rects:
+            results.append([])
+            continue
+        # Kutu görüntü kenarından taşabilir
+        results.append([(int(round(max(rect.left(), 0) / scale)), int(round(max(rect.top(), 0) / scale)),
+                         int(round(rect.width() / scale)), int(round(rect.height() / scale)), vector.tobytes())
+                        for rect, vector in zip(rects, face_embeddings(image, rects))])
+    return results
+
+
+def save_faces(conn, model_name, results):
+    """[(dosya adı, yüzler)] listesini yaz; dosyanın önceki yüzlerinin yerine geçer"""
+    conn.executemany('DELETE FROM faces WHERE filename = ?', [(filename,) for filename, _ in results])
+    conn.executemany('''
+        INSERT INTO faces (filename, model, x, y, w, h, embedding) VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [(filename, model_name, *face) for filename, faces in results for face in faces or ()])
+    # Açılamayan dosyalar da işaretlenir ki tekrar denenmesin
+    conn.executemany('UPDATE photos SET face_model = ? WHERE filename = ?',
+                     [(model_name, filename) for filename, _ in results])
+    conn.commit()
+
+
+def schedule_faces(filename):
+    """Fotoğraftaki yüzleri istek iş parçacığını bekletmeden arka planda tara"""
+    if not FACES_ENABLED or face_support_error():
+        return
+    model_name = FACE_MODEL
+
+    # Tekrar yüklenen fotoğrafın yüzleri zaten taranmış olabilir
+    conn = get_db_connection()
+    scanned = conn.execute('''
+        SELECT 1 FROM photos WHERE filename = ? AND face_model = ? LIMIT 1
+    ''', (filename, model_name)).fetchone()
+    if scanned:
+        conn.execute('UPDATE photos SET face_model = ? WHERE filename = ?', (model_name, filename))
+        conn.commit()
+    conn.close()
+    if scanned:
+        return
+
+    def on_done(future):
+        try:
+            faces = future.result()[0]
+        except Exception as e:
+            # Model ya da işlem hatası: taranmamış kalır, sonraki açılışta yeniden denenir
+            print(f"Yüzler taranamadı ({filename}): {e}")
+            return
+        conn = get_db_connection()
+        save_faces(conn, model_name, [(filename, faces)])
+        conn.close()
+
+    submit_background(detect_faces, ([photo_path(filename)],), on_done)
+
+
+def pending_face_filenames(conn, model_name):
+    """Yüzleri bu modelle henüz taranmamış dosyalar"""
+    return [row['filename'] for row in conn.execute(
+        'SELECT DISTINCT filename FROM photos WHERE face_model IS NOT ?', (model_name,))]
+
+
+def schedule_missing_faces():
+    """Yüzleri taranmamış eski fotoğrafları kuyruğa ekle"""
+    if not FACES_ENABLED or face_support_error():
+        return
+    conn = get_db_connection()
+    filenames = pending_face_filenames(conn, FACE_MODEL)
+    conn.close()
+
+    for filename in filenames:
+        if os.path.exists(photo_path(filename)):
+            schedule_faces(filename)
 
-    # Yükleyenlere göre gruplandır
-    grouped_photos = defaultdict(list)
-    uploader_stats = defaultdict(lambda: {'count': 0, 'size': 0, 'latest': None})
 
+def index_faces(workers=None, batch_size=FACE_BATCH_SIZE):
+    """Taranmamış fotoğraflardaki yüzleri işlem havuzunda toplu işle (index-faces).
+
+    Her görev batch_size fotoğraf alır; sonuçları görev başına tek işlemle
+    yazılır, kesilirse kalanlar bir sonraki çalıştırmada işlenir.
+    """
+    error = face_support_error()
+    if error:
+        print(f"❌ {error}")
+        return
+
+    init_db()
+    conn = connect_db()
+    model_name = FACE_MODEL
+    filenames = pending_face_filenames(conn, model_name)
+    total = len(filenames)
+    print(f"🔎 {total} fotoğrafta yüz aranacak (model: {model_name})")
+
+    batches = [filenames[start:start + batch_size] for start in range(0, total, batch_size)]
+    started = time.perf_counter()
+    done = face_count = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            paths = ([photo_path(filename) for filename in batch] for batch in batches)
+            for number, (batch, results) in enumerate(
+                    zip(batches, executor.map(detect_faces, paths)), 1):
+                save_faces(conn, model_name, list(zip(batch, results)))
+                done += len(batch)
+                face_count += sum(len(faces or ()) for faces in results)
+                if number % 20 == 0:
+                    print(f"  {done}/{total} ({done / (time.perf_counter() - started):.1f} fotoğraf/sn)")
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ {done} fotoğraf {elapsed:.1f} sn'de tarandı "
+          f"({done / max(elapsed, 1e-9):.1f} fotoğraf/sn), {face_count} yüz bulundu")
+
+
+class FaceIndex:
+    """Yüz vektörlerini süreç içinde tek bir NumPy dizisinde tutar.
+
+    Tüm yüzlerin tüm referanslara uzaklığı tek matris çarpımıdır:
+    |a - b|² = |a|² + |b|² - 2·a·b, vektör boyları eklenirken hesaplanır. Yalnız yeni yüzler geldiyse
+    onlar diziye eklenir; yeniden taranan fotoğraf varsa dizi baştan okunur.
+    Referans vektörleri face_data değişene kadar saklanır.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reference_key = None
+        self._references = {}
+        self._matches = (None, {})
+        self._reset(None)
+
+    def _reset(self, model_name):
+        self.model_name = model_name
+        self._vectors = None
+        self._squared_norms = None
+        self._filenames = []
+        self._version = (0, 0, 0)
+
+    def __len__(self):
+        return len(self._filenames)
+
+    def add(self, filenames, vectors):
+        """Yüzleri ekle: dosya adları ve (N, D) vektörler"""
+        import numpy as np
+
+        squared_norms = np.einsum('ij,ij->i', vectors, vectors)
+        if self._vectors is None:
+            self._vectors, self._squared_norms = vectors, squared_norms
+        else:
+            self._vectors = np.concatenate([self._vectors, vectors])
+            self._squared_norms = np.concatenate([self._squared_norms, squared_norms])
+        self._filenames.extend(filenames)
+
+    def refresh(self, conn, model_name):
+        """Veritabanındaki yüzlerle eşitle"""
+        import numpy as np
+
+        if model_name != self.model_name:
+            self._reset(model_name)
+        row = conn.execute('''
+            SELECT COUNT(*), MAX(id), TOTAL(id) FROM faces WHERE model = ?
+        ''', (model_name,)).fetchone()
+        version = (row[0], row[1] or 0, int(row[2]))
+        if version == self._version:
+            return
+
+        new_rows = conn.execute('''
+            SELECT id, filename, embedding FROM faces WHERE model = ? AND id > ? ORDER BY id
+        ''', (model_name, self._version[1])).fetchall()
+        only_added = (self._version[0] + len(new_rows) == version[0] and
+                      self._version[2] + sum(row['id'] for row in new_rows) == version[2])
+        if not only_added:
+            self._reset(model_name)
+            new_rows = conn.execute('''
+                SELECT id, filename, embedding FROM faces WHERE model = ? ORDER BY id
+            ''', (model_name,)).fetchall()
+        if new_rows:
+            vectors = np.frombuffer(b''.join(row['embedding'] for row in new_rows), dtype=np.float32)
+            self.add([row['filename'] for row in new_rows], vectors.reshape(len(new_rows), -1))
+        self._version = version
+
+    def references(self, model_name):
+        """Kişi başına referans vektörleri: {kişi: (n, D)}"""
+        import numpy as np
+
+        files = reference_face_files()
+        key = (model_name, tuple((path, os.path.getmtime(path)) for paths in files.values() for path in paths))
+        if key != self._reference_key:
+            references = {}
+            for person, paths in files.items():
+                vectors = []
+                for path in paths:
+                    try:
+                        vector = reference_embedding(path)
+                    except (OSError, SyntaxError, ValueError) as e:
+                        print(f"Referans yüz okunamadı ({path}): {e}")
+                        continue
+                    if vector is None:
+                        print(f"Referans kırpıntıda yüz bulunamadı ({path})")
+                        continue
+                    vectors.append(vector)
+                if vectors:
+                    references[person] = np.vstack(vectors)
+            self._reference_key, self._references = key, references
+        return self._references
+
+    def search(self, references, max_distance):
+        """Her kişinin eşleşen dosyaları: {kişi: {dosya adı: en küçük uzaklık}}
+
+        Yüz, kişinin referanslarından herhangi birine max_distance kadar
+        yakınsa o kişiye sayılır.
+        """
+        import numpy as np
+
+        people = sorted(references)
+        matches = {person: {} for person in people}
+        if self._vectors is None or not people:
+            return matches
+
+        # Kişinin referansları bitişik sütunlardır; kişi başına en küçük uzaklık reduceat ile alınır
+        matrix = np.concatenate([references[person] for person in people]).T
+        reference_norms = np.einsum('ij,ij->j', matrix, matrix)
+        starts = np.cumsum([0] + [len(references[person]) for person in people[:-1]])
+        for offset in range(0, len(self._filenames), FACE_SEARCH_CHUNK):
+            chunk = slice(offset, offset + FACE_SEARCH_CHUNK)
+            squared = (self._squared_norms[chunk, None] + reference_norms[None, :]
+                       - 2 * (self._vectors[chunk] @ matrix))
+            distances = np.sqrt(np.maximum(np.minimum.reduceat(squared, starts, axis=1), 0))
+            for face, person in zip(*np.nonzero(distances <= max_distance)):
+                filename = self._filenames[offset + face]
+                distance = float(distances[face, person])
+                found = matches[people[person]]
+                if distance < found.get(filename, float('inf')):
+                    found[filename] = distance
+        return matches
+
+    def match(self, conn, model_name):
+        """Veritabanıyla eşitleyip her kişinin eşleşen dosyalarını döndür.
+        Yüzler ve referanslar değişmediyse önceki sonuç kullanılır."""
+        with self._lock:
+            self.refresh(conn, model_name)
+            references = self.references(model_name)
+            key = (model_name, self._version, self._reference_key)
+            if self._matches[0] != key:
+                self._matches = (key, self.search(references, FACE_MATCH_DISTANCE))
+            return self._matches[1]
+
+
+face_index = FaceIndex()
+
+
+def person_photos(conn, person):
+    """Kişinin eşleşen fotoğraf kayıtları çekim zamanına göre; kişi yoksa None"""
+    matches = face_index.match(conn, FACE_MODEL).get(person)
+    if not matches:
+        return matches if matches is None else []
+    placeholders = ','.join('?' * len(matches))
+    return conn.execute(f'''
+        SELECT * FROM photos WHERE filename IN ({placeholders}) ORDER BY {CAPTURE_EPOCH}, id
+    ''', list(matches)).fetchall()
+
+
+@app.route('/api/people')
+def list_people():
+    """face_data'daki kişiler ve her birinin eşleşen fotoğraf sayısı"""
+    error = face_support_error()
+    if error:
+        return jsonify({'error': error}), 503
+
+    model_name = FACE_MODEL
+    conn = get_db_connection()
+    started = time.perf_counter()
+    matches = face_index.match(conn, model_name)
+    elapsed = time.perf_counter() - started
+    pending_count = conn.execute('''
+        SELECT COUNT(DISTINCT filename) FROM photos WHERE face_model IS NOT ?
+    ''', (model_name,)).fetchone()[0]
+    conn.close()
+
+    references = reference_face_files()
+    return jsonify({
+        'people': [{'person': person,
+                    'reference_count': len(references.get(person, ())),
+                    'photo_count': len(found)}
+                   for person, found in matches.items()],
+        'model': model_name,
+        'max_distance': FACE_MATCH_DISTANCE,
+        'face_count': len(face_index),
+        'pending_count': pending_count,
+        'elapsed_ms': round(elapsed * 1000, 1)
+    })
+
+
+@app.route('/api/people/<person>')
+def list_person_photos(person):
+    """Kişinin eşleşen fotoğrafları; her dosya için ilk kayıt gösterilir"""
+    error = face_support_error()
+    if error:
+        return jsonify({'error': error}), 503
+
+    conn = get_db_connection()
+    photos = person_photos(conn, person)
+    conn.close()
+    if photos is None:
+        return jsonify({'error': 'Kişi bulunamadı.'}), 404
+
+    shown = {}
     for photo in photos:
-        uploader = photo['uploader_name'] or 'Anonim'
-        grouped_photos[uploader].append(photo)
+        shown.setdefault(photo['filename'], photo)
+    return jsonify({'person': person, 'photos': [photo_to_dict(photo) for photo in shown.values()]})
 
-        # İstatistikleri güncelle
-        uploader_stats[uploader]['count'] += 1
-        uploader_stats[uploader]['size'] += photo['file_size']
 
-        if not uploader_stats[uploader]['latest'] or photo['upload_time'] > uploader_stats[uploader]['latest']:
-            uploader_stats[uploader]['latest'] = photo['upload_time']
+def benchmark_faces(images=100, workers=None, search_faces=100000):
+    """Sentetik fotoğraflarla tarama hızını (fotoğraf/sn) ve arama süresini ölç.
 
-    total_photos = len(photos)
-    total_size = sum(photo['file_size'] for photo in photos)
-    total_size_mb = round(total_size / (1024 * 1024), 2)
+    face_data kırpıntıları rastgele boyut ve konumla 4000x3000 JPEG'lere
+    yapıştırılır; tarama tek işlemle ve işlem havuzuyla ayrı ölçülür.
+    """
+    import random
+    import tempfile
+    import numpy as np
+
+    error = face_support_error()
+    if error:
+        print(f"❌ {error}")
+        return
 
+    model_name = FACE_MODEL
+    crops = [Image.open(path).convert('RGB') for paths in reference_face_files().values() for path in paths]
+    if not crops:
+        print(f"❌ {FACE_DATA_FOLDER} klasöründe referans yüz yok")
+        return
+
+    rng = random.Random(2025)
+    workdir = tempfile.mkdtemp(prefix='bench_faces_')
+    try:
+        paths = []
+        for n in range(images):
+            img = Image.new('RGB', (4000, 3000), tuple(rng.randrange(256) for _ in range(3)))
+            for _ in range(rng.randint(1, 4)):
+                size = rng.randint(250, 700)
+                img.paste(rng.choice(crops).resize((size, size)),
+                          (rng.randrange(4000 - size), rng.randrange(3000 - size)))
+            paths.append(os.path.join(workdir, f"photo_{n}.jpg"))
+            img.save(paths[-1], 'JPEG', quality=90)
+        batches = [paths[start:start + FACE_BATCH_SIZE] for start in range(0, images, FACE_BATCH_SIZE)]
+        print(f"⏱️ {images} fotoğraf (4000x3000), model: {model_name}")
+
+        for worker_count in sorted({1, workers or os.cpu_count() or 1}):
+            with ProcessPoolExecutor(max_workers=worker_count,
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                # Süreç açılışı ve model yüklemesi ölçüme girmesin
+                list(executor.map(detect_faces, [[]] * worker_count))
+                started = time.perf_counter()
+                results = [faces for batch in executor.map(detect_faces, batches)
+                           for faces in batch]
+                elapsed = time.perf_counter() - started
+            print(f"  {worker_count} işlem: {images / elapsed:7.1f} fotoğraf/sn  "
+                  f"({sum(len(faces or ()) for faces in results)} yüz, {elapsed:.1f} sn)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    index = FaceIndex()
+    references = index.references(model_name)
+    dimension = next(iter(references.values())).shape[1]
+    vectors = np.random.default_rng(2025).standard_normal((search_faces, dimension), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index.add([f"photo_{n}.jpg" for n in range(search_faces)], vectors)
+    started = time.perf_counter()
+    index.search(references, FACE_MATCH_DISTANCE)
+    elapsed = time.perf_counter() - started
+    print(f"  Arama: {search_faces} yüz x {sum(len(vectors) for vectors in references.values())} "
+          f"referans {elapsed * 1000:.1f} ms")
+
+
+@app.route('/admin')
+def admin_panel():
+    # Fotoğraflar sayfaya gömülmez; klasörler açıldıkça /api/photos'tan yüklenir.
+    # Özetler tetikleyicilerle güncel tutulan uploaders tablosundan gelir
+    conn = get_db_connection()
+    uploader_stats = conn.execute('''
+        SELECT uploader_name AS uploader,
+               photo_count AS count,
+               total_size AS size,
+               latest_upload AS latest
+        FROM uploaders
+        ORDER BY latest_upload DESC
+    ''').fetchall()
     conn.close()
 
+    total_photos = sum(stats['count'] for stats in uploader_stats)
+    total_size = sum(stats['size'] for stats in uploader_stats)
+    total_size_mb = round(total_size / (1024 * 1024), 2)
+
     # Site ayarlarını al
     settings = get_site_settings()
 
     return render_template('admin.html',
-                           grouped_photos=dict(grouped_photos),
-                           uploader_stats=dict(uploader_stats),
+                           uploader_stats=uploader_stats,
                            total_photos=total_photos,
                            total_size_mb=total_size_mb,
-                           total_uploaders=len(grouped_photos),
+                           total_uploaders=len(uploader_stats),
+                           page_size=ADMIN_PAGE_SIZE,
+                           exports=list_exports(),
+                           export_default_volume_mb=EXPORT_DEFAULT_VOLUME_MB,
+                           face_people=reference_face_files(),
+                           face_error=face_support_error(),
                            settings=settings)
 
 
@@ -254,9 +3108,6 @@ def delete_background():
 
             update_site_setting('background_image', '')
             flash('Sayfa arka plan resmi başarıyla silindi!', 'success')
-
-            # Template'leri yeniden oluştur
-            create_templates()
         else:
             flash('Silinecek sayfa arka plan resmi bulunamadı.', 'error')
 
@@ -280,9 +3131,6 @@ def delete_container_background():
 
             update_site_setting('container_background_image', '')
             flash('Container arka plan resmi başarıyla silindi!', 'success')
-
-            # Template'leri yeniden oluştur
-            create_templates()
         else:
             flash('Silinecek container arka plan resmi bulunamadı.', 'error')
 
@@ -375,158 +3223,1187 @@ def update_settings():
         if copyright_text:
             update_site_setting('copyright_text', copyright_text)
 
+        # Yükleme sayfası ayar sürümüyle bellekte yeniden üretilir; dosya yazılmaz
         flash('Site ayarları başarıyla güncellendi!', 'success')
 
-        # Template'leri yeniden oluştur
-        create_templates()
-
     except Exception as e:
         flash(f'Ayarlar güncellenirken hata oluştu: {str(e)}', 'error')
 
     return redirect(url_for('admin_panel'))
 
 
+# Akış halinde ZIP: arşiv bellekte tutulmaz, dosyalar okundukça gönderilir
+ZIP_READ_SIZE = 1024 * 1024
+ZIP32_LIMIT = 0xFFFFFFFF
+# Zaten sıkıştırılmış biçimler olduğu gibi (ZIP_STORED) yazılır
+PRECOMPRESSED_EXTENSIONS = {'jpg', 'jpeg', 'heic', 'webp'}
+COMPRESSION_PROBE_SIZE = 64 * 1024
+COMPRESSION_MIN_SAVING = 0.1  # Örnek en az %10 küçülmüyorsa sıkıştırma
+ARCHIVE_WORKERS = os.cpu_count() or 2
+archive_executor = None
+archive_executor_lock = threading.Lock()
+
+
+def get_archive_executor():
+    """Paralel sıkıştırma iş parçacığı havuzu (zlib GIL'i bırakır)"""
+    global archive_executor
+    with archive_executor_lock:
+        if archive_executor is None:
+            archive_executor = ThreadPoolExecutor(max_workers=ARCHIVE_WORKERS)
+        return archive_executor
+
+
+def worth_compressing(file_path):
+    """Uzantıya ve dosyanın başından alınan örneğe göre sıkıştırmaya değer mi"""
+    extension = file_path.rsplit('.', 1)[-1].lower() if '.' in file_path else ''
+    if extension in PRECOMPRESSED_EXTENSIONS:
+        return False
+    with open(file_path, 'rb') as f:
+        sample = f.read(COMPRESSION_PROBE_SIZE)
+    if not sample:
+        return False
+    return len(zlib.compress(sample, 1)) < len(sample) * (1 - COMPRESSION_MIN_SAVING)
+
+
+def deflate_block(block, zdict, level):
+    """Bir bloğu bağımsız sıkıştır; önceki bloğun sonu sözlük olarak verilir.
+
+    Z_SYNC_FLUSH ile biten bloklar art arda eklendiğinde tek bir geçerli
+    deflate akışı oluşturur (pigz ile aynı yöntem).
+    """
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(block) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+class ZipStreamWriter:
+    """Yerel başlıkları ve dosya verisini sırayla üreten ZIP yazıcısı.
+
+    Boyutlar ve CRC önceden bilinmediği için her girdiden sonra bir veri
+    tanımlayıcısı (data descriptor) yazılır; merkezi dizin en sonda gelir.
+    4 GB sınırını aşan girdiler ve arşivler için ZIP64 alanları kullanılır.
+    force_zip64 tüm girdileri ZIP64 olarak yazar (deneme amaçlı).
+
+    compression: 'auto' girdi başına saklama/sıkıştırma seçer, 'deflate' her
+    şeyi sıkıştırır, 'store' hiçbir şeyi sıkıştırmaz. Sıkıştırılan dosyalar
+    bloklara bölünüp workers iş parçacığında paralel sıkıştırılır; bellekte
+    en fazla 2 * workers blok bulunur.
+    """
+
+    def __init__(self, force_zip64=False, compresslevel=6, compression='auto', workers=None):
+        self.force_zip64 = force_zip64
+        self.compresslevel = compresslevel
+        self.compression = compression
+        self.workers = workers or ARCHIVE_WORKERS
+        self.offset = 0
+        self.entries = []
+
+    @classmethod
+    def resume(cls, zip_path, **kwargs):
+        """Var olan arşivin girdileriyle devam eden yazıcı; yeni girdiler
+        merkezi dizinin başladığı konumdan itibaren eklenir"""
+        writer = cls(**kwargs)
+        with zipfile.ZipFile(zip_path) as zf:
+            for info in zf.infolist():
+                year, month, day, hour, minute, second = info.date_time
+                dos_time = (hour << 11) | (minute << 5) | (second // 2)
+                dos_date = ((year - 1980) << 9) | (month << 5) | day
+                writer.entries.append((info.filename.encode('utf-8'), info.extract_version,
+                                       info.flag_bits, info.compress_type, dos_time, dos_date,
+                                       info.CRC, info.compress_size, info.file_size,
+                                       info.header_offset, info.extract_version >= 45))
+            writer.offset = zf.start_dir
+        return writer
+
+    def _emit(self, data):
+        self.offset += len(data)
+        return data
+
+    @staticmethod
+    def _dos_datetime(timestamp):
+        t = time.localtime(max(timestamp, 315532800))  # ZIP tarihleri 1980'den başlar
+        dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+        dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+        return dos_time, dos_date
+
+    def _read_blocks(self, f):
+        while True:
+            block = f.read(ZIP_READ_SIZE)
+            if not block:
+                break
+            yield block
+
+    def _deflated_blocks(self, f):
+        """Blokları sırayı koruyarak paralel sıkıştır: (ham blok, sıkıştırılmış)"""
+        if self.workers <= 1:
+            compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, -15)
+            for block in self._read_blocks(f):
+                yield block, compressor.compress(block)
+            yield b'', compressor.flush()
+            return
+
+        executor = get_archive_executor()
+        window = []
+        zdict = None
+        for block in self._read_blocks(f):
+            window.append((block, executor.submit(deflate_block, block, zdict, self.compresslevel)))
+            zdict = block[-32768:]
+            if len(window) >= self.workers * 2:
+                block, future = window.pop(0)
+                yield block, future.result()
+        for block, future in window:
+            yield block, future.result()
+        # Boş son blok (BFINAL) akışı kapatır
+        yield b'', zlib.compressobj(self.compresslevel, zlib.DEFLATED, -15).flush()
+
+    def add_file(self, file_path, archive_name):
+        """Bir dosyayı parça parça üret"""
+        stat = os.stat(file_path)
+        if self.compression == 'auto':
+            method = zipfile.ZIP_DEFLATED if worth_compressing(file_path) else zipfile.ZIP_STORED
+        elif self.compression == 'store':
+            method = zipfile.ZIP_STORED
+        else:
+            method = zipfile.ZIP_DEFLATED
+        name = archive_name.encode('utf-8')
+        # Sıkıştırılmış veri nadiren de olsa büyüyebilir, sınırı paylı kontrol et
+        zip64 = self.force_zip64 or stat.st_size * 1.05 > ZIP32_LIMIT
+        version = 45 if zip64 else 20
+        flags = 0x08 | 0x800  # veri tanımlayıcısı + UTF-8 dosya adı
+        dos_time, dos_date = self._dos_datetime(stat.st_mtime)
+        header_offset = self.offset
+
+        extra = struct.pack('<HHQQ', 0x0001, 16, 0, 0) if zip64 else b''
+        size_field = ZIP32_LIMIT if zip64 else 0
+        yield self._emit(struct.pack('<IHHHHHIIIHH', 0x04034b50, version, flags, method,
+                                     dos_time, dos_date, 0, size_field, size_field,
+                                     len(name), len(extra)) + name + extra)
+
+        crc = 0
+        file_size = 0
+        compress_size = 0
+        with open(file_path, 'rb') as f:
+            if method == zipfile.ZIP_STORED:
+                for block in self._read_blocks(f):
+                    crc = zlib.crc32(block, crc)
+                    file_size += len(block)
+                    compress_size += len(block)
+                    yield self._emit(block)
+            else:
+                for block, data in self._deflated_blocks(f):
+                    crc = zlib.crc32(block, crc)
+                    file_size += len(block)
+                    if data:
+                        compress_size += len(data)
+                        yield self._emit(data)
+
+        if zip64:
+            descriptor = struct.pack('<IIQQ', 0x08074b50, crc, compress_size, file_size)
+        else:
+            descriptor = struct.pack('<IIII', 0x08074b50, crc, compress_size, file_size)
+        yield self._emit(descriptor)
+
+        self.entries.append((name, version, flags, method, dos_time, dos_date, crc,
+                             compress_size, file_size, header_offset, zip64))
+
+    def finish(self):
+        """Merkezi dizini ve arşiv sonu kayıtlarını üret"""
+        cd_offset = self.offset
+        for (name, version, flags, method, dos_time, dos_date, crc,
+             compress_size, file_size, header_offset, zip64) in self.entries:
+            zip64 = zip64 or max(compress_size, file_size, header_offset) >= ZIP32_LIMIT
+            if zip64:
+                extra = struct.pack('<HHQQQ', 0x0001, 24, file_size, compress_size, header_offset)
+                compress_size = file_size = header_offset = ZIP32_LIMIT
+                version = 45
+            else:
+                extra = b''
+            yield self._emit(struct.pack('<IHHHHHHIIIHHHHHII', 0x02014b50, version, version, flags,
+                                         method, dos_time, dos_date, crc,
+                                         compress_size, file_size, len(name), len(extra), 0, 0, 0,
+                                         0o100644 << 16, header_offset) + name + extra)
+        cd_size = self.offset - cd_offset
+        count = len(self.entries)
+
+        if self.force_zip64 or count >= 0xFFFF or cd_offset >= ZIP32_LIMIT or cd_size >= ZIP32_LIMIT:
+            zip64_eocd_offset = self.offset
+            yield self._emit(struct.pack('<IQHHIIQQQQ', 0x06064b50, 44, 45, 45, 0, 0,
+                                         count, count, cd_size, cd_offset))
+            yield self._emit(struct.pack('<IIQI', 0x07064b50, 0, zip64_eocd_offset, 1))
+            count = min(count, 0xFFFF)
+            cd_size = min(cd_size, ZIP32_LIMIT)
+            cd_offset = min(cd_offset, ZIP32_LIMIT)
+            if self.force_zip64:
+                count, cd_size, cd_offset = 0xFFFF, ZIP32_LIMIT, ZIP32_LIMIT
+        yield self._emit(struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, count, count,
+                                     cd_size, cd_offset, 0))
+
+
+def stream_zip(files, force_zip64=False, compression='auto', workers=None, writer=None):
+    """(dosya yolu, arşivdeki ad) çiftlerinden ZIP akışı üret"""
+    if writer is None:
+        writer = ZipStreamWriter(force_zip64=force_zip64, compression=compression, workers=workers)
+    for file_path, archive_name in files:
+        try:
+            yield from writer.add_file(file_path, archive_name)
+        except FileNotFoundError:
+            # Liste alındıktan sonra silinen dosya; yerel başlık yazılmadan atlanır
+            continue
+    yield from writer.finish()
+
+
+def stream_tar(files):
+    """(dosya yolu, arşivdeki ad) çiftlerinden sıkıştırmasız TAR akışı üret.
+
+    PAX biçimi UTF-8 adları ve 8 GB üzeri dosyaları destekler.
+    """
+    for file_path, archive_name in files:
+        try:
+            f = open(file_path, 'rb')
+        except FileNotFoundError:
+            continue
+        with f:
+            stat = os.fstat(f.fileno())
+            info = tarfile.TarInfo(archive_name)
+            info.size = stat.st_size
+            info.mtime = int(stat.st_mtime)
+            info.mode = 0o644
+            yield info.tobuf(format=tarfile.PAX_FORMAT, encoding='utf-8')
+
+            remaining = stat.st_size
+            while remaining > 0:
+                block = f.read(min(ZIP_READ_SIZE, remaining))
+                if not block:
+                    # Dosya okunurken kısaldı; başlıktaki boyutu sıfırla doldur
+                    block = b'\0' * min(ZIP_READ_SIZE, remaining)
+                remaining -= len(block)
+                yield block
+            padding = -stat.st_size % tarfile.BLOCKSIZE
+            if padding:
+                yield b'\0' * padding
+    # Arşiv sonu: iki boş blok
+    yield b'\0' * (tarfile.BLOCKSIZE * 2)
+
+
+def archive_download_response(files, filename, archive_format='zip'):
+    """Arşiv akışını dosya indirme yanıtı olarak döndür"""
+    if archive_format == 'tar':
+        response = Response(stream_with_context(stream_tar(files)), mimetype='application/x-tar')
+        filename = filename.rsplit('.', 1)[0] + '.tar'
+    else:
+        response = Response(stream_with_context(stream_zip(files)), mimetype='application/zip')
+    try:
+        filename.encode('ascii')
+        response.headers.set('Content-Disposition', 'attachment', filename=filename)
+    except UnicodeEncodeError:
+        # Türkçe karakterli adlar için RFC 5987 biçimi
+        fallback = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii')
+        response.headers.set('Content-Disposition', 'attachment', filename=fallback,
+                             **{'filename*': f"UTF-8''{quote(filename)}"})
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def photo_archive_files(photos, include_uploader=True, added_files=None):
+    """Fotoğraf kayıtlarını arşiv girdilerine çevir; aynı dosyayı bir kez ekle"""
+    if added_files is None:
+        added_files = set()
+    for photo in photos:
+        # Tekrar yüklenen fotoğraflar aynı dosyayı gösterir, bir kez ekle
+        if photo['filename'] in added_files:
+            continue
+        added_files.add(photo['filename'])
+
+        yield photo_path(photo['filename']), photo_archive_name(photo, include_uploader)
+
+
+def photo_archive_name(photo, include_uploader=True):
+    """Fotoğrafın arşivdeki adı (çekim, yoksa yükleme zamanı ve orijinal adıyla)"""
+    photo_time = datetime.strptime(photo['taken_at'] or photo['upload_time'], '%Y-%m-%d %H:%M:%S')
+    time_str = photo_time.strftime('%Y%m%d_%H%M%S')
+    if include_uploader:
+        return f"{time_str}_{photo['uploader_name']}_{photo['original_filename']}"
+    return f"{time_str}_{photo['original_filename']}"
+
+
+def write_json_atomic(path, data):
+    """JSON dosyasını geçici adla yazıp yerine taşı; okuyan yarım dosya görmez"""
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def archive_paths(uploader_name=None):
+    """Önbellekteki arşivin ve bilgi dosyasının yolları (None: tüm fotoğraflar)"""
+    if uploader_name is None:
+        name = 'all'
+    else:
+        name = 'uploader_' + hashlib.md5(uploader_name.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(ARCHIVE_FOLDER, f"{name}.zip"), os.path.join(ARCHIVE_FOLDER, f"{name}.json")
+
+
+def archive_photos(conn, uploader_name=None):
+    """Arşive girecek fotoğraflar, arşivdeki sırasıyla (çekim zamanına göre)"""
+    if uploader_name is None:
+        return conn.execute(f'SELECT * FROM photos ORDER BY {CAPTURE_EPOCH}, id').fetchall()
+    return conn.execute(f'''
+        SELECT * FROM photos
+        WHERE uploader_name = ?
+        ORDER BY {CAPTURE_EPOCH}, id
+    ''', (uploader_name,)).fetchall()
+
+
+def archive_version(conn, uploader_name=None):
+    """Arşiv içeriğinin sürümü: kayıt eklenince, silinince ya da çekim
+    zamanı okununca (girdi adı değişir) değişir"""
+    if uploader_name is None:
+        row = conn.execute('SELECT COUNT(*), MAX(id), TOTAL(id), COUNT(taken_at) FROM photos').fetchone()
+    else:
+        row = conn.execute('''
+            SELECT COUNT(*), MAX(id), TOTAL(id), COUNT(taken_at) FROM photos WHERE uploader_name = ?
+        ''', (uploader_name,)).fetchone()
+    return f"{row[0]}-{row[1] or 0}-{int(row[2])}-{row[3]}"
+
+
+def read_archive_meta(zip_path, meta_path):
+    """Arşivin bilgi dosyası; yoksa ya da arşivle uyuşmuyorsa None"""
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        size = os.path.getsize(zip_path)
+    except (FileNotFoundError, ValueError):
+        return None
+    return meta if meta.get('size') == size else None
+
+
+def cached_archive(conn, uploader_name=None):
+    """Güncel hazır arşivin yolu; yoksa ya da eskiyse None"""
+    zip_path, meta_path = archive_paths(uploader_name)
+    meta = read_archive_meta(zip_path, meta_path)
+    if meta is None or meta.get('version') != archive_version(conn, uploader_name):
+        return None
+    return zip_path
+
+
+def archive_read_lock(zip_path):
+    """İndirme süresince tutulan paylaşımlı kilit; dosya kapanınca bırakılır.
+    Tutulduğu sürece arşive yerinde ekleme yapılmaz (fcntl yoksa None)."""
+    if fcntl is None:
+        return None
+    lock_file = open(f"{zip_path}.lock", 'a')
+    fcntl.flock(lock_file, fcntl.LOCK_SH)
+    return lock_file
+
+
+def append_archive_in_place(zip_path, writer, files):
+    """Yeni girdileri eski merkezi dizinin yerine yaz, dizini sona yeniden ekle.
+
+    Eski girdilere dokunulmaz; iş yeni fotoğrafların boyutu kadardır. Arşiv
+    o anda indiriliyorsa dosyaya dokunmadan False döner.
+    """
+    if fcntl is None:
+        return False
+    with open(f"{zip_path}.lock", 'a') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        with open(zip_path, 'r+b') as out:
+            out.truncate(writer.offset)
+            out.seek(writer.offset)
+            for chunk in stream_zip(files, writer=writer):
+                out.write(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+    return True
+
+
+def write_archive_copy(zip_path, writer, files):
+    """Arşivi geçici adla yazıp yerine taşı; süren indirmeler eski dosyayı
+    okumaya devam eder. Devam eden yazıcıda eski girdiler olduğu gibi kopyalanır."""
+    tmp_path = f"{zip_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, 'wb') as out:
+            if writer.entries:
+                with open(zip_path, 'rb') as src:
+                    remaining = writer.offset
+                    while remaining > 0:
+                        block = src.read(min(ZIP_READ_SIZE, remaining))
+                        if not block:
+                            raise IOError('Arşiv beklenenden kısa')
+                        out.write(block)
+                        remaining -= len(block)
+            for chunk in stream_zip(files, writer=writer):
+                out.write(chunk)
+        os.replace(tmp_path, zip_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def build_archive(uploader_name=None):
+    """Arşivi güncelle: yalnız yeni fotoğraf eklendiyse yeni girdileri eski
+    arşive yerinde ekle, silinen varsa baştan oluştur.
+
+    Aynı arşivi aynı anda tek süreç günceller (gunicorn işçileri arasında
+    dosya kilidi). Arşiv indirilmekteyse yerinde eklenmez, kopyası yazılır.
+    Bilgi dosyası arşive dokunulmadan önce silinir ve arşiv hazır olunca
+    yazılır; ikisi uyuşmazken hazır arşiv kullanılmaz.
+    """
+    zip_path, meta_path = archive_paths(uploader_name)
+    with file_lock(f"{zip_path}.build.lock"):
+        conn = connect_db()
+        try:
+            photos = archive_photos(conn, uploader_name)
+        finally:
+            conn.close()
+
+        if not photos:
+            for path in (meta_path, zip_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            return 'removed'
+
+        ids = [photo['id'] for photo in photos]
+        taken_count = sum(1 for photo in photos if photo['taken_at'])
+        version = f"{len(ids)}-{max(ids)}-{sum(ids)}-{taken_count}"
+
+        meta = read_archive_meta(zip_path, meta_path)
+        if meta and meta['version'] == version:
+            return 'current'
+
+        # Eski arşivdeki fotoğrafların hepsi hâlâ duruyor ve adları (çekim
+        # zamanları) değişmediyse sonuna eklenebilir
+        old_photos = [photo for photo in photos if photo['id'] <= meta['max_id']] if meta else []
+        appendable = (meta is not None and
+                      len(old_photos) == meta['count'] and
+                      sum(1 for photo in old_photos if photo['taken_at']) == meta.get('taken_count'))
+        if appendable:
+            try:
+                writer = ZipStreamWriter.resume(zip_path)
+            except zipfile.BadZipFile:
+                appendable = False
+        if appendable:
+            new_photos = [photo for photo in photos if photo['id'] > meta['max_id']]
+            added_files = set(meta['filenames'])
+        else:
+            writer = ZipStreamWriter()
+            new_photos = photos
+            added_files = set()
+        files = photo_archive_files(new_photos, include_uploader=uploader_name is None,
+                                    added_files=added_files)
+
+        # Yarım kalan güncelleme bilgi dosyası olmadan kalır, bir sonrakinde baştan oluşturulur
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        if not (appendable and append_archive_in_place(zip_path, writer, files)):
+            write_archive_copy(zip_path, writer, files)
+
+        meta = {'version': version, 'count': len(ids), 'max_id': max(ids), 'taken_count': taken_count,
+                'filenames': sorted(added_files), 'size': os.path.getsize(zip_path)}
+        write_json_atomic(meta_path, meta)
+        return 'appended' if appendable else 'rebuilt'
+
+
+class ArchiveBuilder:
+    """Değişen arşivleri arka planda güncelleyen iş parçacığı
+
+    Yüklemeler tüm fotoğraflar arşivini ve yükleyenin arşivini kirli
+    işaretler; son değişiklikten ARCHIVE_BUILD_DELAY saniye sonra yalnız
+    kirli arşivler güncellenir. Böylece yükleme dalgası tek güncellemede toplanır.
+    Yüklemeler hiç durmazsa arşiv ilk değişiklikten ARCHIVE_BUILD_MAX_WAIT
+    saniye sonra yine de güncellenir.
+    """
+
+    def __init__(self, delay=ARCHIVE_BUILD_DELAY, max_wait=ARCHIVE_BUILD_MAX_WAIT):
+        self.delay = delay
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._pid = None
+        self._dirty = {}  # {yükleyen ya da None: (ilk değişiklik, son değişiklik)}
+
+    def mark_changed(self, uploader_name=None):
+        """Yükleyenin arşivini ve tüm fotoğraflar arşivini güncellenecek işaretle"""
+        if not ARCHIVES_ENABLED:
+            return
+        with self._lock:
+            self._ensure_started()
+            now = time.monotonic()
+            for key in {None, uploader_name}:
+                self._dirty[key] = (self._dirty.get(key, (now, now))[0], now)
+            self._changed.notify()
+
+    def request_build(self, uploader_name=None):
+        """Eksik arşivi beklemeden kuyruğa al (indirme isteğinde önbellek yoksa)"""
+        if not ARCHIVES_ENABLED:
+            return
+        with self._lock:
+            self._ensure_started()
+            ready_at = time.monotonic() - self.delay
+            self._dirty[uploader_name] = (ready_at, ready_at)
+            self._changed.notify()
+
+    def _wait_time(self, now, first_changed, last_changed):
+        """Arşiv güncellenene kadar kalan süre (0 ya da eksi: hazır)"""
+        return min(self.delay - (now - last_changed), self.max_wait - (now - first_changed))
+
+    def _ensure_started(self):
+        # Fork sonrası iş parçacığı alt süreçte yoktur, yeniden başlat
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='archive-builder', daemon=True).start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while True:
+                    now = time.monotonic()
+                    ready = [key for key, changes in self._dirty.items() if self._wait_time(now, *changes) <= 0]
+                    if ready:
+                        break
+                    timeout = (min(self._wait_time(now, *changes) for changes in self._dirty.values())
+                               if self._dirty else None)
+                    self._changed.wait(timeout)
+                for key in ready:
+                    del self._dirty[key]
+
+            for uploader_name in ready:
+                try:
+                    build_archive(uploader_name)
+                except Exception as e:
+                    print(f"Arşiv güncellenemedi ({uploader_name or 'tümü'}): {e}")
+
+
+archive_builder = ArchiveBuilder()
+
+
+def benchmark_archive(size_gb=5.0, photo_mb=4.0, compressible_percent=10, workers=None):
+    """Sentetik bir düğün arşivini farklı modlarla akıtıp hızları karşılaştır"""
+    import tempfile
+
+    workdir = tempfile.mkdtemp(prefix='dugun_bench_')
+    photo_size = int(photo_mb * 1024 * 1024)
+    count = max(1, int(size_gb * 1024 ** 3 // photo_size))
+    print(f"⏱️ {count} dosya x {photo_mb} MB hazırlanıyor (%{compressible_percent} sıkıştırılabilir)")
+
+    # JPEG gibi sıkıştırılamaz veri ve BMP/RAW gibi sıkıştırılabilir veri
+    random_data = os.urandom(photo_size)
+    words = [os.urandom(4).hex().encode('ascii') for _ in range(512)]
+    compressible_data = b' '.join(words[(n * 7919) % len(words)] for n in range(photo_size // 9 + 1))[:photo_size]
+
+    files = []
+    try:
+        for n in range(count):
+            if compressible_percent and n % max(1, round(100 / compressible_percent)) == 0:
+                file_path = os.path.join(workdir, f"raw_{n}.bmp")
+                data = compressible_data
+            else:
+                file_path = os.path.join(workdir, f"photo_{n}.jpg")
+                data = random_data
+            with open(file_path, 'wb') as f:
+                f.write(n.to_bytes(8, 'little') + data[8:])
+            files.append((file_path, os.path.basename(file_path)))
+        total_mb = count * photo_size / 1024 / 1024
+
+        modes = [
+            ('ZIP, hepsi deflate, tek iş parçacığı', lambda: stream_zip(files, compression='deflate', workers=1)),
+            (f'ZIP, otomatik + {workers or ARCHIVE_WORKERS} iş parçacığı',
+             lambda: stream_zip(files, compression='auto', workers=workers)),
+            ('TAR, sıkıştırmasız', lambda: stream_tar(files)),
+        ]
+        for label, stream in modes:
+            started = time.perf_counter()
+            output_size = sum(len(chunk) for chunk in stream())
+            elapsed = time.perf_counter() - started
+            print(f"  {label:<40} {total_mb / elapsed:8.0f} MB/sn  "
+                  f"({output_size / 1024 / 1024:.0f} MB çıktı, {elapsed:.1f}sn)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def send_cached_archive(conn, uploader_name, filename, archive_format):
+    """Hazır ZIP güncelse Range destekli dosya olarak gönder; değilse
+    arka planda oluşturulmasını iste ve None döndür"""
+    if archive_format != 'zip':
+        return None
+    # Gönderim bitene kadar arşive yerinde ekleme yapılmasın
+    zip_path = archive_paths(uploader_name)[0]
+    read_lock = archive_read_lock(zip_path)
+    try:
+        if cached_archive(conn, uploader_name) is None:
+            archive_builder.request_build(uploader_name)
+            response = None
+        else:
+            response = send_file(zip_path, as_attachment=True, download_name=filename,
+                                 mimetype='application/zip', conditional=True)
+    except BaseException:
+        if read_lock is not None:
+            read_lock.close()
+        raise
+    if read_lock is not None:
+        if response is None:
+            read_lock.close()
+        else:
+            response.call_on_close(read_lock.close)
+    return response
+
+
 @app.route('/download_all')
 def download_all():
     try:
+        today = datetime.now().strftime('%Y%m%d')
+        filename = f"BYT_DIGITAL_Dugun_Fotograflari_{today}.zip"
+        archive_format = request.args.get('format', 'zip')
+
+        conn = get_db_connection()
+        cached_response = send_cached_archive(conn, None, filename, archive_format)
+        if cached_response is not None:
+            conn.close()
+            return cached_response
+        photos = archive_photos(conn)
+        conn.close()
+
+        if not photos:
+            flash('İndirilecek fotoğraf bulunamadı.')
+            return redirect(url_for('admin_panel'))
+
+        # Hazır arşiv yoksa akış halinde oluştur; fotoğraf listesi bellekte,
+        # dosyalar ise istemciye gönderilirken okunur
+        return archive_download_response(photo_archive_files(photos), filename, archive_format)
+
+    except Exception as e:
+        flash(f'ZIP oluşturma hatası: {str(e)}')
+        return redirect(url_for('admin_panel'))
+
+
+# Belirli bir yükleyenin fotoğraflarını indirme
+@app.route('/download_uploader/<uploader_name>')
+def download_uploader_photos(uploader_name):
+    try:
+        today = datetime.now().strftime('%Y%m%d')
+        safe_uploader_name = uploader_name.replace(' ', '_').replace('/', '_')
+        filename = f"BYT_DIGITAL_{safe_uploader_name}_{today}.zip"
+        archive_format = request.args.get('format', 'zip')
+
         conn = get_db_connection()
-        photos = conn.execute('SELECT * FROM photos ORDER BY upload_time').fetchall()
+        cached_response = send_cached_archive(conn, uploader_name, filename, archive_format)
+        if cached_response is not None:
+            conn.close()
+            return cached_response
+        photos = archive_photos(conn, uploader_name)
         conn.close()
 
         if not photos:
             flash('İndirilecek fotoğraf bulunamadı.')
             return redirect(url_for('admin_panel'))
 
-        # ZIP dosyası oluştur
-        memory_file = io.BytesIO()
+        return archive_download_response(photo_archive_files(photos, include_uploader=False), filename,
+                                         archive_format)
 
-        with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for photo in photos:
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], photo['filename'])
-                if os.path.exists(file_path):
-                    # Dosyayı ZIP'e ekle (orijinal adıyla)
-                    upload_time = datetime.strptime(photo['upload_time'], '%Y-%m-%d %H:%M:%S')
-                    time_str = upload_time.strftime('%Y%m%d_%H%M%S')
-                    archive_name = f"{time_str}_{photo['uploader_name']}_{photo['original_filename']}"
-                    zf.write(file_path, archive_name)
+    except Exception as e:
+        flash(f'ZIP oluşturma hatası: {str(e)}')
+        return redirect(url_for('admin_panel'))
 
-        memory_file.seek(0)
+
+# face_data'daki bir kişinin göründüğü fotoğrafları indirme
+@app.route('/download_person/<person>')
+def download_person_photos(person):
+    try:
+        error = face_support_error()
+        if error:
+            flash(error)
+            return redirect(url_for('admin_panel'))
 
         today = datetime.now().strftime('%Y%m%d')
-        filename = f"BYT_DIGITAL_Dugun_Fotograflari_{today}.zip"
+        safe_person = person.replace(' ', '_').replace('/', '_')
+        filename = f"BYT_DIGITAL_Kisi_{safe_person}_{today}.zip"
+        archive_format = request.args.get('format', 'zip')
+
+        conn = get_db_connection()
+        photos = person_photos(conn, person)
+        conn.close()
+
+        if not photos:
+            flash('İndirilecek fotoğraf bulunamadı.')
+            return redirect(url_for('admin_panel'))
 
-        return send_file(memory_file,
-                         as_attachment=True,
-                         download_name=filename,
-                         mimetype='application/zip')
+        # Kişiye göre arşivler her seferinde akış halinde oluşturulur
+        return archive_download_response(photo_archive_files(photos), filename, archive_format)
 
     except Exception as e:
         flash(f'ZIP oluşturma hatası: {str(e)}')
         return redirect(url_for('admin_panel'))
 
 
-# Belirli bir yükleyenin fotoğraflarını indirme
-@app.route('/download_uploader/<uploader_name>')
-def download_uploader_photos(uploader_name):
+def plan_export_volumes(photos, max_size, group_by='time'):
+    """Fotoğrafları sırayla en fazla max_size baytlık ciltlere böl.
+
+    group_by='uploader' iken fotoğraflar yükleyene göre sıralı gelmelidir;
+    bir yükleyenin fotoğrafları tek cilde sığıyorsa bölünmez. max_size'dan
+    büyük tek dosya kendi cildine konur.
+    """
+    entries = []
+    added_files = set()
+    for photo in photos:
+        if photo['filename'] in added_files:
+            continue
+        added_files.add(photo['filename'])
+        archive_name = photo_archive_name(photo, include_uploader=True)
+        # Yerel başlık, veri tanımlayıcısı ve merkezi dizin kaydı için pay
+        entry_size = photo['file_size'] + 2 * len(archive_name.encode('utf-8')) + 160
+        entries.append((photo, archive_name, entry_size))
+
+    if group_by == 'uploader':
+        groups = [list(group) for _, group in itertools.groupby(entries, key=lambda e: e[0]['uploader_name'])]
+    else:
+        groups = [entries]
+
+    end_records_size = 22 + 56 + 20
+    volumes = []
+    current = []
+    current_size = end_records_size
+
+    for group in groups:
+        group_size = sum(entry_size for _, _, entry_size in group)
+        if current and current_size + group_size > max_size and group_size + end_records_size <= max_size:
+            volumes.append(current)
+            current, current_size = [], end_records_size
+        for entry in group:
+            if current and current_size + entry[2] > max_size:
+                volumes.append(current)
+                current, current_size = [], end_records_size
+            current.append(entry)
+            current_size += entry[2]
+    if current:
+        volumes.append(current)
+    return volumes
+
+
+def build_export_volume(zip_path, files):
+    """İşlem havuzunda bir cildi yaz; (boyut, sha256) döndür"""
+    digest = hashlib.sha256()
+    size = 0
+    tmp_path = f"{zip_path}.tmp"
+    with open(tmp_path, 'wb') as out:
+        # Ciltler ayrı süreçlerde paralel yazıldığından cilt içinde tek iş parçacığı
+        for chunk in stream_zip(files, workers=1):
+            out.write(chunk)
+            digest.update(chunk)
+            size += len(chunk)
+    os.replace(tmp_path, zip_path)
+    return size, digest.hexdigest()
+
+
+def export_manifest_path(export_id):
+    return os.path.join(EXPORT_FOLDER, export_id, 'manifest.json')
+
+
+def start_export(max_size, group_by='time'):
+    """Dışa aktarmayı planla, bildirimi yaz ve ciltleri arka planda üret; kimliği döndür"""
+    conn = connect_db()
     try:
-        conn = get_db_connection()
-        photos = conn.execute('''
-            SELECT * FROM photos 
-            WHERE uploader_name = ? OR (uploader_name IS NULL AND ? = 'Anonim')
-            ORDER BY upload_time
-        ''', (uploader_name if uploader_name != 'Anonim' else None, uploader_name)).fetchall()
+        if group_by == 'uploader':
+            photos = conn.execute(f'''
+                SELECT * FROM photos ORDER BY uploader_name, {CAPTURE_EPOCH}, id
+            ''').fetchall()
+        else:
+            photos = conn.execute(f'SELECT * FROM photos ORDER BY {CAPTURE_EPOCH}, id').fetchall()
+    finally:
         conn.close()
 
-        if not photos:
-            flash('İndirilecek fotoğraf bulunamadı.')
-            return redirect(url_for('admin_panel'))
+    if not photos:
+        return None
+
+    volumes = plan_export_volumes(photos, max_size, group_by)
+    export_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+    os.makedirs(os.path.join(EXPORT_FOLDER, export_id))
+
+    manifest = {
+        'id': export_id,
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'group_by': group_by,
+        'max_size': max_size,
+        'status': 'building',
+        'photo_count': sum(len(volume) for volume in volumes),
+        'volumes': []
+    }
+    jobs = []
+    for number, volume in enumerate(volumes, 1):
+        filename = f"BYT_DIGITAL_Dugun_Fotograflari_{export_id}_{number:03d}_{len(volumes):03d}.zip"
+        photos_in_volume = [photo for photo, _, _ in volume]
+        manifest['volumes'].append({
+            'number': number,
+            'filename': filename,
+            'photo_count': len(volume),
+            'planned_size': sum(entry_size for _, _, entry_size in volume),
+            'first_upload': photos_in_volume[0]['upload_time'],
+            'last_upload': photos_in_volume[-1]['upload_time'],
+            'uploaders': sorted({photo['uploader_name'] for photo in photos_in_volume}),
+            'status': 'pending'
+        })
+        files = [(photo_path(photo['filename']), archive_name) for photo, archive_name, _ in volume]
+        jobs.append((os.path.join(EXPORT_FOLDER, export_id, filename), files))
+    write_json_atomic(export_manifest_path(export_id), manifest)
+
+    def run():
+        workers = max(1, min(EXPORT_WORKERS, len(jobs)))
+        # Çok iş parçacıklı sunucudan fork yerine spawn ile süreç aç
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = {executor.submit(build_export_volume, zip_path, files): index
+                       for index, (zip_path, files) in enumerate(jobs)}
+            for future in as_completed(futures):
+                volume = manifest['volumes'][futures[future]]
+                try:
+                    volume['size'], volume['sha256'] = future.result()
+                    volume['status'] = 'ready'
+                except Exception as e:
+                    volume['status'] = 'failed'
+                    volume['error'] = str(e)
+                # Bildirimi yalnız bu iş parçacığı yazar
+                write_json_atomic(export_manifest_path(export_id), manifest)
+        failed = any(volume['status'] == 'failed' for volume in manifest['volumes'])
+        manifest['status'] = 'failed' if failed else 'ready'
+        write_json_atomic(export_manifest_path(export_id), manifest)
+
+    threading.Thread(target=run, name=f'export-{export_id}', daemon=True).start()
+    return export_id
+
+
+def list_exports():
+    """Dışa aktarmaların bildirimleri, yeniden eskiye"""
+    exports = []
+    for export_id in sorted(os.listdir(EXPORT_FOLDER), reverse=True):
+        try:
+            with open(export_manifest_path(export_id), encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, NotADirectoryError, ValueError):
+            continue
+        manifest['ready_count'] = sum(1 for volume in manifest['volumes'] if volume['status'] == 'ready')
+        exports.append(manifest)
+    return exports
+
+
+@app.route('/admin/exports', methods=['POST'])
+def create_export():
+    try:
+        max_size_mb = int(request.form.get('max_size_mb', EXPORT_DEFAULT_VOLUME_MB))
+        group_by = request.form.get('group_by', 'time')
+        if max_size_mb < 1 or group_by not in ('time', 'uploader'):
+            raise ValueError('Geçersiz cilt boyutu ya da gruplama')
+
+        export_id = start_export(max_size_mb * 1024 * 1024, group_by)
+        if export_id is None:
+            flash('Dışa aktarılacak fotoğraf bulunamadı.')
+        else:
+            flash(f'Dışa aktarma başlatıldı: {export_id}', 'success')
 
-        # ZIP dosyası oluştur
-        memory_file = io.BytesIO()
+    except Exception as e:
+        flash(f'Dışa aktarma hatası: {str(e)}', 'error')
 
-        with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for photo in photos:
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], photo['filename'])
-                if os.path.exists(file_path):
-                    # Dosyayı ZIP'e ekle (orijinal adıyla)
-                    upload_time = datetime.strptime(photo['upload_time'], '%Y-%m-%d %H:%M:%S')
-                    time_str = upload_time.strftime('%Y%m%d_%H%M%S')
-                    archive_name = f"{time_str}_{photo['original_filename']}"
-                    zf.write(file_path, archive_name)
+    return redirect(url_for('admin_panel'))
 
-        memory_file.seek(0)
 
-        today = datetime.now().strftime('%Y%m%d')
-        safe_uploader_name = uploader_name.replace(' ', '_').replace('/', '_')
-        filename = f"BYT_DIGITAL_{safe_uploader_name}_{today}.zip"
+@app.route('/admin/exports/<export_id>/<path:filename>')
+def download_export_file(export_id, filename):
+    if secure_filename(export_id) != export_id:
+        return jsonify({'error': 'Dışa aktarma bulunamadı'}), 404
+    return send_from_directory(os.path.join(EXPORT_FOLDER, export_id), filename, as_attachment=True)
 
-        return send_file(memory_file,
-                         as_attachment=True,
-                         download_name=filename,
-                         mimetype='application/zip')
 
-    except Exception as e:
-        flash(f'ZIP oluşturma hatası: {str(e)}')
-        return redirect(url_for('admin_panel'))
+@app.route('/admin/exports/<export_id>/delete', methods=['POST'])
+def delete_export(export_id):
+    if secure_filename(export_id) == export_id:
+        shutil.rmtree(os.path.join(EXPORT_FOLDER, export_id), ignore_errors=True)
+        flash('Dışa aktarma silindi.', 'success')
+    return redirect(url_for('admin_panel'))
 
 
-@app.route('/qr')
-def generate_qr():
-    # QR kod için URL (gerçek domain ile değiştirin)
-    url = request.url_root
+# QR kodları URL, boyut, hata düzeltme seviyesi ve biçime göre bellekte tutulur
+QR_CACHE_SIZE = 64
+QR_ERROR_CORRECTION = {
+    'L': qrcode.constants.ERROR_CORRECT_L,
+    'M': qrcode.constants.ERROR_CORRECT_M,
+    'Q': qrcode.constants.ERROR_CORRECT_Q,
+    'H': qrcode.constants.ERROR_CORRECT_H,
+}
+QR_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
 
+
+@functools.lru_cache(maxsize=QR_CACHE_SIZE)
+def render_qr(url, box_size, error_correction, image_format):
+    """QR kodu oluştur; (içerik, ETag) döndür"""
     qr = qrcode.QRCode(
         version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
+        error_correction=QR_ERROR_CORRECTION[error_correction],
+        box_size=box_size,
         border=4,
     )
     qr.add_data(url)
     qr.make(fit=True)
 
-    img = qr.make_image(fill_color="black", back_color="white")
-
-    # QR kodu kaydet
-    qr_path = 'static/qr_code.png'
-    img.save(qr_path)
+    if image_format == 'svg':
+        img = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+    else:
+        img = qr.make_image(fill_color="black", back_color="white")
 
-    return send_file(qr_path, as_attachment=True, download_name='dugun_qr_kod.png')
+    buffer = io.BytesIO()
+    img.save(buffer)
+    body = buffer.getvalue()
+    return body, hashlib.sha256(body).hexdigest()[:32]
 
 
-@app.route('/stats')
-def get_stats():
-    conn = get_db_connection()
-
-    total_photos = conn.execute('SELECT COUNT(*) as count FROM photos').fetchone()['count']
+@app.route('/qr')
+def generate_qr():
+    # QR kod için URL (gerçek domain ile değiştirin)
+    url = request.url_root
 
-    recent_uploads = conn.execute('''
-        SELECT COUNT(*) as count FROM photos 
-        WHERE upload_time > datetime('now', '-1 hour')
-    ''').fetchone()['count']
+    # ?size=kutu piksel boyutu, ?ec=L/M/Q/H, ?format=png/svg
+    try:
+        box_size = int(request.args.get('size', 10))
+    except ValueError:
+        box_size = 0
+    error_correction = request.args.get('ec', 'L').upper()
+    image_format = request.args.get('format', 'png').lower()
+    if not 1 <= box_size <= 50 or error_correction not in QR_ERROR_CORRECTION or image_format not in QR_FORMATS:
+        return jsonify({'error': 'Geçersiz QR parametresi'}), 400
+
+    body, etag = render_qr(url, box_size, error_correction, image_format)
+
+    response = app.response_class(body, mimetype=QR_FORMATS[image_format])
+    response.headers.set('Content-Disposition', 'attachment', filename=f'dugun_qr_kod.{image_format}')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response.make_conditional(request)
+
+
+class StatsHub:
+    """/stats ve /stats/stream için süreç içi sayaçlar
+
+    Yükleme yolu record_upload ile sayaçları anında günceller; tüm
+    izleyiciler aynı özeti paylaşır. Diğer süreçlerdeki (ör. gunicorn
+    işçileri) yüklemeler ve silmeler için sayaçlar STATS_RESYNC_INTERVAL
+    saniyede bir veritabanından yeniden okunur.
+
+    Her okumada görülen en büyük fotoğraf kimliği saklanır; record_upload
+    yalnız bundan büyük kimlikleri sayar. Kayıttan sonra yapılan bir okuma
+    o kayıtları zaten içerdiğinden aynı yükleme iki kez sayılmaz.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._pid = None
+        self._counts = {}
+        self._recent = deque()  # (yükleme zamanı, adet)
+        self._last_photo_id = 0  # Son okumanın içerdiği en büyük fotoğraf kimliği
+        self._deltas = deque(maxlen=64)  # (sürüm, değişen alanlar JSON)
+        self.version = 0
+        self.snapshot = None
+
+    def _ensure_started(self):
+        # Kilit tutulurken çağrılır. Fork sonrası iş parçacığı alt süreçte yoktur
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._counts, self._recent, self._last_photo_id = self._read_db()
+            threading.Thread(target=self._run, name='stats-hub', daemon=True).start()
+
+    @staticmethod
+    def _read_db():
+        conn = connect_db()
+        try:
+            # Üç sorgu aynı okuma işleminde çalışır ki sayaçlar ve kimlik birbirini tutsun
+            conn.execute('BEGIN')
+            last_photo_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM photos').fetchone()[0]
+            counts = {row['uploader_name']: row['photo_count']
+                      for row in conn.execute('SELECT uploader_name, photo_count FROM uploaders')}
+            recent = deque((row['upload_epoch'], 1) for row in conn.execute('''
+                SELECT upload_epoch FROM photos WHERE upload_epoch > ? ORDER BY upload_epoch
+            ''', (int(time.time()) - STATS_RECENT_WINDOW,)))
+            conn.rollback()
+        finally:
+            conn.close()
+        return counts, recent, last_photo_id
+
+    def _publish(self):
+        # Kilit tutulurken çağrılır; özet değiştiyse yeni sürüm yayınlanır
+        now = int(time.time())
+        while self._recent and self._recent[0][0] <= now - STATS_RECENT_WINDOW:
+            self._recent.popleft()
+
+        top = sorted(self._counts.items(), key=lambda item: (-item[1], item[0]))[:5]
+        snapshot = {
+            'total_photos': sum(self._counts.values()),
+            'recent_uploads': sum(count for _, count in self._recent),
+            'top_uploaders': [{'uploader_name': name, 'count': count} for name, count in top]
+        }
+        if snapshot == self.snapshot:
+            return
+
+        delta = {key: value for key, value in snapshot.items()
+                 if self.snapshot is None or self.snapshot[key] != value}
+        self.version += 1
+        self.snapshot = snapshot
+        self._deltas.append((self.version, json.dumps(delta, ensure_ascii=False)))
+        self._changed.notify_all()
+
+    def get_snapshot(self):
+        """(sürüm, özet) döndür"""
+        with self._lock:
+            self._ensure_started()
+            self._publish()
+            return self.version, self.snapshot
+
+    def record_upload(self, uploader_name, photo_ids):
+        """Yükleme kaydedildikten sonra sayaçları güncelle ve izleyicilere bildir.
+
+        Son veritabanı okumasında zaten bulunan kayıtlar atlanır.
+        """
+        with self._lock:
+            self._ensure_started()
+            count = sum(1 for photo_id in photo_ids if photo_id > self._last_photo_id)
+            if not count:
+                return
+            self._counts[uploader_name] = self._counts.get(uploader_name, 0) + count
+            self._recent.append((int(time.time()), count))
+            self._publish()
+
+    def wait_for_events(self, last_version, timeout):
+        """last_version'dan sonraki olayları bekle: [(sürüm, olay adı, JSON)].
+
+        Kaçırılan değişiklikler elde varsa sırayla 'delta', yoksa tek bir
+        'snapshot' döner. Zaman aşımında boş liste döner.
+        """
+        with self._lock:
+            self._ensure_started()
+            if self.version == last_version:
+                self._changed.wait(timeout)
+            if self.version == last_version:
+                return []
+            missed = [(version, data) for version, data in self._deltas if version > last_version]
+            if missed and missed[0][0] == last_version + 1:
+                return [(version, 'delta', data) for version, data in missed]
+            return [(self.version, 'snapshot', json.dumps(self.snapshot, ensure_ascii=False))]
+
+    def _run(self):
+        while True:
+            time.sleep(STATS_RESYNC_INTERVAL)
+            try:
+                counts, recent, last_photo_id = self._read_db()
+            except sqlite3.Error as e:
+                print(f"İstatistikler okunamadı: {e}")
+                continue
+            with self._lock:
+                self._counts, self._recent, self._last_photo_id = counts, recent, last_photo_id
+                self._publish()
+
+
+stats_hub = StatsHub()
 
-    uploaders = conn.execute('''
-        SELECT uploader_name, COUNT(*) as count 
-        FROM photos 
-        GROUP BY uploader_name 
-        ORDER BY count DESC
-    ''').fetchall()
 
-    conn.close()
+@app.route('/stats')
+def get_stats():
+    _, snapshot = stats_hub.get_snapshot()
+    return jsonify(snapshot)
+
+
+# Geliştirme sunucusu her isteğe yeni iş parçacığı açtığından varsayılan olarak sınır yoktur
+stats_stream_slots = None
+
+
+def set_stats_stream_limit(limit):
+    """Bu süreçte aynı anda açık kalabilecek canlı istatistik akışı sayısını ayarla (None: sınırsız)"""
+    global stats_stream_slots
+    stats_stream_slots = threading.BoundedSemaphore(limit) if limit else None
+
+
+@app.route('/stats/stream')
+def stats_stream():
+    """İstatistikleri Server-Sent Events ile gönder: önce 'snapshot', sonra
+    her değişiklikte yalnız değişen alanları içeren 'delta' olayı.
+
+    Bu işçideki akış sınırı doluysa 503 döner (istemci /stats ile sürdürür).
+    Akış STATS_STREAM_MAX_AGE saniye sonra kapanır; tarayıcı yeniden
+    bağlanırken iş parçacığı diğer isteklere de sıra verir.
+    """
+    slots = stats_stream_slots
+    if slots is not None and not slots.acquire(blocking=False):
+        response = jsonify({'error': 'Canlı istatistik bağlantısı sınırı dolu.'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(STATS_STREAM_RETRY_AFTER)
+        return response
+
+    def events():
+        closes_at = time.monotonic() + STATS_STREAM_MAX_AGE
+        version, snapshot = stats_hub.get_snapshot()
+        yield (f"retry: 3000\nid: {version}\nevent: snapshot\n"
+               f"data: {json.dumps(snapshot, ensure_ascii=False)}\n\n")
+        while True:
+            remaining = closes_at - time.monotonic()
+            if remaining <= 0:
+                return
+            pending = stats_hub.wait_for_events(version, min(STATS_KEEPALIVE_INTERVAL, remaining))
+            if not pending:
+                # Bağlantıyı açık tutan ve kopan istemciyi fark ettiren yorum satırı
+                yield ': keepalive\n\n'
+                continue
+            for version, event, data in pending:
+                yield f"id: {version}\nevent: {event}\ndata: {data}\n\n"
 
-    return jsonify({
-        'total_photos': total_photos,
-        'recent_uploads': recent_uploads,
-        'top_uploaders': [dict(uploader) for uploader in uploaders[:5]]
-    })
+    try:
+        response = Response(events(), mimetype='text/event-stream')
+    except BaseException:
+        if slots is not None:
+            slots.release()
+        raise
+    # İstemci koptuğunda ya da akış bittiğinde yer açılır
+    if slots is not None:
+        response.call_on_close(slots.release)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@app.route('/metrics')
+def get_metrics():
+    """Yükleme kabul denetimi ve yazıcı kuyruğu ölçümleri (JSON ya da ?format=prometheus)
+
+    Değerler tüm canlı işçilerin toplamıdır; hangi işçi yanıtlarsa yanıtlasın aynıdır.
+    """
+    metrics_publisher.start()
+    conn = get_db_connection()
+    try:
+        metrics = collect_metrics(conn)
+    finally:
+        conn.close()
 
+    if request.args.get('format') != 'prometheus':
+        return jsonify(metrics)
+
+    admission = metrics['uploads']
+    writer_queue = metrics['photo_writer_queue']
+    lines = [
+        f"workers {metrics['workers']}",
+        f"upload_active {admission['active']}",
+        f"upload_inflight_bytes {admission['inflight_bytes']}",
+        f"upload_waiting {admission['waiting']}",
+        f"upload_admitted_total {admission['admitted_total']}",
+    ]
+    for reason, count in admission['rejected_total'].items():
+        lines.append(f'upload_rejected_total{{reason="{reason}"}} {count}')
+    lines.append(f"photo_writer_queue {writer_queue}")
+    return app.response_class('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
 
-# HTML Templates oluştur
-def create_templates():
-    # Site ayarlarını al
-    settings = get_site_settings()
 
+def build_upload_html(settings):
+    """Misafir yükleme sayfasını verilen ayarlarla oluştur"""
     # Upload template - El yazısı fontlarıyla optimize edilmiş
-    upload_html = f'''<!DOCTYPE html>
+    return f'''<!DOCTYPE html>
 <html lang="tr">
 <head>
     <meta charset="UTF-8">
@@ -873,6 +4750,7 @@ def create_templates():
             font-weight: 600;
             font-size: 0.95rem;
             font-family: 'Kalam', cursive;
+            white-space: pre-line;
         }}
 
         .success-message {{
@@ -1117,6 +4995,143 @@ def create_templates():
             `;
         }}
 
+        // Ağ kesintisinde yeniden deneme ayarları
+        const MAX_RETRIES = 8;
+        // Sunucu yoğunken (503) yeniden deneme sınırı
+        const MAX_BUSY_RETRIES = 40;
+
+        function sleep(ms) {{
+            return new Promise(resolve => setTimeout(resolve, ms));
+        }}
+
+        function sessionKey(file, uploaderName) {{
+            return 'upload:' + uploaderName + ':' + file.name + ':' + file.size + ':' + file.lastModified;
+        }}
+
+        async function requestJSON(url, options) {{
+            const response = await fetch(url, options);
+            let result = {{}};
+            try {{
+                result = await response.json();
+            }} catch (error) {{}}
+            return {{ response, result }};
+        }}
+
+        async function openSession(file, uploaderName) {{
+            // Sayfa yenilense bile yarım kalan yüklemeye devam et
+            const key = sessionKey(file, uploaderName);
+            const savedId = localStorage.getItem(key);
+            if (savedId) {{
+                const {{ response, result }} = await requestJSON('/upload/sessions/' + savedId, {{ method: 'GET' }});
+                if (response.ok) {{
+                    return result;
+                }}
+                localStorage.removeItem(key);
+            }}
+
+            const {{ response, result }} = await requestJSON('/upload/sessions', {{
+                method: 'POST',
+                headers: {{ 'Content-Type': 'application/json' }},
+                body: JSON.stringify({{
+                    filename: file.name,
+                    size: file.size,
+                    uploader_name: uploaderName
+                }})
+            }});
+            if (!response.ok) {{
+                throw new Error(result.error || 'Yükleme başlatılamadı.');
+            }}
+            localStorage.setItem(key, result.session_id);
+            return result;
+        }}
+
+        async function uploadFileResumable(file, uploaderName, onProgress) {{
+            const session = await openSession(file, uploaderName);
+            const chunkSize = session.chunk_size;
+            let offset = session.offset;
+            let retries = 0;
+            let busyRetries = 0;
+
+            while (offset < file.size) {{
+                const chunk = file.slice(offset, Math.min(offset + chunkSize, file.size));
+                try {{
+                    const {{ response, result }} = await requestJSON(
+                        '/upload/sessions/' + session.session_id + '?offset=' + offset,
+                        {{ method: 'PUT', body: chunk }}
+                    );
+                    if (response.ok || response.status === 409) {{
+                        // 409: sunucu farklı bir konumda, oradan devam et
+                        offset = result.offset;
+                        retries = 0;
+                        busyRetries = 0;
+                        onProgress(offset);
+                        continue;
+                    }}
+                    if (response.status === 503) {{
+                        // Sunucu yoğun: Retry-After'dan başlayıp artan, rastgele paylı bekleme.
+                        // Rastgele pay, aynı anda reddedilen telefonların birlikte dönmesini önler
+                        busyRetries += 1;
+                        if (busyRetries > MAX_BUSY_RETRIES) {{
+                            throw new Error('Sunucu çok yoğun. Lütfen biraz sonra tekrar deneyin.');
+                        }}
+                        const retryAfter = parseFloat(response.headers.get('Retry-After')) || 2;
+                        const backoff = Math.min(retryAfter * 1000 * 2 ** Math.min(busyRetries - 1, 4), 30000);
+                        progressText.textContent = 'Sunucu yoğun, sıranız bekleniyor...';
+                        await sleep(backoff / 2 + Math.random() * backoff);
+                        continue;
+                    }}
+                    if (response.status < 500) {{
+                        throw new Error(result.error || 'Yükleme sırasında hata oluştu.');
+                    }}
+                }} catch (error) {{
+                    if (!(error instanceof TypeError)) {{
+                        throw error;
+                    }}
+                }}
+
+                // Ağ hatası: bekle, sunucudaki konumu sor ve sadece eksik kısmı gönder
+                retries += 1;
+                if (retries > MAX_RETRIES) {{
+                    throw new Error('Ağ hatası oluştu. Lütfen tekrar deneyin.');
+                }}
+                await sleep(Math.min(1000 * 2 ** (retries - 1), 15000));
+                try {{
+                    const {{ response, result }} = await requestJSON('/upload/sessions/' + session.session_id, {{ method: 'GET' }});
+                    if (response.ok) {{
+                        offset = result.offset;
+                    }}
+                }} catch (error) {{}}
+            }}
+
+            // Tamamlama tekrarlanabilir: yanıt kaybolursa sunucu aynı sonucu yeniden döndürür
+            retries = 0;
+            while (true) {{
+                try {{
+                    const {{ response, result }} = await requestJSON(
+                        '/upload/sessions/' + session.session_id + '/complete',
+                        {{ method: 'POST' }}
+                    );
+                    if (response.ok) {{
+                        localStorage.removeItem(sessionKey(file, uploaderName));
+                        return result;
+                    }}
+                    if (response.status < 500) {{
+                        throw new Error(result.error || 'Yükleme tamamlanamadı.');
+                    }}
+                }} catch (error) {{
+                    if (!(error instanceof TypeError)) {{
+                        throw error;
+                    }}
+                }}
+
+                retries += 1;
+                if (retries > MAX_RETRIES) {{
+                    throw new Error('Yükleme tamamlanamadı. Lütfen tekrar deneyin.');
+                }}
+                await sleep(Math.min(1000 * 2 ** (retries - 1), 15000));
+            }}
+        }}
+
         uploadForm.addEventListener('submit', async (e) => {{
             e.preventDefault();
 
@@ -1125,40 +5140,55 @@ def create_templates():
                 return;
             }}
 
-            const formData = new FormData();
             const uploaderName = document.getElementById('uploaderName').value || 'Anonim';
-
-            formData.append('uploader_name', uploaderName);
-            selectedFilesList.forEach(file => {{
-                formData.append('photos', file);
-            }});
+            const totalBytes = selectedFilesList.reduce((sum, file) => sum + file.size, 0) || 1;
+            let completedBytes = 0;
+            let uploadedCount = 0;
+            let deduplicatedCount = 0;
+            const errors = [];
 
             uploadBtn.disabled = true;
             progressContainer.style.display = 'block';
             hideMessages();
 
             try {{
-                const response = await fetch('/upload', {{
-                    method: 'POST',
-                    body: formData
-                }});
-
-                const result = await response.json();
+                for (let i = 0; i < selectedFilesList.length; i++) {{
+                    const file = selectedFilesList[i];
+                    progressText.textContent = `Yükleniyor... (${{i + 1}}/${{selectedFilesList.length}})`;
+                    try {{
+                        const result = await uploadFileResumable(file, uploaderName, (offset) => {{
+                            const percent = ((completedBytes + offset) / totalBytes) * 100;
+                            progressFill.style.width = percent.toFixed(1) + '%';
+                        }});
+                        uploadedCount += 1;
+                        deduplicatedCount += result.deduplicated_count || 0;
+                    }} catch (error) {{
+                        errors.push(`${{file.name}}: ${{error.message}}`);
+                    }}
+                    completedBytes += file.size;
+                }}
 
-                if (response.ok) {{
-                    showSuccess(`✅ ${{result.uploaded_count}} fotoğraf başarıyla yüklendi!`);
+                if (uploadedCount > 0) {{
+                    let message = `✅ ${{uploadedCount}} fotoğraf başarıyla yüklendi!`;
+                    if (deduplicatedCount > 0) {{
+                        message += ` (${{deduplicatedCount}} tanesi zaten yüklenmişti)`;
+                    }}
+                    showSuccess(message);
                     uploadForm.reset();
                     selectedFilesList = [];
                     displaySelectedFiles();
-                }} else {{
-                    showError(result.error || 'Yükleme sırasında hata oluştu.');
                 }}
-            }} catch (error) {{
-                showError('Ağ hatası oluştu. Lütfen tekrar deneyin.');
+                if (errors.length > 0) {{
+                    showError(errors.join('\\n'));
+                    if (uploadedCount > 0) {{
+                        successMessage.style.display = 'block';
+                    }}
+                }}
             }} finally {{
                 uploadBtn.disabled = false;
                 progressContainer.style.display = 'none';
                 progressFill.style.width = '0%';
+                progressText.textContent = 'Yükleniyor...';
             }}
         }});
 
@@ -1182,6 +5212,12 @@ def create_templates():
 </body>
 </html>'''
 
+
+# HTML Templates oluştur
+def create_templates():
+    # Yükleme sayfası build_upload_html ile bellekte üretilir; yalnız admin
+    # template'i dosyaya yazılır. Ayarlara bağlı değildir (Jinja ile doldurulur)
+
     # Admin template el yazısı fontlarıyla %75 zoom
     admin_html = '''<!DOCTYPE html>
 <html lang="tr">
@@ -1280,6 +5316,12 @@ def create_templates():
             margin-bottom: 23px; /* 30px'in %75'i */
         }
 
+        .export-item {
+            border-top: 1px solid #eee;
+            padding-top: 11px;
+            margin-top: 11px;
+        }
+
         .settings-form {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(195px, 1fr)); /* 260px'in %75'i */
@@ -1301,6 +5343,7 @@ def create_templates():
         }
 
         .form-group input,
+        .form-group select,
         .form-group textarea {
             width: 100%;
             padding: 9px; /* 12px'in %75'i */
@@ -1313,6 +5356,7 @@ def create_templates():
         }
 
         .form-group input:focus,
+        .form-group select:focus,
         .form-group textarea:focus {
             outline: none;
             border-color: #667eea;
@@ -1446,6 +5490,17 @@ def create_templates():
 
         .folder-content.expanded {
             max-height: 750px; /* 1000px'in %75'i */
+            overflow-y: auto;
+        }
+
+        .folder-more {
+            display: none;
+            text-align: center;
+            padding: 8px; /* 10px'in %75'i */
+        }
+
+        .folder-more.visible {
+            display: block;
         }
 
         .photos-table {
@@ -1474,6 +5529,44 @@ def create_templates():
             background: #f8f9fa;
         }
 
+        .photo-thumb {
+            width: 60px; /* 80px'in %75'i */
+            height: 60px;
+            object-fit: cover;
+            border-radius: 6px; /* 8px'in %75'i */
+            display: block;
+        }
+
+        .duplicate-group {
+            display: flex;
+            flex-wrap: wrap;
+            gap: 11px;
+            border-top: 1px solid #eee;
+            padding-top: 11px;
+            margin-top: 11px;
+        }
+
+        .duplicate-item {
+            width: 90px;
+            font-size: 0.68rem;
+            word-break: break-all;
+            color: #666;
+        }
+
+        .duplicate-item .photo-thumb {
+            width: 90px;
+            height: 90px;
+            margin-bottom: 4px;
+        }
+
+        .photo-thumb-empty {
+            display: inline-block;
+            width: 60px;
+            text-align: center;
+            font-size: 1.5rem;
+            opacity: 0.4;
+        }
+
         h1, h2, h3 {
             margin-bottom: 15px; /* 20px'in %75'i */
             font-family: 'Dancing Script', cursive;
@@ -1738,7 +5831,7 @@ def create_templates():
 
         <div class="stats-grid">
             <div class="stat-card">
-                <div class="stat-number">{{ total_photos }}</div>
+                <div class="stat-number" id="stat-total-photos">{{ total_photos }}</div>
                 <div class="stat-label">📸 Toplam Fotoğraf</div>
             </div>
             <div class="stat-card">
@@ -1757,34 +5850,173 @@ def create_templates():
                 <a href="{{ url_for('download_all') }}" class="btn btn-success">
                     📦 Tüm Fotoğrafları ZIP İndir
                 </a>
+                <a href="{{ url_for('download_all', format='tar') }}" class="btn btn-success">
+                    🗄️ Tüm Fotoğrafları TAR İndir (sıkıştırmasız)
+                </a>
             {% endif %}
             <a href="{{ url_for('generate_qr') }}" class="btn btn-info">
                 📱 QR Kod İndir
             </a>
+            <a href="{{ url_for('generate_qr', format='svg', ec='M') }}" class="btn btn-info">
+                🖨️ QR Kod SVG (baskı için)
+            </a>
             <a href="{{ url_for('upload_form') }}" class="btn">
                 🏠 Ana Sayfaya Dön
             </a>
         </div>
 
+        <div class="settings-section">
+            <h3>🗂️ Parçalı Dışa Aktarma</h3>
+            {% if total_photos > 0 %}
+                <form method="POST" action="{{ url_for('create_export') }}" class="settings-form">
+                    <div class="form-group">
+                        <label for="max_size_mb">💽 Cilt Başına En Fazla Boyut (MB)</label>
+                        <input type="number" id="max_size_mb" name="max_size_mb" min="1"
+                               value="{{ export_default_volume_mb }}" required>
+                        <small style="color: #666; font-size: 0.68rem;">💡 Örn: 4000 (FAT32 bellek), 4480 (DVD)</small>
+                    </div>
+                    <div class="form-group">
+                        <label for="group_by">🧭 Sıralama</label>
+                        <select id="group_by" name="group_by">
+                            <option value="time">Çekim zamanına göre</option>
+                            <option value="uploader">Yükleyene göre</option>
+                        </select>
+                    </div>
+                    <div class="form-group">
+                        <button type="submit" class="btn btn-success">
+                            📤 Dışa Aktarmayı Başlat
+                        </button>
+                    </div>
+                </form>
+            {% endif %}
+
+            {% for export in exports %}
+                <div class="export-item">
+                    <strong>📦 {{ export.id }}</strong>
+                    <span class="folder-stat">
+                        {{ export.photo_count }} fotoğraf, {{ export.volumes|length }} cilt,
+                        {{ 'çekim zamanına' if export.group_by == 'time' else 'yükleyene' }} göre
+                    </span>
+                    <span class="folder-stat">
+                        {% if export.status == 'ready' %}✅ Hazır
+                        {% elif export.status == 'failed' %}❌ Hatalı
+                        {% else %}⏳ Hazırlanıyor ({{ export.ready_count }}/{{ export.volumes|length }}){% endif %}
+                    </span>
+                    <a href="{{ url_for('download_export_file', export_id=export.id, filename='manifest.json') }}"
+                       class="btn btn-info btn-small">📄 manifest.json</a>
+                    <form method="POST" action="{{ url_for('delete_export', export_id=export.id) }}" style="display: inline;">
+                        <button type="submit" class="btn btn-danger btn-small">🗑️ Sil</button>
+                    </form>
+                    <table class="photos-table">
+                        <thead>
+                            <tr>
+                                <th>#</th>
+                                <th>📸 Fotoğraf</th>
+                                <th>📅 Aralık</th>
+                                <th>💾 Boyut</th>
+                                <th>⬇️ İndir</th>
+                            </tr>
+                        </thead>
+                        <tbody>
+                            {% for volume in export.volumes %}
+                                <tr>
+                                    <td>{{ volume.number }}</td>
+                                    <td>{{ volume.photo_count }}</td>
+                                    <td>{{ volume.first_upload }} - {{ volume.last_upload }}</td>
+                                    <td>{{ "%.1f"|format((volume.size or volume.planned_size) / 1024 / 1024) }} MB</td>
+                                    <td>
+                                        {% if volume.status == 'ready' %}
+                                            <a href="{{ url_for('download_export_file', export_id=export.id, filename=volume.filename) }}"
+                                               class="btn btn-warning btn-small">📥 Cilt {{ volume.number }}</a>
+                                        {% elif volume.status == 'failed' %}
+                                            ❌ {{ volume.error }}
+                                        {% else %}
+                                            ⏳
+                                        {% endif %}
+                                    </td>
+                                </tr>
+                            {% endfor %}
+                        </tbody>
+                    </table>
+                </div>
+            {% endfor %}
+        </div>
+
+        <div class="settings-section">
+            <div style="display: flex; justify-content: space-between; align-items: center;">
+                <h3>🔁 Benzer Fotoğraflar</h3>
+                <button class="btn btn-small" type="button" onclick="loadDuplicates()">
+                    🔍 Benzerleri Bul
+                </button>
+            </div>
+            <div id="duplicates-summary" class="folder-stat">
+                Seri çekimler ve yeniden sıkıştırılmış kopyalar algısal özetle gruplanır.
+            </div>
+            <div id="duplicates"></div>
+        </div>
+
+        <div class="settings-section">
+            <div style="display: flex; justify-content: space-between; align-items: center;">
+                <h3>🙂 Kişiye Göre Fotoğraflar</h3>
+                {% if not face_error and face_people %}
+                    <button class="btn btn-small" type="button" onclick="loadPeople()">
+                        🔍 Yüzleri Eşleştir
+                    </button>
+                {% endif %}
+            </div>
+            <div id="people-summary" class="folder-stat">
+                {% if face_error %}
+                    ⚠️ {{ face_error }}
+                {% elif not face_people %}
+                    face_data klasöründe referans yüz (face_kişi_n.jpg) bulunamadı.
+                {% else %}
+                    Fotoğraflardaki yüzler face_data klasöründeki referans yüzlerle karşılaştırılır.
+                {% endif %}
+            </div>
+            {% if not face_error %}
+                {% for person, paths in face_people.items() %}
+                    <div class="duplicate-group person-row" data-person="{{ person }}">
+                        <div style="width: 100%; display: flex; gap: 11px; align-items: center; flex-wrap: wrap;">
+                            <strong>👤 Kişi {{ person }}</strong>
+                            <span class="folder-stat">
+                                {{ paths|length }} referans · <span class="person-count">?</span> fotoğraf
+                            </span>
+                            <button class="btn btn-small" type="button" onclick="showPerson(this)">
+                                🖼️ Göster
+                            </button>
+                            <a href="{{ url_for('download_person_photos', person=person) }}"
+                               class="btn btn-warning btn-small">📥 İndir</a>
+                            <a href="{{ url_for('download_person_photos', person=person, format='tar') }}"
+                               class="btn btn-warning btn-small">🗄️ TAR</a>
+                        </div>
+                        <div class="person-photos duplicate-group" style="width: 100%; border-top: none;"></div>
+                    </div>
+                {% endfor %}
+            {% endif %}
+        </div>
+
         <div class="uploaders-container">
             <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 15px;">
                 <h3>👥 Yükleyenlere Göre Fotoğraflar</h3>
                 <div class="expand-all-btn">
+                    <select id="photo-sort" onchange="changePhotoSort()">
+                        <option value="upload">📅 Yükleme zamanına göre</option>
+                        <option value="taken">📷 Çekim zamanına göre</option>
+                    </select>
                     <button class="btn btn-small" onclick="toggleAllFolders()">
                         📁 Tümünü Aç/Kapat
                     </button>
                 </div>
             </div>
 
-            {% if grouped_photos %}
-                {% for uploader, photos in grouped_photos.items() %}
-                    {% set stats = uploader_stats[uploader] %}
-                    <div class="uploader-folder">
-                        <div class="folder-header" onclick="toggleFolder('{{ uploader|replace("'", "\\'") }}')">
+            {% if uploader_stats %}
+                {% for stats in uploader_stats %}
+                    <div class="uploader-folder" data-uploader="{{ stats.uploader }}">
+                        <div class="folder-header" onclick="toggleFolder(this)">
                             <div class="folder-info">
                                 <span class="folder-icon">📁</span>
                                 <div>
-                                    <strong>👤 {{ uploader }}</strong>
+                                    <strong>👤 {{ stats.uploader }}</strong>
                                     <div class="folder-stats">
                                         <div class="folder-stat">
                                             <span>📸</span>
@@ -1802,31 +6034,34 @@ def create_templates():
                                 </div>
                             </div>
                             <div class="folder-actions" onclick="event.stopPropagation()">
-                                <a href="{{ url_for('download_uploader_photos', uploader_name=uploader) }}" 
+                                <a href="{{ url_for('download_uploader_photos', uploader_name=stats.uploader) }}" 
                                    class="btn btn-warning btn-small">
                                     📥 İndir
                                 </a>
+                                <a href="{{ url_for('download_uploader_photos', uploader_name=stats.uploader, format='tar') }}"
+                                   class="btn btn-warning btn-small">
+                                    🗄️ TAR
+                                </a>
                             </div>
                         </div>
-                        <div class="folder-content" id="folder-{{ uploader|replace(' ', '_')|replace('/', '_') }}">
+                        <div class="folder-content">
                             <table class="photos-table">
                                 <thead>
                                     <tr>
+                                        <th>🖼️ Önizleme</th>
                                         <th>📁 Dosya Adı</th>
                                         <th>📅 Yükleme Tarihi</th>
+                                        <th>📷 Çekim</th>
                                         <th>💾 Boyut</th>
                                     </tr>
                                 </thead>
-                                <tbody>
-                                    {% for photo in photos %}
-                                    <tr>
-                                        <td>{{ photo.original_filename }}</td>
-                                        <td>{{ photo.upload_time }}</td>
-                                        <td>{{ "%.2f"|format(photo.file_size / 1024 / 1024) }} MB</td>
-                                    </tr>
-                                    {% endfor %}
-                                </tbody>
+                                <tbody></tbody>
                             </table>
+                            <div class="folder-more">
+                                <button class="btn btn-small" type="button" onclick="loadFolderPage(this.closest('.uploader-folder'))">
+                                    ⬇️ Daha Fazla Göster
+                                </button>
+                            </div>
                         </div>
                     </div>
                 {% endfor %}
@@ -1841,40 +6076,282 @@ def create_templates():
     </div>
 
     <script>
-        function toggleFolder(uploaderName) {
-            const safeName = uploaderName.replace(/\s/g, '_').replace(/\//g, '_');
-            const content = document.getElementById('folder-' + safeName);
-            const header = content.previousElementSibling;
+        const PAGE_SIZE = {{ page_size }};
 
-            if (content.classList.contains('expanded')) {
-                content.classList.remove('expanded');
-                header.classList.remove('active');
+        // Toplam fotoğraf sayısı yükleme oldukça sunucudan itilir
+        function showStats(stats) {
+            if (stats.total_photos !== undefined) {
+                document.getElementById('stat-total-photos').textContent = stats.total_photos;
+            }
+        }
+
+        function openStatsStream() {
+            const statsStream = new EventSource('{{ url_for('stats_stream') }}');
+            const updateStats = event => showStats(JSON.parse(event.data));
+            statsStream.addEventListener('snapshot', updateStats);
+            statsStream.addEventListener('delta', updateStats);
+            // Sunucu akış sınırındaysa (503) tarayıcı kendisi yeniden bağlanmaz:
+            // özeti bir kez /stats'tan al ve biraz sonra yeniden dene
+            statsStream.onerror = () => {
+                if (statsStream.readyState === EventSource.CLOSED) {
+                    fetch('{{ url_for('get_stats') }}')
+                        .then(response => response.json())
+                        .then(showStats)
+                        .catch(() => {});
+                    setTimeout(openStatsStream, 15000 + Math.random() * 15000);
+                }
+            };
+        }
+
+        if (window.EventSource) {
+            openStatsStream();
+        }
+
+        function formatMB(bytes) {
+            return (bytes / 1024 / 1024).toFixed(2) + ' MB';
+        }
+
+        function photoRow(photo) {
+            const row = document.createElement('tr');
+
+            const thumbCell = document.createElement('td');
+            if (photo.thumbnail_url) {
+                const link = document.createElement('a');
+                link.href = photo.preview_url;
+                link.target = '_blank';
+                const img = document.createElement('img');
+                img.className = 'photo-thumb';
+                img.src = photo.thumbnail_url;
+                img.alt = photo.original_filename;
+                img.loading = 'lazy';
+                link.appendChild(img);
+                thumbCell.appendChild(link);
             } else {
+                const empty = document.createElement('span');
+                empty.className = 'photo-thumb-empty';
+                empty.textContent = '📷';
+                thumbCell.appendChild(empty);
+            }
+            row.appendChild(thumbCell);
+
+            const nameCell = document.createElement('td');
+            const nameLink = document.createElement('a');
+            nameLink.href = photo.original_url;
+            nameLink.target = '_blank';
+            nameLink.textContent = photo.original_filename;
+            nameCell.appendChild(nameLink);
+            row.appendChild(nameCell);
+
+            // Çekim zamanı ve kamera EXIF okunduktan sonra gelir
+            const taken = [photo.taken_at, photo.camera_model].filter(Boolean).join(' · ') || '—';
+
+            [photo.upload_time, taken, formatMB(photo.file_size)].forEach(value => {
+                const cell = document.createElement('td');
+                cell.textContent = value;
+                row.appendChild(cell);
+            });
+            return row;
+        }
+
+        function duplicateItem(photo) {
+            const item = document.createElement('div');
+            item.className = 'duplicate-item';
+
+            const link = document.createElement('a');
+            link.href = photo.original_url;
+            link.target = '_blank';
+            if (photo.thumbnail_url) {
+                const img = document.createElement('img');
+                img.className = 'photo-thumb';
+                img.src = photo.thumbnail_url;
+                img.alt = photo.original_filename;
+                img.loading = 'lazy';
+                link.appendChild(img);
+            } else {
+                link.textContent = '📷';
+            }
+            item.appendChild(link);
+
+            const caption = document.createElement('div');
+            caption.textContent = photo.uploader_name + ' · ' + photo.original_filename;
+            item.appendChild(caption);
+            return item;
+        }
+
+        // Yakın kopya gruplarını getir (sunucu yalnız yeni özetleri indekse ekler)
+        async function loadDuplicates() {
+            const summary = document.getElementById('duplicates-summary');
+            const container = document.getElementById('duplicates');
+            summary.textContent = '⏳ Aranıyor...';
+            try {
+                const response = await fetch('/api/duplicates');
+                const result = await response.json();
+                if (!response.ok) {
+                    throw new Error(result.error || 'Benzer fotoğraflar alınamadı.');
+                }
+
+                container.innerHTML = '';
+                result.groups.forEach(group => {
+                    const row = document.createElement('div');
+                    row.className = 'duplicate-group';
+                    group.forEach(photo => row.appendChild(duplicateItem(photo)));
+                    container.appendChild(row);
+                });
+
+                summary.textContent = result.group_count
+                    ? `${result.group_count} grupta ${result.photo_count} benzer fotoğraf` +
+                      (result.group_count > result.groups.length ? ` (ilk ${result.groups.length} grup gösteriliyor)` : '')
+                    : 'Benzer fotoğraf bulunamadı.';
+            } catch (error) {
+                summary.textContent = '❌ ' + error.message;
+            }
+        }
+
+        // Kişilerin eşleşen fotoğraf sayılarını getir (sunucu yalnız yeni yüzleri diziye ekler)
+        async function loadPeople() {
+            const summary = document.getElementById('people-summary');
+            summary.textContent = '⏳ Eşleştiriliyor...';
+            try {
+                const response = await fetch('/api/people');
+                const result = await response.json();
+                if (!response.ok) {
+                    throw new Error(result.error || 'Kişiler alınamadı.');
+                }
+
+                result.people.forEach(person => {
+                    document.querySelectorAll('.person-row').forEach(row => {
+                        if (row.dataset.person === person.person) {
+                            row.querySelector('.person-count').textContent = person.photo_count;
+                        }
+                    });
+                });
+
+                summary.textContent = `${result.face_count} yüz ${result.elapsed_ms} ms'de karşılaştırıldı` +
+                    (result.pending_count ? ` (${result.pending_count} fotoğraf henüz taranmadı)` : '');
+            } catch (error) {
+                summary.textContent = '❌ ' + error.message;
+            }
+        }
+
+        // Kişinin eşleşen fotoğraflarını satırın altında göster
+        async function showPerson(button) {
+            const row = button.closest('.person-row');
+            const container = row.querySelector('.person-photos');
+            container.textContent = '⏳ Yükleniyor...';
+            try {
+                const response = await fetch('/api/people/' + encodeURIComponent(row.dataset.person));
+                const result = await response.json();
+                if (!response.ok) {
+                    throw new Error(result.error || 'Fotoğraflar alınamadı.');
+                }
+
+                container.innerHTML = '';
+                result.photos.forEach(photo => container.appendChild(duplicateItem(photo)));
+                row.querySelector('.person-count').textContent = result.photos.length;
+                if (!result.photos.length) {
+                    container.textContent = 'Eşleşen fotoğraf bulunamadı.';
+                }
+            } catch (error) {
+                container.textContent = '❌ ' + error.message;
+            }
+        }
+
+        // Klasörün bir sonraki sayfasını API'den yükle
+        async function loadFolderPage(folder) {
+            if (folder.dataset.loading === '1' || folder.dataset.done === '1') {
+                return;
+            }
+            folder.dataset.loading = '1';
+
+            const params = new URLSearchParams({
+                uploader: folder.dataset.uploader,
+                limit: PAGE_SIZE,
+                sort: document.getElementById('photo-sort').value
+            });
+            if (folder.dataset.cursor) {
+                params.set('cursor', folder.dataset.cursor);
+            }
+
+            const more = folder.querySelector('.folder-more');
+            let sortChanged = false;
+            try {
+                const response = await fetch('/api/photos?' + params.toString());
+                const result = await response.json();
+                if (!response.ok) {
+                    throw new Error(result.error || 'Fotoğraflar yüklenemedi.');
+                }
+
+                // İstek sürerken sıralama değiştiyse bu sayfayı atıp yenisini iste
+                if (params.get('sort') !== document.getElementById('photo-sort').value) {
+                    sortChanged = true;
+                    return;
+                }
+
+                const tbody = folder.querySelector('tbody');
+                result.photos.forEach(photo => tbody.appendChild(photoRow(photo)));
+
+                folder.dataset.cursor = result.next_cursor || '';
+                folder.dataset.done = result.next_cursor ? '0' : '1';
+                more.classList.toggle('visible', Boolean(result.next_cursor));
+            } catch (error) {
+                more.classList.add('visible');
+            } finally {
+                folder.dataset.loading = '0';
+                if (sortChanged) {
+                    loadFolderPage(folder);
+                }
+            }
+        }
+
+        function setFolderExpanded(folder, expanded) {
+            const header = folder.querySelector('.folder-header');
+            const content = folder.querySelector('.folder-content');
+
+            if (expanded) {
                 content.classList.add('expanded');
                 header.classList.add('active');
+                // İlk açılışta ilk sayfayı getir
+                if (!folder.dataset.loaded) {
+                    folder.dataset.loaded = '1';
+                    loadFolderPage(folder);
+                }
+            } else {
+                content.classList.remove('expanded');
+                header.classList.remove('active');
             }
         }
 
+        // Sıralama değişince yüklenmiş sayfaları bırak, açık klasörleri baştan getir
+        function changePhotoSort() {
+            document.querySelectorAll('.uploader-folder').forEach(folder => {
+                folder.querySelector('tbody').innerHTML = '';
+                folder.querySelector('.folder-more').classList.remove('visible');
+                folder.dataset.cursor = '';
+                folder.dataset.done = '0';
+                delete folder.dataset.loaded;
+                if (folder.querySelector('.folder-content').classList.contains('expanded')) {
+                    folder.dataset.loaded = '1';
+                    loadFolderPage(folder);
+                }
+            });
+        }
+
+        function toggleFolder(header) {
+            const folder = header.closest('.uploader-folder');
+            const content = folder.querySelector('.folder-content');
+            setFolderExpanded(folder, !content.classList.contains('expanded'));
+        }
+
         function toggleAllFolders() {
-            const allContents = document.querySelectorAll('.folder-content');
-            const allHeaders = document.querySelectorAll('.folder-header');
+            const allFolders = document.querySelectorAll('.uploader-folder');
 
             // Check if any folder is open
-            const hasExpanded = Array.from(allContents).some(content => 
-                content.classList.contains('expanded')
+            const hasExpanded = Array.from(allFolders).some(folder =>
+                folder.querySelector('.folder-content').classList.contains('expanded')
             );
 
             // If any is open, close all. Otherwise, open all.
-            allContents.forEach((content, index) => {
-                const header = allHeaders[index];
-                if (hasExpanded) {
-                    content.classList.remove('expanded');
-                    header.classList.remove('active');
-                } else {
-                    content.classList.add('expanded');
-                    header.classList.add('active');
-                }
-            });
+            allFolders.forEach(folder => setFolderExpanded(folder, !hasExpanded));
         }
 
         // Auto-close folders when clicking outside
@@ -1894,24 +6371,327 @@ def create_templates():
 </body>
 </html>'''
 
-    with open('templates/upload.html', 'w', encoding='utf-8') as f:
-        f.write(upload_html)
-
     with open('templates/admin.html', 'w', encoding='utf-8') as f:
         f.write(admin_html)
 
 
-if __name__ == '__main__':
-    # Veritabanını başlat
-    init_db()
+def reset_after_fork():
+    """Fork sonrası üst süreçten kalan havuzları bırak; ilk kullanımda yeniden açılırlar.
+    Yazıcı, arşivleyici, istatistik ve bağlantı havuzu süreç kimliğine bakıp kendini yeniler."""
+    global rendition_executor, archive_executor
+    rendition_executor = None
+    archive_executor = None
 
-    # Template'leri oluştur
+
+def run_server(host='0.0.0.0', port=5000, workers=None, threads=32, graceful_timeout=120):
+    """Uygulamayı gunicorn altında önceden fork eden çok süreçli sunucuyla çalıştır.
+
+    Her işçide threads - STATS_RESERVED_THREADS canlı istatistik akışı açık
+    kalabilir (en az bir); kalan iş parçacıkları yüklemelere ayrılır.
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("❌ gunicorn kurulu değil: pip install gunicorn")
+        raise SystemExit(1)
+
+    # Veritabanı ve template'ler bir kez, fork'tan önce hazırlanır
+    init_db()
     create_templates()
+    load_site_settings()
+    # Fork'tan önce kurulur; her işçi kendi sayacıyla başlar
+    set_stats_stream_limit(max(1, threads - STATS_RESERVED_THREADS))
+
+    def post_fork(server, worker):
+        reset_after_fork()
+
+    def post_worker_init(worker):
+        metrics_publisher.start()
+        # Eksik özetleri, önizlemeleri, EXIF bilgilerini ve yüz taramalarını yalnız ilk işçi kuyruğa alır
+        if worker.age == 1:
+            schedule_missing_hashes()
+            schedule_missing_renditions()
+            schedule_missing_metadata()
+            schedule_missing_faces()
+
+    class WeddingServer(BaseApplication):
+        def load_config(self):
+            options = {
+                'bind': f'{host}:{port}',
+                'workers': workers or (os.cpu_count() or 1) * 2 + 1,
+                'threads': threads,
+                'worker_class': 'gthread',
+                'preload_app': True,
+                # Büyük yüklemeler yavaş bağlantılarda uzun sürebilir
+                'timeout': 300,
+                # SIGTERM sonrası süren yüklemelerin bitmesi beklenir
+                'graceful_timeout': graceful_timeout,
+                'keepalive': 5,
+                'post_fork': post_fork,
+                'post_worker_init': post_worker_init,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    print(f"🎉 BYT DIGITAL Düğün Fotoğraf Uygulaması http://{host}:{port} adresinde "
+          f"({workers or (os.cpu_count() or 1) * 2 + 1} işçi x {threads} iş parçacığı)")
+    WeddingServer().run()
+
+
+def benchmark_server(worker_counts=(1, 4), threads=8, clients=16, duration=5.0):
+    """serve komutunu geçici klasörde alt süreç olarak başlatıp /, /upload ve
+    /admin için saniyedeki istek sayısını ölç"""
+    import http.client
+    import socket
+    import statistics
+    import subprocess
+    import sys
+    import tempfile
+
+    def upload_request():
+        boundary = uuid.uuid4().hex
+        body = (f'--{boundary}\r\nContent-Disposition: form-data; name="uploader_name"\r\n\r\n'
+                f'Misafir {threading.get_ident() % 10}\r\n'
+                f'--{boundary}\r\nContent-Disposition: form-data; name="photos"; filename="bench.jpg"\r\n'
+                f'Content-Type: image/jpeg\r\n\r\n').encode('utf-8')
+        body += b'\xff\xd8\xff\xe0' + os.urandom(64 * 1024) + f'\r\n--{boundary}--\r\n'.encode('ascii')
+        return 'POST', '/upload', body, {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+
+    endpoints = [
+        ('GET /', lambda: ('GET', '/', None, {})),
+        ('POST /upload', upload_request),
+        ('GET /admin', lambda: ('GET', '/admin', None, {})),
+    ]
+
+    print(f"⏱️ {clients} eşzamanlı istemci, uç başına {duration:.0f}sn, işçi başına {threads} iş parçacığı")
+
+    for workers in worker_counts:
+        workdir = tempfile.mkdtemp(prefix='dugun_bench_')
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__), 'serve',
+                                   '--host', '127.0.0.1', '--port', str(port),
+                                   '--workers', str(workers), '--threads', str(threads)],
+                                  cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                    break
+                except OSError:
+                    if time.monotonic() > deadline or server.poll() is not None:
+                        raise RuntimeError('Sunucu başlatılamadı')
+                    time.sleep(0.2)
+
+            print(f"  {workers} işçi:")
+            for label, make_request in endpoints:
+                latencies = []
+                failures = []
+                stop_at = time.monotonic() + duration
+
+                def client_loop():
+                    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                    while time.monotonic() < stop_at:
+                        method, path, body, headers = make_request()
+                        started = time.perf_counter()
+                        try:
+                            conn.request(method, path, body=body, headers=headers)
+                            response = conn.getresponse()
+                            response.read()
+                            if response.status != 200:
+                                failures.append(response.status)
+                        except (OSError, http.client.HTTPException) as e:
+                            failures.append(str(e))
+                            conn.close()
+                            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                        latencies.append(time.perf_counter() - started)
+                    conn.close()
+
+                started = time.perf_counter()
+                client_threads = [threading.Thread(target=client_loop) for _ in range(clients)]
+                for thread in client_threads:
+                    thread.start()
+                for thread in client_threads:
+                    thread.join()
+                elapsed = time.perf_counter() - started
+
+                quantiles = statistics.quantiles(latencies, n=100)
+                print(f"    {label:<14} {len(latencies) / elapsed:8.1f} istek/sn  "
+                      f"p50={quantiles[49] * 1000:7.2f}ms  p99={quantiles[98] * 1000:7.2f}ms  "
+                      f"hata={len(failures)}")
+        finally:
+            server.terminate()
+            server.wait(timeout=60)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='BYT DIGITAL Düğün Fotoğraf Uygulaması')
+    subparsers = parser.add_subparsers(dest='command')
+
+    serve_parser = subparsers.add_parser('serve',
+                                         help='Çok süreçli üretim sunucusunu (gunicorn) başlat')
+    serve_parser.add_argument('--host', default='0.0.0.0')
+    serve_parser.add_argument('--port', type=int, default=5000)
+    serve_parser.add_argument('--workers', type=int, default=None,
+                              help='İşçi süreç sayısı (varsayılan: 2 x çekirdek + 1)')
+    serve_parser.add_argument('--threads', type=int, default=32,
+                              help='İşçi başına iş parçacığı sayısı; '
+                                   f'{STATS_RESERVED_THREADS} tanesi dışındakiler canlı istatistik akışlarına açıktır')
+    serve_parser.add_argument('--graceful-timeout', type=int, default=120,
+                              help='Kapanırken süren isteklerin bekleneceği süre (sn)')
+
+    bench_serve_parser = subparsers.add_parser('bench-serve',
+                                               help='serve komutunun istek/sn değerini ölç')
+    bench_serve_parser.add_argument('--workers', type=int, nargs='+', default=[1, 4],
+                                    help='Karşılaştırılacak işçi sayıları')
+    bench_serve_parser.add_argument('--threads', type=int, default=8,
+                                    help='İşçi başına iş parçacığı sayısı')
+    bench_serve_parser.add_argument('--clients', type=int, default=16,
+                                    help='Eşzamanlı istemci sayısı')
+    bench_serve_parser.add_argument('--duration', type=float, default=5.0,
+                                    help='Uç başına ölçüm süresi (sn)')
+
+    migrate_parser = subparsers.add_parser('migrate-storage',
+                                           help='uploads/ klasörünü parçalı düzene taşı')
+    migrate_parser.add_argument('--workers', type=int, default=8,
+                                help='Paralel taşıma iş parçacığı sayısı')
+
+    bench_db_parser = subparsers.add_parser('bench-db',
+                                            help='Bağlantı havuzunun gecikmeye etkisini ölç')
+    bench_db_parser.add_argument('--threads', type=int, default=8,
+                                 help='Eşzamanlı istemci sayısı')
+    bench_db_parser.add_argument('--requests', type=int, default=50,
+                                 help='İstemci başına istek sayısı')
+
+    bench_writer_parser = subparsers.add_parser('bench-writer',
+                                                help='Toplu yazıcının ekleme hızını ölç')
+    bench_writer_parser.add_argument('--threads', type=int, default=16,
+                                     help='Eşzamanlı ekleyen iş parçacığı sayısı')
+    bench_writer_parser.add_argument('--inserts', type=int, default=200,
+                                     help='İş parçacığı başına kayıt sayısı')
+
+    bench_archive_parser = subparsers.add_parser('bench-archive',
+                                                 help='Arşiv modlarının hızını sentetik etkinlikle ölç')
+    bench_archive_parser.add_argument('--size-gb', type=float, default=5.0,
+                                      help='Sentetik etkinliğin toplam boyutu (GB)')
+    bench_archive_parser.add_argument('--photo-mb', type=float, default=4.0,
+                                      help='Fotoğraf başına boyut (MB)')
+    bench_archive_parser.add_argument('--compressible', type=int, default=10,
+                                      help='Sıkıştırılabilir dosyaların yüzdesi')
+    bench_archive_parser.add_argument('--workers', type=int, default=None,
+                                      help='Paralel sıkıştırma iş parçacığı sayısı')
+
+    subparsers.add_parser('check-query-plans',
+                          help='Sık sorguların indeks kullandığını EXPLAIN QUERY PLAN ile doğrula')
+
+    subparsers.add_parser('rebuild-uploaders',
+                          help='Yükleyen özet tablosunu fotoğraflarla karşılaştırıp düzelt')
+
+    bench_duplicates_parser = subparsers.add_parser('bench-duplicates',
+                                                    help='Yakın kopya kümelemesinin süresini ölç')
+    bench_duplicates_parser.add_argument('--photos', type=int, default=50000,
+                                         help='Sentetik özet sayısı')
+    bench_duplicates_parser.add_argument('--distance', type=int, default=DUPLICATE_MAX_DISTANCE,
+                                         help='Benzer sayılan en fazla bit farkı')
+
+    backfill_parser = subparsers.add_parser('backfill-exif',
+                                            help='EXIF bilgisi okunmamış fotoğrafları toplu işle')
+    backfill_parser.add_argument('--workers', type=int, default=None,
+                                 help='İşlem sayısı (varsayılan: çekirdek sayısı)')
+
+    backfill_hashes_parser = subparsers.add_parser('backfill-hashes',
+                                                   help='İçerik özeti olmayan eski fotoğrafları toplu işle')
+    backfill_hashes_parser.add_argument('--workers', type=int, default=None,
+                                        help='İşlem sayısı (varsayılan: çekirdek sayısı)')
+
+    index_faces_parser = subparsers.add_parser('index-faces',
+                                               help='Yüzleri taranmamış fotoğrafları toplu işle')
+    index_faces_parser.add_argument('--workers', type=int, default=None,
+                                    help='İşlem sayısı (varsayılan: çekirdek sayısı)')
+    index_faces_parser.add_argument('--batch-size', type=int, default=FACE_BATCH_SIZE,
+                                    help='Bir görevde işlenen fotoğraf sayısı')
+
+    bench_faces_parser = subparsers.add_parser('bench-faces',
+                                               help='Yüz taramasının fotoğraf/sn değerini ölç')
+    bench_faces_parser.add_argument('--images', type=int, default=100,
+                                    help='Sentetik fotoğraf sayısı')
+    bench_faces_parser.add_argument('--workers', type=int, default=None,
+                                    help='Karşılaştırılacak işlem sayısı (varsayılan: çekirdek sayısı)')
+    bench_faces_parser.add_argument('--search-faces', type=int, default=100000,
+                                    help='Arama ölçümündeki yüz sayısı')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        run_server(args.host, args.port, args.workers, args.threads, args.graceful_timeout)
+
+    elif args.command == 'bench-serve':
+        benchmark_server(args.workers, args.threads, args.clients, args.duration)
+
+    elif args.command == 'migrate-storage':
+        migrate_storage(args.workers)
+
+    elif args.command == 'bench-db':
+        benchmark_db(args.threads, args.requests)
+
+    elif args.command == 'bench-writer':
+        benchmark_photo_writer(args.threads, args.inserts)
+
+    elif args.command == 'bench-archive':
+        benchmark_archive(args.size_gb, args.photo_mb, args.compressible, args.workers)
+
+    elif args.command == 'check-query-plans':
+        init_db()
+        conn = connect_db()
+        failures = check_query_plans(conn, verbose=True)
+        conn.close()
+        raise SystemExit(1 if failures else 0)
+
+    elif args.command == 'rebuild-uploaders':
+        init_db()
+        conn = connect_db()
+        rebuild_uploader_stats(conn, verbose=True)
+        conn.close()
+
+    elif args.command == 'backfill-exif':
+        backfill_metadata(args.workers)
+
+    elif args.command == 'backfill-hashes':
+        backfill_content_hashes(args.workers)
+
+    elif args.command == 'bench-duplicates':
+        benchmark_duplicates(args.photos, args.distance)
+
+    elif args.command == 'index-faces':
+        index_faces(args.workers, args.batch_size)
+
+    elif args.command == 'bench-faces':
+        benchmark_faces(args.images, args.workers, args.search_faces)
+
+    else:
+        # Veritabanını başlat
+        init_db()
+
+        # Özeti, önizlemesi, EXIF bilgisi ya da yüz taraması eksik fotoğrafları arka planda işle
+        schedule_missing_hashes()
+        schedule_missing_renditions()
+        schedule_missing_metadata()
+        schedule_missing_faces()
+
+        # Template'leri oluştur
+        create_templates()
 
-    print("🎉 BYT DIGITAL Düğün Fotoğraf Uygulaması Başlatılıyor...")
-    print("📱 Ana sayfa: http://localhost:5000")
-    print("🔧 Admin panel: http://localhost:5000/admin")
-    print("📱 QR kod oluştur: http://localhost:5000/qr")
+        print("🎉 BYT DIGITAL Düğün Fotoğraf Uygulaması Başlatılıyor...")
+        print("📱 Ana sayfa: http://localhost:5000")
+        print("🔧 Admin panel: http://localhost:5000/admin")
+        print("📱 QR kod oluştur: http://localhost:5000/qr")
+        print("⚠️ Geliştirme sunucusu; üretim için: python main.py serve")
 
-    # Flask uygulamasını başlat
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+        # Flask uygulamasını başlat
+        app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
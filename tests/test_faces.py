@@ -0,0 +1,81 @@
+"""Yüz algılama ve eşleştirmeyi gerçek modellerle uçtan uca çalıştırır.
+
+face_data'daki kırpıntılardan bir düğün fotoğrafı oluşturulur; yüzlerin
+bulunduğu ve yalnız doğru kişiyle eşleştiği denetlenir. dlib ya da
+face_recognition_models kurulu değilse testler atlanır.
+"""
+import importlib
+import os
+import shutil
+import sys
+
+import pytest
+from PIL import Image
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+FACE_DATA = os.path.join(REPO_DIR, 'face_data')
+
+# (kırpıntı, fotoğraftaki konum, boyut): aynı adamın başka bir karesi ve bir çocuk
+PASTED_FACES = [('face_2_1.jpg', (300, 400), 400), ('face_1_0.jpg', (1300, 300), 500)]
+
+
+@pytest.fixture(scope='module')
+def app_module(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp('faces')
+    original_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        main = importlib.import_module('main')
+        error = main.face_support_error()
+        if error:
+            pytest.skip(error)
+        main.DATABASE = str(workdir / 'wedding_photos.db')
+        main.init_db()
+
+        # Kişi 'damat' başka bir karesiyle, kişi 'misafir' fotoğrafta olmayan biriyle tanımlı
+        main.FACE_DATA_FOLDER = str(workdir / 'face_data')
+        os.makedirs(main.FACE_DATA_FOLDER)
+        shutil.copy(os.path.join(FACE_DATA, 'face_2_0.jpg'), os.path.join(main.FACE_DATA_FOLDER, 'face_damat_0.jpg'))
+        shutil.copy(os.path.join(FACE_DATA, 'face_3_0.jpg'), os.path.join(main.FACE_DATA_FOLDER, 'face_misafir_0.jpg'))
+        yield main
+    finally:
+        os.chdir(original_cwd)
+
+
+@pytest.fixture(scope='module')
+def photo_path(app_module, tmp_path_factory):
+    img = Image.new('RGB', (2400, 1600), (130, 120, 110))
+    for name, position, size in PASTED_FACES:
+        with Image.open(os.path.join(FACE_DATA, name)) as crop:
+            img.paste(crop.convert('RGB').resize((size, size)), position)
+    path = str(tmp_path_factory.mktemp('photos') / 'dugun.jpg')
+    img.save(path, 'JPEG', quality=90)
+    return path
+
+
+def test_detect_faces_finds_pasted_faces(app_module, photo_path):
+    [faces] = app_module.detect_faces([photo_path])
+    assert len(faces) == len(PASTED_FACES)
+    # Kutular orijinal piksellerde ve yapıştırılan kırpıntıların içinde olmalı
+    for (x, y, w, h, vector), (_, (left, top), size) in zip(sorted(faces), sorted(PASTED_FACES, key=lambda f: f[1])):
+        assert left <= x + w / 2 <= left + size and top <= y + h / 2 <= top + size
+        assert len(vector) == 128 * 4
+
+
+def test_reference_without_face_is_skipped(app_module):
+    # face_1_1 yüz değil, arka plan kırpıntısıdır
+    assert app_module.reference_embedding(os.path.join(FACE_DATA, 'face_1_1.jpg')) is None
+
+
+def test_photo_matches_only_the_right_person(app_module, photo_path):
+    conn = app_module.connect_db()
+    try:
+        app_module.save_faces(conn, app_module.FACE_MODEL, [('dugun.jpg', app_module.detect_faces([photo_path])[0])])
+        matches = app_module.FaceIndex().match(conn, app_module.FACE_MODEL)
+    finally:
+        conn.close()
+
+    assert list(matches['damat']) == ['dugun.jpg']
+    assert matches['damat']['dugun.jpg'] <= app_module.FACE_MATCH_DISTANCE
+    assert matches['misafir'] == {}
@@ -0,0 +1,60 @@
+"""Sık çalışan sorguların beklenen indeksi kullandığını EXPLAIN QUERY PLAN ile doğrular.
+
+Bir indeks ya da sorgu değişip tam tarama veya geçici sıralamaya düşerse
+bu test başarısız olur (python main.py check-query-plans ile aynı denetim).
+"""
+import importlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='module')
+def app_module(tmp_path_factory):
+    # main içe aktarılırken klasörlerini çalışma dizininde açar; depoyu kirletmesin
+    workdir = tmp_path_factory.mktemp('app')
+    original_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        main = importlib.import_module('main')
+        main.DATABASE = str(workdir / 'wedding_photos.db')
+        main.init_db()
+        yield main
+    finally:
+        os.chdir(original_cwd)
+
+
+@pytest.fixture
+def conn(app_module):
+    conn = app_module.connect_db()
+    yield conn
+    conn.close()
+
+
+def test_hot_queries_listed(app_module):
+    assert app_module.HOT_QUERIES
+
+
+def test_hot_queries_use_their_index(app_module, conn):
+    for label, sql, params, index_name in app_module.HOT_QUERIES:
+        plan = ' | '.join(row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params))
+        assert f'INDEX {index_name}' in plan, f'{label}: {index_name} kullanılmıyor ({plan})'
+        assert 'TEMP B-TREE' not in plan, f'{label}: geçici sıralama yapılıyor ({plan})'
+
+
+def test_check_query_plans_reports_no_failures(app_module, conn):
+    assert app_module.check_query_plans(conn) == []
+
+
+def test_check_query_plans_detects_missing_index(app_module, conn):
+    conn.execute('DROP INDEX idx_photos_content_hash')
+    try:
+        failures = app_module.check_query_plans(conn)
+        assert [label for label, _ in failures] == ['İçerik özeti ile tekrar kontrolü']
+    finally:
+        conn.rollback()
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_photos_content_hash ON photos (content_hash)')
+        conn.commit()